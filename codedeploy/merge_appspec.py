@@ -0,0 +1,45 @@
+"""Add the warm-up hook to the application's appspec.yml.
+
+    python merge_appspec.py <bundle dir> <hook location> <timeout seconds>
+
+Runs in the Package CodeBuild project on the BuildArtifact bundle. Hooks the
+application already declares are kept; the warm-up runs after them.
+"""
+import os
+import sys
+
+import yaml
+
+
+def merge(appspec: dict, location: str, timeout: int) -> dict:
+    appspec = appspec or {"version": 0.0, "os": "linux"}
+    hooks = appspec.get("hooks") or {}
+
+    validate = [hook for hook in hooks.get("ValidateService") or [] if hook.get("location") != location]
+    validate.append({"location": location, "timeout": timeout, "runas": "root"})
+    hooks["ValidateService"] = validate
+
+    appspec["hooks"] = hooks
+    return appspec
+
+
+def main(argv) -> int:
+    bundle, location, timeout = argv[1], argv[2], int(argv[3])
+
+    path = os.path.join(bundle, "appspec.yml")
+    if os.path.exists(os.path.join(bundle, "appspec.yaml")):
+        path = os.path.join(bundle, "appspec.yaml")
+
+    appspec = None
+    if os.path.exists(path):
+        with open(path) as file:
+            appspec = yaml.safe_load(file)
+
+    with open(path, "w") as file:
+        yaml.safe_dump(merge(appspec, location, timeout), file, sort_keys=False)
+    print(f"Added {location} to the ValidateService hooks of {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,88 @@
+#!/bin/bash
+
+# ValidateService hook: warm the JIT and connection pools of a green instance
+# before CodeDeploy lets the ALB send it production traffic.
+#
+# Replays the requests in warm_up_requests.txt ("METHOD /path" per line) against
+# localhost in rounds and exits once the round p99 has settled, i.e. changed by
+# no more than TOLERANCE_PERCENT for SETTLE_ROUNDS rounds in a row (and is under
+# TARGET_P99_MS when set). Only 2xx/3xx responses count towards the p99; a
+# round where most requests fail or are refused never counts as settled.
+# Exits 1 after MAX_ROUNDS so the deployment fails and rolls back instead of
+# serving from a JVM that never warmed up.
+
+HOOK_DIR=$(dirname "$0")
+source "$HOOK_DIR/warm_up.env"   # APP_PORT, ROUND_REQUESTS, CONCURRENCY, MAX_ROUNDS, SETTLE_ROUNDS, TOLERANCE_PERCENT, TARGET_P99_MS
+REQUESTS_FILE="$HOOK_DIR/warm_up_requests.txt"
+TIMES=$(mktemp)
+trap 'rm -f "$TIMES"' EXIT
+
+# Tomcat may still be deploying the new WAR
+for _ in $(seq 60); do
+  curl -s -o /dev/null "http://localhost:$APP_PORT/" && break
+  sleep 2
+done
+
+replay_round() {
+  : > "$TIMES"
+  local sent=0
+  while (( sent < ROUND_REQUESTS )); do
+    local pass_start=$sent
+    while read -r method path || [[ -n "$method" ]]; do
+      [[ -z "$method" || "$method" == \#* ]] && continue
+      # http_code 000: refused or timed out
+      curl -s -o /dev/null -X "$method" -w '%{http_code} %{time_total}\n' "http://localhost:$APP_PORT$path" >> "$TIMES" &
+      sent=$((sent + 1))
+      (( sent % CONCURRENCY == 0 )) && wait
+      (( sent >= ROUND_REQUESTS )) && break
+    done < "$REQUESTS_FILE"
+    if (( sent == pass_start )); then
+      echo "No requests in $REQUESTS_FILE, failing the deployment"
+      exit 1
+    fi
+  done
+  wait
+}
+
+round_p99_us() {
+  awk '$1 >= 200 && $1 < 400 { print $2 }' "$TIMES" | sort -n \
+    | awk '{ times[NR] = $1 } END { if (NR == 0) { print 0; exit } index99 = int(NR * 0.99 + 0.999); printf "%d", times[index99] * 1000000 }'
+}
+
+round_failed() {
+  awk '$1 < 200 || $1 >= 400' "$TIMES" | wc -l
+}
+
+previous=0
+settled=0
+for round in $(seq "$MAX_ROUNDS"); do
+  replay_round
+  p99=$(round_p99_us)
+  failed=$(round_failed)
+  total=$(wc -l < "$TIMES")
+
+  # Errors answer fast: a failing round says nothing about how warm the JVM is
+  if (( failed * 2 > total )); then
+    settled=0
+    echo "Warm-up round $round: $failed of $total requests failed (status $(awk '$1 < 200 || $1 >= 400 { print $1 }' "$TIMES" | sort | uniq -c | awk '{ printf "%s%s x%s", sep, $2, $1; sep = ", " }')), not settled"
+    continue
+  fi
+  delta=$(( p99 > previous ? p99 - previous : previous - p99 ))
+
+  if (( round > 1 && delta * 100 <= previous * TOLERANCE_PERCENT )) \
+      && (( TARGET_P99_MS == 0 || p99 <= TARGET_P99_MS * 1000 )); then
+    settled=$((settled + 1))
+  else
+    settled=0
+  fi
+  echo "Warm-up round $round: p99 $((p99 / 1000))ms (previous $((previous / 1000))ms, $failed of $total failed, settled $settled/$SETTLE_ROUNDS)"
+
+  if (( settled >= SETTLE_ROUNDS )); then
+    echo "Warm-up converged after $round rounds"
+    exit 0
+  fi
+  previous=$p99
+done
+
+echo "Warm-up did not converge in $MAX_ROUNDS rounds, failing the deployment"
+exit 1
@@ -0,0 +1,54 @@
+"""Keep the configured predictive scaling policies on the deployment group's ASGs.
+
+CodeDeploy blue/green with COPY_AUTO_SCALING_GROUP replaces the ASG that
+JavaStack created. On every successful deployment this function puts the
+configured predictive policies on the ASGs now in the deployment group and
+removes any other predictive policy (e.g. one copied from the blue fleet).
+"""
+import json
+import os
+
+import boto3
+
+codedeploy = boto3.client("codedeploy")
+autoscaling = boto3.client("autoscaling")
+
+
+def resource_label():
+    # app/<alb-name>/<id>/targetgroup/<tg-name>/<id>
+    load_balancer = os.environ["LOAD_BALANCER_ARN"].split(":loadbalancer/", 1)[1]
+    target_group = os.environ["TARGET_GROUP_ARN"].split(":", 5)[5]
+    return f"{load_balancer}/{target_group}"
+
+
+def handler(event, context):
+    policies = json.loads(os.environ["POLICIES"])
+    for policy in policies:
+        for metric in policy["configuration"]["MetricSpecifications"]:
+            pair = metric["PredefinedMetricPairSpecification"]
+            if pair["PredefinedMetricType"] == "ALBRequestCount":
+                pair["ResourceLabel"] = resource_label()
+
+    group = codedeploy.get_deployment_group(
+        applicationName=os.environ["APPLICATION_NAME"],
+        deploymentGroupName=os.environ["DEPLOYMENT_GROUP_NAME"],
+    )["deploymentGroupInfo"]
+
+    wanted = {policy["name"] for policy in policies}
+    for asg in group.get("autoScalingGroups", []):
+        asg_name = asg["name"]
+        existing = autoscaling.describe_policies(
+            AutoScalingGroupName=asg_name, PolicyTypes=["PredictiveScaling"])["ScalingPolicies"]
+
+        for policy in existing:
+            if policy["PolicyName"] not in wanted:
+                autoscaling.delete_policy(AutoScalingGroupName=asg_name, PolicyName=policy["PolicyName"])
+
+        for policy in policies:
+            autoscaling.put_scaling_policy(
+                AutoScalingGroupName=asg_name,
+                PolicyName=policy["name"],
+                PolicyType="PredictiveScaling",
+                PredictiveScalingConfiguration=policy["configuration"],
+            )
+            print(f"Applied predictive scaling policy {policy['name']} to {asg_name}")
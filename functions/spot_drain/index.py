@@ -0,0 +1,26 @@
+"""Drain a Spot instance from the ALB target group when it gets its interruption warning.
+
+EC2 sends the warning two minutes before reclaiming the instance. Deregistering
+right away lets the target group stop routing new requests and finish in-flight
+ones within the (shorter) deregistration delay, instead of requests failing
+when the instance disappears.
+"""
+import os
+
+import boto3
+
+elbv2 = boto3.client("elbv2")
+
+
+def handler(event, context):
+    instance_id = event["detail"]["instance-id"]
+    target_group_arn = os.environ["TARGET_GROUP_ARN"]
+
+    targets = elbv2.describe_target_health(TargetGroupArn=target_group_arn)["TargetHealthDescriptions"]
+    registered = [target["Target"] for target in targets if target["Target"]["Id"] == instance_id]
+    if not registered:
+        print(f"{instance_id} is not registered in the target group")
+        return
+
+    elbv2.deregister_targets(TargetGroupArn=target_group_arn, Targets=registered)
+    print(f"Deregistered {instance_id} ahead of its Spot interruption")
@@ -0,0 +1,371 @@
+"""Streaming analyzer for ALB access logs.
+
+    python -m sbi_fpt.alb_logs ./alb-log/AWSLogs/123456789012/elasticloadbalancing/ap-southeast-1/2024/05/01
+    python -m sbi_fpt.alb_logs s3://sbi-fpt-dev-alb-log/AWSLogs/123456789012/elasticloadbalancing/ap-southeast-1/2024/05/01/ --format json
+
+Every .gz file is decompressed and parsed line by line in a worker process and
+reduced to mergeable histograms, so memory depends on the number of distinct
+paths, targets and minutes, never on the size of the logs.
+"""
+import argparse
+import contextlib
+import functools
+import gzip
+import heapq
+import io
+import json
+import os
+import re
+import subprocess
+import sys
+from collections import Counter, defaultdict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+# Columns and RegexSerDe pattern of the ALB access log format, shared with the Athena table
+# https://docs.aws.amazon.com/elasticloadbalancing/latest/application/load-balancer-access-logs.html
+ALB_LOG_COLUMNS = [
+    ("type", "string"),
+    ("time", "string"),
+    ("elb", "string"),
+    ("client_ip", "string"),
+    ("client_port", "int"),
+    ("target_ip", "string"),
+    ("target_port", "int"),
+    ("request_processing_time", "double"),
+    ("target_processing_time", "double"),
+    ("response_processing_time", "double"),
+    ("elb_status_code", "int"),
+    ("target_status_code", "string"),
+    ("received_bytes", "bigint"),
+    ("sent_bytes", "bigint"),
+    ("request_verb", "string"),
+    ("request_url", "string"),
+    ("request_proto", "string"),
+    ("user_agent", "string"),
+    ("ssl_cipher", "string"),
+    ("ssl_protocol", "string"),
+    ("target_group_arn", "string"),
+    ("trace_id", "string"),
+    ("domain_name", "string"),
+    ("chosen_cert_arn", "string"),
+    ("matched_rule_priority", "string"),
+    ("request_creation_time", "string"),
+    ("actions_executed", "string"),
+    ("redirect_url", "string"),
+    ("lambda_error_reason", "string"),
+    ("target_port_list", "string"),
+    ("target_status_code_list", "string"),
+    ("classification", "string"),
+    ("classification_reason", "string"),
+    ("conn_trace_id", "string"),
+]
+
+ALB_LOG_REGEX = (
+    r'([^ ]*) ([^ ]*) ([^ ]*) ([^ ]*):([0-9]*) ([^ ]*)[:-]([0-9]*) ([-.0-9]*) ([-.0-9]*) ([-.0-9]*) '
+    r'(|[-0-9]*) (-|[-0-9]*) ([-0-9]*) ([-0-9]*) "([^ ]*) (.*) (- |[^ ]*)" "([^"]*)" ([A-Z0-9-_]+) '
+    r'([A-Za-z0-9.-]*) ([^ ]*) "([^"]*)" "([^"]*)" "([^"]*)" ([-.0-9]*) ([^ ]*) "([^"]*)" "([^"]*)" '
+    r'"([^ ]*)" "([^\s]+?)" "([^\s]+)" "([^ ]*)" "([^ ]*)" ?([^ ]*)?( .*)?'
+)
+
+_LINE = re.compile(ALB_LOG_REGEX)
+_COLUMN = {column: index + 1 for index, (column, _) in enumerate(ALB_LOG_COLUMNS)}
+
+# request / target / response processing time columns
+TIMINGS = {
+    "request": _COLUMN["request_processing_time"],
+    "target": _COLUMN["target_processing_time"],
+    "response": _COLUMN["response_processing_time"],
+}
+
+# Numeric and UUID/hex path segments collapse to {id}, keeping per-path state bounded
+_ID_SEGMENT = re.compile(r"^(\d+|[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}|[0-9a-fA-F]{16,})$")
+
+
+########### Histogram ##################
+
+class LatencyHistogram:
+    """Log-linear histogram of durations in microseconds.
+
+    Values keep their top SIGNIFICANT_BITS bits (under 1% error), so the bucket
+    key is the bucket's lower bound and two histograms merge by adding counts.
+    """
+
+    SIGNIFICANT_BITS = 7
+
+    def __init__(self, counts=None):
+        self.counts = Counter(counts or {})
+
+    def record(self, seconds: float) -> None:
+        value = int(seconds * 1_000_000)
+        shift = max(0, value.bit_length() - self.SIGNIFICANT_BITS)
+        self.counts[(value >> shift) << shift] += 1
+
+    def merge(self, other: "LatencyHistogram") -> "LatencyHistogram":
+        self.counts.update(other.counts)
+        return self
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts.values())
+
+    def percentile(self, percent: float) -> float:
+        total = self.count
+        if not total:
+            return 0.0
+        rank = max(1, -(-total * percent // 100))
+        seen = 0
+        for value in sorted(self.counts):
+            seen += self.counts[value]
+            if seen >= rank:
+                return value / 1_000_000
+        return max(self.counts) / 1_000_000
+
+    def summary(self) -> dict:
+        count = self.count
+        return {
+            "count": count,
+            "mean": round(sum(value * n for value, n in self.counts.items()) / count / 1_000_000, 6) if count else 0.0,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "max": max(self.counts) / 1_000_000 if count else 0.0,
+        }
+
+
+########### Parsing ##################
+
+def normalize_path(url: str) -> str:
+    path = url.split("://", 1)[-1]
+    path = "/" + path.split("/", 1)[1] if "/" in path else "/"
+    path = path.split("?", 1)[0]
+    return "/".join("{id}" if _ID_SEGMENT.match(segment) else segment for segment in path.split("/"))
+
+
+class LogStats:
+    """Everything the report needs from a set of log lines; merge() combines workers."""
+
+    def __init__(self, top: int = 20):
+        self.top = top
+        self.files = 0
+        self.records = 0
+        self.unparsed = 0
+        self.status = Counter()
+        self.path_status = defaultdict(Counter)
+        self.paths = defaultdict(lambda: defaultdict(LatencyHistogram))
+        self.targets = defaultdict(lambda: defaultdict(LatencyHistogram))
+        self.minutes = defaultdict(lambda: defaultdict(LatencyHistogram))
+        self.slowest = []  # min-heap of (total seconds, time, url, target)
+
+    def add_line(self, line: str) -> None:
+        match = _LINE.match(line)
+        if not match:
+            self.unparsed += 1
+            return
+        self.records += 1
+
+        path = normalize_path(match.group(_COLUMN["request_url"]))
+        target_ip = match.group(_COLUMN["target_ip"])
+        target = f"{target_ip}:{match.group(_COLUMN['target_port'])}" if target_ip else "-"
+        minute = match.group(_COLUMN["time"])[:16]
+        status = match.group(_COLUMN["elb_status_code"]) or "-"
+        self.status[status] += 1
+        self.path_status[path][status] += 1
+
+        total = 0.0
+        for kind, column in TIMINGS.items():
+            seconds = float(match.group(column) or -1)
+            # -1: the ALB never got a response from (or never reached) the target
+            if seconds < 0:
+                continue
+            total += seconds
+            self.paths[path][kind].record(seconds)
+            self.minutes[minute][kind].record(seconds)
+            if target_ip:
+                self.targets[target][kind].record(seconds)
+
+        entry = (total, match.group(_COLUMN["time"]), match.group(_COLUMN["request_url"]), target)
+        if len(self.slowest) < self.top:
+            heapq.heappush(self.slowest, entry)
+        elif entry > self.slowest[0]:
+            heapq.heapreplace(self.slowest, entry)
+
+    def merge(self, other: "LogStats") -> "LogStats":
+        self.files += other.files
+        self.records += other.records
+        self.unparsed += other.unparsed
+        self.status.update(other.status)
+        for path, statuses in other.path_status.items():
+            self.path_status[path].update(statuses)
+        for mine, theirs in ((self.paths, other.paths), (self.targets, other.targets), (self.minutes, other.minutes)):
+            for key, histograms in theirs.items():
+                for kind, histogram in histograms.items():
+                    mine[key][kind].merge(histogram)
+        self.slowest = heapq.nlargest(self.top, self.slowest + other.slowest)
+        heapq.heapify(self.slowest)
+        return self
+
+    def __getstate__(self):
+        # defaultdicts with lambdas don't pickle; workers send plain dicts back
+        return {
+            "top": self.top, "files": self.files, "records": self.records, "unparsed": self.unparsed,
+            "status": self.status, "path_status": dict(self.path_status), "slowest": self.slowest,
+            **{name: {key: {kind: histogram.counts for kind, histogram in histograms.items()}
+                      for key, histograms in getattr(self, name).items()}
+               for name in ("paths", "targets", "minutes")},
+        }
+
+    def __setstate__(self, state):
+        self.__init__(state["top"])
+        self.files, self.records, self.unparsed = state["files"], state["records"], state["unparsed"]
+        self.status = state["status"]
+        self.path_status.update(state["path_status"])
+        self.slowest = state["slowest"]
+        for name in ("paths", "targets", "minutes"):
+            for key, histograms in state[name].items():
+                for kind, counts in histograms.items():
+                    getattr(self, name)[key][kind] = LatencyHistogram(counts)
+
+    def to_dict(self) -> dict:
+        def grouped(groups):
+            return {key: {kind: histogram.summary() for kind, histogram in histograms.items()}
+                    for key, histograms in sorted(groups.items())}
+
+        return {
+            "files": self.files,
+            "records": self.records,
+            "unparsed": self.unparsed,
+            "status": dict(sorted(self.status.items())),
+            "paths": {path: {"status": dict(sorted(self.path_status[path].items())), **timings}
+                      for path, timings in grouped(self.paths).items()},
+            "targets": grouped(self.targets),
+            "minutes": grouped(self.minutes),
+            "slowest": [
+                {"totalSeconds": round(total, 6), "time": time, "url": url, "target": target}
+                for total, time, url, target in sorted(self.slowest, reverse=True)
+            ],
+        }
+
+
+########### Sources ##################
+
+def list_sources(source: str, aws: str = "aws") -> list:
+    """The .gz log files of a local directory (recursive) or an s3://bucket/prefix, listed with the AWS CLI."""
+    if source.startswith("s3://"):
+        bucket, _, prefix = source[len("s3://"):].partition("/")
+        # The CLI follows the pagination; null when nothing matches
+        listing = subprocess.run([aws, "s3api", "list-objects-v2", "--bucket", bucket, "--prefix", prefix,
+                                  "--query", "Contents[].Key", "--output", "json"],
+                                 capture_output=True, text=True)
+        if listing.returncode:
+            raise RuntimeError(f"Could not list {source}: {listing.stderr.strip()}")
+        return [f"s3://{bucket}/{key}" for key in json.loads(listing.stdout) or [] if key.endswith(".gz")]
+
+    if os.path.isfile(source):
+        return [source]
+    return sorted(
+        os.path.join(directory, name)
+        for directory, _, names in os.walk(source)
+        for name in names if name.endswith(".gz")
+    )
+
+
+@contextlib.contextmanager
+def _open(source: str, aws: str = "aws"):
+    if not source.startswith("s3://"):
+        with gzip.open(source, "rt", encoding="utf-8", errors="replace") as lines:
+            yield lines
+        return
+
+    # The object is read as the gzip stream is consumed, never downloaded whole
+    with subprocess.Popen([aws, "s3", "cp", "--only-show-errors", source, "-"],
+                          stdout=subprocess.PIPE, stderr=subprocess.PIPE) as process:
+        yield io.TextIOWrapper(gzip.GzipFile(fileobj=process.stdout), encoding="utf-8", errors="replace")
+        error = process.stderr.read().decode(errors="replace").strip()
+    if process.returncode:
+        raise RuntimeError(f"Could not read {source}: {error}")
+
+
+def analyze_file(source: str, top: int = 20, aws: str = "aws") -> LogStats:
+    stats = LogStats(top)
+    stats.files = 1
+    with _open(source, aws) as lines:
+        for line in lines:
+            stats.add_line(line)
+    return stats
+
+
+def analyze(sources: list, workers: int = None, top: int = 20, aws: str = "aws") -> LogStats:
+    """Analyze files in a process pool, merging each result as it arrives."""
+    stats = LogStats(top)
+    if workers == 1:
+        for source in sources:
+            stats.merge(analyze_file(source, top, aws))
+        return stats
+
+    workers = workers or os.cpu_count()
+    analyze_one = functools.partial(analyze_file, top=top, aws=aws)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Two files in flight per worker: results are merged in completion order and
+        # dropped, instead of queued behind a slow file as pool.map would
+        pending = set()
+        for source in sources:
+            if len(pending) >= 2 * workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stats.merge(future.result())
+            pending.add(pool.submit(analyze_one, source))
+        for future in wait(pending).done:
+            stats.merge(future.result())
+    return stats
+
+
+########### Report ##################
+
+def text_report(report: dict, limit: int = 15) -> str:
+    lines = [
+        f"{report['records']} records from {report['files']} files ({report['unparsed']} unparsed)",
+        "",
+        "Status codes: " + ", ".join(f"{status}={count}" for status, count in report["status"].items()),
+    ]
+
+    def table(title, rows):
+        lines.extend(["", title, f"  {'count':>9} {'p50':>9} {'p99':>9} {'max':>9}  key"])
+        for key, summary in rows[:limit]:
+            lines.append(f"  {summary['count']:>9} {summary['p50']:>9.3f} {summary['p99']:>9.3f} {summary['max']:>9.3f}  {key}")
+
+    def by_p99(groups):
+        return sorted(((key, timings["target"]) for key, timings in groups.items() if "target" in timings),
+                      key=lambda row: row[1]["p99"], reverse=True)
+
+    table("Paths by p99 target_processing_time (s)", by_p99(report["paths"]))
+    table("Targets by p99 target_processing_time (s)", by_p99(report["targets"]))
+    table("Minutes by p99 target_processing_time (s)", by_p99(report["minutes"]))
+
+    lines.extend(["", "Slowest requests (request + target + response, s)"])
+    for entry in report["slowest"][:limit]:
+        lines.append(f"  {entry['totalSeconds']:>9.3f}  {entry['time']}  {entry['target']}  {entry['url']}")
+
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m sbi_fpt.alb_logs", description=__doc__.splitlines()[0])
+    parser.add_argument("source", help="Directory or .gz file synced from the ALB log bucket, or s3://bucket/prefix")
+    parser.add_argument("--workers", type=int, help="Worker processes, default one per CPU")
+    parser.add_argument("--top", type=int, default=20, help="Slowest requests to keep")
+    parser.add_argument("--format", choices=["text", "json"], default="text")
+    parser.add_argument("--aws", default="aws", help="AWS CLI executable, for s3:// sources")
+    args = parser.parse_args(argv)
+
+    sources = list_sources(args.source, args.aws)
+    if not sources:
+        print(f"No .gz log files under {args.source}", file=sys.stderr)
+        return 1
+
+    report = analyze(sources, args.workers, args.top, args.aws).to_dict()
+    print(json.dumps(report, indent=2) if args.format == "json" else text_report(report))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
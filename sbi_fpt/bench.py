@@ -0,0 +1,155 @@
+"""Synthesis benchmark and template budgets for every stack.
+
+    python -m sbi_fpt.bench --parameters tests/fixtures/parameters.yaml --context bench
+    python -m sbi_fpt.bench ... --update-baseline tests/benchmark/baseline.json
+
+Each stack is measured in its own fresh process so peak RSS is per stack.
+"""
+import argparse
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from sbi_fpt.registry import STACKS
+
+# CloudFormation quotas: resources per stack and template body uploaded via S3
+CFN_MAX_RESOURCES = 500
+CFN_MAX_TEMPLATE_BYTES = 1_000_000
+CFN_LIMIT_HEADROOM = 0.8
+
+DEFAULT_BUDGETS = {
+    # Wall time is noisy across machines: ratio against the baseline plus slack
+    "timeRatio": 2.0,
+    "timeSlackSeconds": 2.0,
+    "templateBytesRatio": 1.15,
+    "resourceCountRatio": 1.15,
+}
+
+
+def _peak_rss_kb() -> int:
+    """Peak RSS of this process plus its jsii node kernel (Linux), else of this process."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    try:
+        pids = os.listdir("/proc")
+    except OSError:
+        return peak
+
+    for pid in pids:
+        if not pid.isdigit():
+            continue
+        try:
+            with open(f"/proc/{pid}/status") as file:
+                status = dict(line.split(":", 1) for line in file if ":" in line)
+        except OSError:
+            continue
+        if int(status.get("PPid", "0").strip()) == os.getpid():
+            peak += int(status.get("VmHWM", "0 kB").split()[0])
+
+    return peak
+
+
+def measure_stack(stack_id: str, parameters_path: str, context_name: str, root: str = ".") -> dict:
+    """Synthesize one stack three times: cold, warm without nag, warm with nag."""
+    from sbi_fpt.synth import load_cdk_context, load_parameters, offline_context, synth_app
+
+    context = load_parameters(parameters_path)[context_name]
+    # Lookups answered from parameters.yaml: no credentials, no network in the timings
+    cdk_context = {**load_cdk_context(root), **offline_context(context)}
+
+    timings = {}
+    with tempfile.TemporaryDirectory() as outdir:
+        for phase, nag in (("coldSeconds", False), ("synthSeconds", False), ("withNagSeconds", True)):
+            start = time.perf_counter()
+            assembly = synth_app(context, os.path.join(outdir, phase), [stack_id], cdk_context, nag=nag)
+            timings[phase] = time.perf_counter() - start
+
+        with open(assembly.stacks[0].template_full_path) as file:
+            body = file.read()
+
+    return {
+        "coldSeconds": round(timings["coldSeconds"], 3),
+        "synthSeconds": round(timings["synthSeconds"], 3),
+        "nagSeconds": round(max(0.0, timings["withNagSeconds"] - timings["synthSeconds"]), 3),
+        "peakRssMb": round(_peak_rss_kb() / 1024, 1),
+        "templateBytes": len(body.encode()),
+        "resourceCount": len(json.loads(body).get("Resources", {})),
+    }
+
+
+def run_benchmark(parameters_path: str, context_name: str, stack_ids=None, root: str = ".") -> dict:
+    results = {}
+    for stack_id in stack_ids or [spec.construct_id for spec in STACKS]:
+        # A fresh interpreter (and jsii kernel) per stack keeps timings and RSS independent
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+            results[stack_id] = pool.submit(measure_stack, stack_id, parameters_path, context_name, root).result()
+    return results
+
+
+def check_budgets(results: dict, baseline: dict) -> list:
+    budgets = {**DEFAULT_BUDGETS, **baseline.get("budgets", {})}
+    violations = []
+
+    for stack_id, result in results.items():
+        if result["resourceCount"] > CFN_MAX_RESOURCES * CFN_LIMIT_HEADROOM:
+            violations.append(f"{stack_id}: {result['resourceCount']} resources is near the CloudFormation limit of {CFN_MAX_RESOURCES}")
+        if result["templateBytes"] > CFN_MAX_TEMPLATE_BYTES * CFN_LIMIT_HEADROOM:
+            violations.append(f"{stack_id}: template of {result['templateBytes']} bytes is near the CloudFormation limit of {CFN_MAX_TEMPLATE_BYTES}")
+
+        reference = baseline.get("stacks", {}).get(stack_id)
+        if not reference:
+            continue
+
+        for metric in ("synthSeconds", "nagSeconds"):
+            limit = reference[metric] * budgets["timeRatio"] + budgets["timeSlackSeconds"]
+            if result[metric] > limit:
+                violations.append(f"{stack_id}: {metric} {result[metric]:.2f}s exceeds budget {limit:.2f}s")
+        for metric, ratio in (("templateBytes", "templateBytesRatio"), ("resourceCount", "resourceCountRatio")):
+            limit = reference[metric] * budgets[ratio]
+            if result[metric] > limit:
+                violations.append(f"{stack_id}: {metric} {result[metric]} exceeds budget {limit:.0f}")
+
+    return violations
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m sbi_fpt.bench", description=__doc__.splitlines()[0])
+    parser.add_argument("--parameters", default="parameters.yaml")
+    parser.add_argument("--context", required=True, help="Environment key in the parameters file")
+    parser.add_argument("--stacks", help="Comma-separated stack ids, default all")
+    parser.add_argument("--baseline", help="Baseline JSON to check budgets against")
+    parser.add_argument("--update-baseline", metavar="PATH", help="Write the results as the new baseline")
+    args = parser.parse_args(argv)
+
+    stack_ids = [name.strip() for name in args.stacks.split(",")] if args.stacks else None
+    results = run_benchmark(args.parameters, args.context, stack_ids)
+    print(json.dumps(results, indent=2))
+
+    if args.update_baseline:
+        # Merge, so refreshing a single stack keeps the others' baselines
+        baseline = {"budgets": DEFAULT_BUDGETS, "stacks": {}}
+        if os.path.exists(args.update_baseline):
+            with open(args.update_baseline) as file:
+                baseline = json.load(file)
+        baseline["budgets"] = {**DEFAULT_BUDGETS, **baseline.get("budgets", {})}
+        baseline["stacks"] = {**baseline.get("stacks", {}), **results}
+        with open(args.update_baseline, "w") as file:
+            json.dump(baseline, file, indent=2)
+            file.write("\n")
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            violations = check_budgets(results, json.load(file))
+        for violation in violations:
+            print(violation, file=sys.stderr)
+        return 1 if violations else 0
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
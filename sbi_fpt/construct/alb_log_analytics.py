@@ -0,0 +1,186 @@
+from aws_cdk import (
+    aws_athena as athena,
+    aws_glue as glue,
+    aws_s3 as s3,
+    Duration,
+    RemovalPolicy,
+    Stack,
+)
+from constructs import Construct
+
+from sbi_fpt.alb_logs import ALB_LOG_COLUMNS, ALB_LOG_REGEX
+
+# Named queries; every one is bounded by the day partition (? placeholders,
+# first and last day as yyyy/MM/dd) so Athena only reads those prefixes
+NAMED_QUERIES = {
+    "latency-by-path": (
+        "p50/p99 target_processing_time per path",
+        """SELECT url_extract_path(request_url) AS path,
+       count(*) AS requests,
+       approx_percentile(target_processing_time, 0.5) AS p50,
+       approx_percentile(target_processing_time, 0.99) AS p99
+FROM {table}
+WHERE day BETWEEN ? AND ?
+  AND target_processing_time >= 0
+GROUP BY 1
+ORDER BY p99 DESC
+LIMIT 100""",
+    ),
+    "slow-targets": (
+        "Targets ranked by p99 target_processing_time",
+        """SELECT target_ip,
+       target_port,
+       count(*) AS requests,
+       approx_percentile(target_processing_time, 0.99) AS p99,
+       avg(target_processing_time) AS mean,
+       max(target_processing_time) AS worst,
+       count_if(target_status_code LIKE '5%') AS target_5xx
+FROM {table}
+WHERE day BETWEEN ? AND ?
+  AND target_processing_time >= 0
+GROUP BY 1, 2
+ORDER BY p99 DESC""",
+    ),
+    "5xx-bursts": (
+        "Minutes with the most 5xx responses, from the ALB or the targets",
+        """SELECT date_trunc('minute', from_iso8601_timestamp(time)) AS minute,
+       count(*) AS requests,
+       count_if(elb_status_code >= 500) AS elb_5xx,
+       count_if(target_status_code LIKE '5%') AS target_5xx
+FROM {table}
+WHERE day BETWEEN ? AND ?
+GROUP BY 1
+HAVING count_if(elb_status_code >= 500) > 0
+ORDER BY elb_5xx DESC
+LIMIT 100""",
+    ),
+    "requests-per-minute": (
+        "Request rate and status classes per minute",
+        """SELECT date_trunc('minute', from_iso8601_timestamp(time)) AS minute,
+       count(*) AS requests,
+       count(*) / 60.0 AS requests_per_second,
+       count_if(elb_status_code BETWEEN 400 AND 499) AS status_4xx,
+       count_if(elb_status_code >= 500) AS status_5xx
+FROM {table}
+WHERE day BETWEEN ? AND ?
+GROUP BY 1
+ORDER BY 1""",
+    ),
+}
+
+
+class AlbLogAnalytics(Construct):
+    """Glue table, Athena workgroup and named queries over ALB access logs.
+
+    The table uses partition projection on `day` (the yyyy/MM/dd part of the
+    AWSLogs key), so no crawler or MSCK REPAIR is needed and queries only list
+    the prefixes of the days they filter on.
+    """
+
+    def __init__(self, scope: Construct, construct_id: str, *, name: str, log_bucket: s3.IBucket,
+                 config: dict, log_prefix: str = "") -> None:
+        super().__init__(scope, construct_id)
+
+        stack = Stack.of(self)
+        database_name = name.replace("-", "_")
+        table_name = "alb_access_logs"
+        location = (f"s3://{log_bucket.bucket_name}/{log_prefix + '/' if log_prefix else ''}"
+                    f"AWSLogs/{stack.account}/elasticloadbalancing/{stack.region}")
+
+        ########### Lifecycle ##################
+        if isinstance(log_bucket, s3.Bucket):
+            log_bucket.add_lifecycle_rule(
+                id="alb-log-tiering",
+                prefix=f"{log_prefix + '/' if log_prefix else ''}AWSLogs/",
+                transitions=[
+                    s3.Transition(storage_class=s3.StorageClass.INFREQUENT_ACCESS,
+                        transition_after=Duration.days(config.get("infrequentAccessDays", 30))),
+                    # Instant retrieval: old incidents stay queryable from Athena
+                    s3.Transition(storage_class=s3.StorageClass.GLACIER_INSTANT_RETRIEVAL,
+                        transition_after=Duration.days(config.get("glacierDays", 90))),
+                ],
+                # Logs are kept unless java.accessLogs.expirationDays asks for deletion
+                expiration=Duration.days(config["expirationDays"]) if "expirationDays" in config else None,
+            )
+
+        ########### Glue table ##################
+        database = glue.CfnDatabase(self, "Database",
+            catalog_id=stack.account,
+            database_input=glue.CfnDatabase.DatabaseInputProperty(
+                name=database_name,
+                description=f"ALB access logs of {name}",
+            ),
+        )
+
+        table = glue.CfnTable(self, "Table",
+            catalog_id=stack.account,
+            database_name=database_name,
+            table_input=glue.CfnTable.TableInputProperty(
+                name=table_name,
+                table_type="EXTERNAL_TABLE",
+                parameters={
+                    "projection.enabled": "true",
+                    "projection.day.type": "date",
+                    "projection.day.range": f"{config.get('projectionStartDay', '2024/01/01')},NOW",
+                    "projection.day.format": "yyyy/MM/dd",
+                    "projection.day.interval": "1",
+                    "projection.day.interval.unit": "DAYS",
+                    "storage.location.template": location + "/${day}",
+                },
+                partition_keys=[glue.CfnTable.ColumnProperty(name="day", type="string")],
+                storage_descriptor=glue.CfnTable.StorageDescriptorProperty(
+                    location=location,
+                    input_format="org.apache.hadoop.mapred.TextInputFormat",
+                    output_format="org.apache.hadoop.hive.ql.io.HiveIgnoreKeyTextOutputFormat",
+                    serde_info=glue.CfnTable.SerdeInfoProperty(
+                        serialization_library="org.apache.hadoop.hive.serde2.RegexSerDe",
+                        parameters={"serialization.format": "1", "input.regex": ALB_LOG_REGEX},
+                    ),
+                    columns=[glue.CfnTable.ColumnProperty(name=column, type=column_type)
+                             for column, column_type in ALB_LOG_COLUMNS],
+                ),
+            ),
+        )
+        table.add_dependency(database)
+
+        ########### Athena workgroup ##################
+        self.results_bucket = s3.Bucket(self, "ResultsBucket",
+            bucket_name=f"{name}-athena-results",
+            block_public_access=s3.BlockPublicAccess.BLOCK_ALL,
+            encryption=s3.BucketEncryption.S3_MANAGED,
+            enforce_ssl=True,
+            server_access_logs_bucket=log_bucket,
+            server_access_logs_prefix="athena-results",
+            lifecycle_rules=[s3.LifecycleRule(expiration=Duration.days(config.get("resultsRetentionDays", 7)))],
+            removal_policy=RemovalPolicy.DESTROY,
+            auto_delete_objects=True,
+        )
+
+        self.workgroup = athena.CfnWorkGroup(self, "WorkGroup",
+            name=name,
+            description=f"Incident queries over the ALB access logs of {name}",
+            recursive_delete_option=True,
+            work_group_configuration=athena.CfnWorkGroup.WorkGroupConfigurationProperty(
+                # Enforced, so clients can't lift the scan limit or write results elsewhere
+                enforce_work_group_configuration=True,
+                bytes_scanned_cutoff_per_query=config.get("bytesScannedCutoffMb", 10240) * 1024 * 1024,
+                publish_cloud_watch_metrics_enabled=True,
+                result_configuration=athena.CfnWorkGroup.ResultConfigurationProperty(
+                    output_location=f"s3://{self.results_bucket.bucket_name}/",
+                    encryption_configuration=athena.CfnWorkGroup.EncryptionConfigurationProperty(
+                        encryption_option="SSE_S3",
+                    ),
+                ),
+            ),
+        )
+
+        ########### Named queries ##################
+        for query_name, (description, query) in NAMED_QUERIES.items():
+            named_query = athena.CfnNamedQuery(self, f"Query-{query_name}",
+                name=f"{name}-{query_name}",
+                description=f"{description}. Parameters: first day, last day (yyyy/MM/dd)",
+                database=database_name,
+                work_group=self.workgroup.ref,
+                query_string=query.format(table=f'"{database_name}"."{table_name}"'),
+            )
+            named_query.add_dependency(table)
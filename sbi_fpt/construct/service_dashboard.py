@@ -0,0 +1,201 @@
+from aws_cdk import (
+    aws_cloudwatch as cloudwatch,
+    aws_cloudwatch_actions as cloudwatch_actions,
+    aws_elasticloadbalancingv2 as elbv2,
+    Duration,
+)
+from constructs import Construct
+
+# SLO alarms, by key of java.monitoring.slo
+SLO_ALARMS = {
+    "p99LatencySeconds": "latency-p99",
+    "errorRatePercent": "target-5xx-rate",
+    "minHealthyHosts": "healthy-hosts",
+    "rejectedConnections": "rejected-connections",
+}
+
+
+def slo_alarm_names(context: dict) -> list:
+    """Names of the SLO alarms ServiceDashboard creates, for CodeDeploy rollback."""
+    global_context = context["env"]
+    slo = context["java"].get("monitoring", {}).get("slo", {})
+    return [
+        f"{global_context['prefix']}-{global_context['environment']}-{context['java']['name']}-{suffix}"
+        for key, suffix in SLO_ALARMS.items() if key in slo
+    ]
+
+
+class ServiceDashboard(Construct):
+    """Dashboard and SLO alarms for an ALB-fronted ASG service.
+
+    CodeDeploy blue/green replaces the ASG with copies named after the
+    deployment group, so ASG and instance widgets use SEARCH expressions on
+    `search_term` instead of a fixed AutoScalingGroupName. NAT gateway widgets
+    graph `nat_gateway_ids` and are left out without them.
+    """
+
+    def __init__(self, scope: Construct, construct_id: str, *, name: str,
+                 load_balancer: elbv2.ApplicationLoadBalancer, target_group: elbv2.ApplicationTargetGroup,
+                 search_term: str, alarm_topic, slo: dict, period_seconds: int = 60,
+                 nat_gateway_ids: list = None) -> None:
+        super().__init__(scope, construct_id)
+
+        period = Duration.seconds(period_seconds)
+        lb_metrics = load_balancer.metrics
+        tg_metrics = target_group.metrics
+
+        ########### Alarms ##################
+        self.alarms = []
+        evaluation_periods = slo.get("evaluationPeriods", 3)
+
+        if "p99LatencySeconds" in slo:
+            self.add_alarm(f"{name}-{SLO_ALARMS['p99LatencySeconds']}", "LatencyAlarm",
+                tg_metrics.target_response_time(statistic="p99", period=period),
+                slo["p99LatencySeconds"], evaluation_periods, alarm_topic,
+                cloudwatch.ComparisonOperator.GREATER_THAN_THRESHOLD)
+
+        if "errorRatePercent" in slo:
+            error_rate = cloudwatch.MathExpression(
+                expression="IF(requests > 0, 100 * FILL(errors, 0) / requests, 0)",
+                using_metrics={
+                    "requests": tg_metrics.request_count(period=period),
+                    "errors": tg_metrics.http_code_target(elbv2.HttpCodeTarget.TARGET_5XX_COUNT, period=period),
+                },
+                label="Target 5XX %",
+                period=period,
+            )
+            self.add_alarm(f"{name}-{SLO_ALARMS['errorRatePercent']}", "ErrorRateAlarm",
+                error_rate, slo["errorRatePercent"], evaluation_periods, alarm_topic,
+                cloudwatch.ComparisonOperator.GREATER_THAN_THRESHOLD)
+
+        if "minHealthyHosts" in slo:
+            self.add_alarm(f"{name}-{SLO_ALARMS['minHealthyHosts']}", "HealthyHostsAlarm",
+                tg_metrics.healthy_host_count(statistic="Minimum", period=period),
+                slo["minHealthyHosts"], evaluation_periods, alarm_topic,
+                cloudwatch.ComparisonOperator.LESS_THAN_THRESHOLD)
+
+        if "rejectedConnections" in slo:
+            self.add_alarm(f"{name}-{SLO_ALARMS['rejectedConnections']}", "RejectedConnectionsAlarm",
+                lb_metrics.rejected_connection_count(period=period),
+                slo["rejectedConnections"], evaluation_periods, alarm_topic,
+                cloudwatch.ComparisonOperator.GREATER_THAN_THRESHOLD)
+
+        ########### Dashboard ##################
+        def search(namespace, metric_name, statistic, label, extra=""):
+            return cloudwatch.MathExpression(
+                expression=f"SEARCH('{{{namespace}}} MetricName=\"{metric_name}\" {extra}', '{statistic}', {period_seconds})",
+                using_metrics={},
+                label=label,
+                period=period,
+            )
+
+        asg_filter = f'"{search_term}"'
+        latency_annotations = [cloudwatch.HorizontalAnnotation(value=slo["p99LatencySeconds"], label="p99 SLO")] \
+            if "p99LatencySeconds" in slo else None
+
+        self.dashboard = cloudwatch.Dashboard(self, "Dashboard",
+            dashboard_name=name,
+            default_interval=Duration.hours(3),
+        )
+        self.dashboard.add_widgets(
+            cloudwatch.GraphWidget(
+                title="Target response time (s)",
+                left=[tg_metrics.target_response_time(statistic=statistic, period=period, label=statistic)
+                      for statistic in ("p50", "p90", "p99")],
+                left_annotations=latency_annotations,
+                width=12,
+            ),
+            cloudwatch.GraphWidget(
+                title="Requests and target 5XX",
+                left=[lb_metrics.request_count(period=period, label="RequestCount")],
+                right=[lb_metrics.http_code_target(elbv2.HttpCodeTarget.TARGET_5XX_COUNT, period=period, label="Target 5XX")],
+                width=12,
+            ),
+        )
+        self.dashboard.add_widgets(
+            cloudwatch.GraphWidget(
+                title="Target health",
+                left=[
+                    tg_metrics.healthy_host_count(statistic="Minimum", period=period, label="Healthy"),
+                    tg_metrics.unhealthy_host_count(statistic="Maximum", period=period, label="Unhealthy"),
+                ],
+                width=12,
+            ),
+            # ALBs have no surge queue: refused connections show up here instead
+            cloudwatch.GraphWidget(
+                title="Rejected and failed connections",
+                left=[
+                    lb_metrics.rejected_connection_count(period=period, label="RejectedConnectionCount"),
+                    lb_metrics.target_connection_error_count(period=period, label="TargetConnectionErrorCount"),
+                ],
+                right=[lb_metrics.active_connection_count(period=period, label="ActiveConnectionCount")],
+                width=12,
+            ),
+        )
+        if self.alarms:
+            self.dashboard.add_widgets(cloudwatch.AlarmStatusWidget(
+                title="SLO alarms",
+                alarms=self.alarms,
+                width=24,
+                height=3,
+            ))
+        self.dashboard.add_widgets(
+            cloudwatch.GraphWidget(
+                title="ASG capacity (blue and green)",
+                left=[
+                    search("AWS/AutoScaling,AutoScalingGroupName", "GroupInServiceInstances", "Maximum", "InService", asg_filter),
+                    search("AWS/AutoScaling,AutoScalingGroupName", "GroupDesiredCapacity", "Maximum", "Desired", asg_filter),
+                ],
+                width=8,
+            ),
+            # Per-instance EC2 metrics carry no ASG dimension: the busiest instance of each ASG instead
+            cloudwatch.GraphWidget(
+                title="CPU per ASG (%)",
+                left=[search("AWS/EC2,AutoScalingGroupName", "CPUUtilization", "Maximum", "Busiest instance", asg_filter)],
+                right=[search("AWS/EC2,AutoScalingGroupName", "CPUUtilization", "Average", "ASG", asg_filter)],
+                width=8,
+            ),
+            # Only burstable types report credits; a falling balance means throttling ahead
+            cloudwatch.GraphWidget(
+                title="Lowest CPU credit balance per ASG",
+                left=[search("AWS/EC2,AutoScalingGroupName", "CPUCreditBalance", "Minimum", "", asg_filter)],
+                width=8,
+            ),
+        )
+        if nat_gateway_ids:
+            def nat_metrics(metric_name, label):
+                return [cloudwatch.Metric(
+                    namespace="AWS/NATGateway",
+                    metric_name=metric_name,
+                    dimensions_map={"NatGatewayId": nat_gateway_id},
+                    statistic="Sum",
+                    label=f"{label} NAT {index + 1}".strip(),
+                    period=period,
+                ) for index, nat_gateway_id in enumerate(nat_gateway_ids)]
+
+            self.dashboard.add_widgets(
+                cloudwatch.GraphWidget(
+                    title="NAT gateway bytes",
+                    left=nat_metrics("BytesOutToDestination", "Out") + nat_metrics("BytesInFromDestination", "In"),
+                    width=12,
+                ),
+                cloudwatch.GraphWidget(
+                    title="NAT gateway ErrorPortAllocation",
+                    left=nat_metrics("ErrorPortAllocation", ""),
+                    width=12,
+                ),
+            )
+
+    def add_alarm(self, alarm_name, construct_id, metric, threshold, evaluation_periods, alarm_topic, comparison_operator):
+        alarm = cloudwatch.Alarm(self, construct_id,
+            alarm_name=alarm_name,
+            metric=metric,
+            threshold=threshold,
+            evaluation_periods=evaluation_periods,
+            comparison_operator=comparison_operator,
+            treat_missing_data=cloudwatch.TreatMissingData.NOT_BREACHING,
+        )
+        alarm.add_alarm_action(cloudwatch_actions.SnsAction(alarm_topic))
+        alarm.add_ok_action(cloudwatch_actions.SnsAction(alarm_topic))
+        self.alarms.append(alarm)
+        return alarm
@@ -0,0 +1,246 @@
+"""Synthesize once and deploy independent stacks in parallel.
+
+    python -m sbi_fpt.deploy --context dev --concurrency 2
+    python -m sbi_fpt.deploy --context dev --cache s3://sbi-fpt-dev-cdk-codepipeline/synth-cache
+
+The app is synthesized a single time into a cloud assembly. Every stack is then
+deployed from that assembly (`cdk deploy --app <assembly> --exclusively`) as
+soon as the stacks it depends on have finished, with at most `--concurrency`
+deployments running at once.
+
+With `--cache`, stacks whose inputs or synthesized template match the
+fingerprints of their last successful deploy are skipped (sbi_fpt.synth_cache).
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from sbi_fpt.registry import STACKS, STACKS_BY_ID
+from sbi_fpt.synth import load_parameters
+from sbi_fpt.synth_cache import SynthCache, input_fingerprint, template_fingerprint
+
+CLOUDFORMATION_STACK = "aws:cloudformation:stack"
+
+
+########### Cloud assembly ##################
+
+def synth(context_name: str, outdir: str, stack_ids=None, cdk: str = "cdk") -> None:
+    command = [cdk, "synth", "--quiet", "--output", outdir, "-c", f"contxt={context_name}"]
+    if stack_ids:
+        command += ["-c", f"stacks={','.join(stack_ids)}"]
+    subprocess.run(command, check=True)
+
+
+def _find_values(node, key):
+    if isinstance(node, dict):
+        for name, value in node.items():
+            if name == key:
+                yield value
+            else:
+                yield from _find_values(value, key)
+    elif isinstance(node, list):
+        for item in node:
+            yield from _find_values(item, key)
+
+
+def read_assembly(outdir: str) -> dict:
+    """Stack artifacts of an assembly with the dependencies between them.
+
+    Dependencies are the union of the manifest's own stack dependencies, the
+    Fn::ImportValue -> Export edges found in the templates and the ordering
+    declared in the stack registry.
+    """
+    with open(os.path.join(outdir, "manifest.json")) as file:
+        manifest = json.load(file)
+
+    stacks = {}
+    exports = {}
+    for artifact_id, artifact in manifest.get("artifacts", {}).items():
+        if artifact.get("type") != CLOUDFORMATION_STACK:
+            continue
+
+        with open(os.path.join(outdir, artifact["properties"]["templateFile"])) as file:
+            template = json.load(file)
+
+        for output in template.get("Outputs", {}).values():
+            export_name = output.get("Export", {}).get("Name")
+            if isinstance(export_name, str):
+                exports[export_name] = artifact_id
+
+        stacks[artifact_id] = {
+            "stackName": artifact["properties"].get("stackName", artifact_id),
+            "dependencies": set(artifact.get("dependencies", [])),
+            "imports": {name for name in _find_values(template, "Fn::ImportValue") if isinstance(name, str)},
+        }
+
+    for artifact_id, stack in stacks.items():
+        dependencies = {name for name in stack["dependencies"] if name in stacks}
+        dependencies |= {exports[name] for name in stack["imports"] if name in exports}
+        spec = STACKS_BY_ID.get(artifact_id)
+        if spec:
+            dependencies |= {name for name in spec.depends_on if name in stacks}
+        dependencies.discard(artifact_id)
+        stack["dependencies"] = dependencies
+
+    return stacks
+
+
+def deploy_order(stacks: dict) -> list:
+    """Registry order, constrained to respect dependencies; raises on cycles."""
+    rank = {spec.construct_id: index for index, spec in enumerate(STACKS)}
+    pending = sorted(stacks, key=lambda name: (rank.get(name, len(rank)), name))
+    ordered = []
+    while pending:
+        ready = [name for name in pending if stacks[name]["dependencies"] <= set(ordered)]
+        if not ready:
+            raise ValueError(f"Dependency cycle between stacks: {', '.join(pending)}")
+        ordered.append(ready[0])
+        pending.remove(ready[0])
+    return ordered
+
+
+########### Parallel deploy ##################
+
+def cdk_deploy(outdir: str, cdk: str = "cdk"):
+    lock = threading.Lock()
+
+    def run(stack_id: str) -> None:
+        process = subprocess.Popen(
+            [cdk, "deploy", "--app", outdir, stack_id, "--exclusively", "--require-approval", "never"],
+            stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+        for line in process.stdout:
+            with lock:
+                print(f"[{stack_id}] {line}", end="", flush=True)
+        if process.wait() != 0:
+            raise RuntimeError(f"cdk deploy {stack_id} exited with {process.returncode}")
+
+    return run
+
+
+def still_unchanged(stacks: dict, unchanged) -> set:
+    """Unchanged stacks none of whose dependencies is deployed in this run.
+
+    A dependent reads what its dependencies publish (AMI, subnet ids) at deploy
+    time, so an identical template still has to be deployed after them.
+    """
+    kept = set()
+    for stack_id in deploy_order(stacks):
+        if stack_id in unchanged and stacks[stack_id]["dependencies"] <= kept:
+            kept.add(stack_id)
+    return kept
+
+
+def deploy_all(stacks: dict, run, concurrency: int = 2, unchanged=()) -> dict:
+    """Deploy every stack once its dependencies succeeded.
+
+    Returns {stack_id: "deployed" | "unchanged" | "failed" | "skipped"}; stacks
+    depending on a failed stack are skipped, independent ones still run.
+    `unchanged` stacks are not deployed, unless a dependency is, and count as
+    done for their dependents.
+    """
+    order = deploy_order(stacks)
+    results = {stack_id: "unchanged" for stack_id in still_unchanged(stacks, unchanged)}
+    running = {}
+    concurrency = max(1, concurrency)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        while len(results) < len(order):
+            for stack_id in order:
+                if stack_id in results or stack_id in running.values():
+                    continue
+                dependencies = stacks[stack_id]["dependencies"]
+                if any(results.get(name) in ("failed", "skipped") for name in dependencies):
+                    results[stack_id] = "skipped"
+                elif all(results.get(name) in ("deployed", "unchanged") for name in dependencies) and len(running) < concurrency:
+                    running[pool.submit(run, stack_id)] = stack_id
+
+            if not running:
+                continue
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stack_id = running.pop(future)
+                error = future.exception()
+                if error:
+                    print(f"[{stack_id}] {error}", file=sys.stderr)
+                results[stack_id] = "failed" if error else "deployed"
+
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m sbi_fpt.deploy", description=__doc__.splitlines()[0])
+    parser.add_argument("--context", required=True, help="Environment key in parameters.yaml")
+    parser.add_argument("--stacks", help="Comma-separated stack ids, default all")
+    parser.add_argument("--concurrency", type=int, default=2)
+    parser.add_argument("--output", default="cdk.out")
+    parser.add_argument("--cdk", default="cdk", help="CDK CLI executable")
+    parser.add_argument("--dry-run", action="store_true", help="Synthesize and print the plan only")
+    parser.add_argument("--cache", help="Directory or s3://bucket/prefix of stack fingerprints; skip unchanged stacks")
+    parser.add_argument("--force", action="store_true", help="With --cache: deploy everything, then record")
+    parser.add_argument("--parameters", default="parameters.yaml")
+    args = parser.parse_args(argv)
+    if args.concurrency < 1:
+        parser.error(f"--concurrency must be at least 1, got {args.concurrency}")
+
+    stack_ids = [name.strip() for name in args.stacks.split(",")] if args.stacks else None
+
+    ########### Unchanged inputs: neither synthesized nor deployed ##################
+    cache, inputs, skipped = None, {}, {}
+    if args.cache:
+        context = load_parameters(args.parameters)[args.context]
+        cache = SynthCache(args.cache, args.context).load()
+        stack_ids = [spec.construct_id for spec in STACKS
+                     if (not stack_ids or spec.construct_id in stack_ids) and spec.enabled(context)]
+        inputs = {stack_id: input_fingerprint(STACKS_BY_ID[stack_id], context) for stack_id in stack_ids}
+        if not args.force:
+            skipped = {stack_id: "inputs unchanged" for stack_id in stack_ids
+                       if cache.matches(stack_id, "inputs", inputs[stack_id])}
+        stack_ids = [stack_id for stack_id in stack_ids if stack_id not in skipped]
+
+    for stack_id, reason in skipped.items():
+        print(f"{stack_id}: skipped, {reason}")
+    if not stack_ids and cache:
+        return 0
+
+    synth(args.context, args.output, stack_ids, cdk=args.cdk)
+    stacks = read_assembly(args.output)
+
+    ########### Unchanged template and assets: not deployed ##################
+    templates = {}
+    unchanged = set()
+    if cache:
+        templates = {stack_id: template_fingerprint(args.output, stack_id) for stack_id in stacks}
+        if not args.force:
+            matching = {stack_id for stack_id in stacks if cache.matches(stack_id, "template", templates[stack_id])}
+            unchanged = still_unchanged(stacks, matching)
+            for stack_id in sorted(matching - unchanged):
+                print(f"{stack_id}: template and assets unchanged, deployed after its redeployed dependencies")
+        for stack_id in sorted(unchanged):
+            print(f"{stack_id}: skipped, template and assets unchanged")
+
+    for stack_id in deploy_order(stacks):
+        dependencies = ", ".join(sorted(stacks[stack_id]["dependencies"])) or "-"
+        print(f"{stack_id} ({stacks[stack_id]['stackName']}) after: {dependencies}")
+    if args.dry_run:
+        return 0
+
+    results = deploy_all(stacks, cdk_deploy(args.output, cdk=args.cdk), concurrency=args.concurrency, unchanged=unchanged)
+    for stack_id, status in results.items():
+        print(f"{stack_id}: {status}")
+
+    if cache:
+        for stack_id, status in results.items():
+            if status in ("deployed", "unchanged"):
+                cache.record(stack_id, inputs[stack_id], templates[stack_id])
+        cache.save()
+
+    return 0 if all(status in ("deployed", "unchanged") for status in results.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
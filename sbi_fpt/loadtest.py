@@ -0,0 +1,434 @@
+"""asyncio load generator for the Java service behind the ALB.
+
+    python -m sbi_fpt.loadtest http://sbi-fpt-dev-alb-123.ap-southeast-1.elb.amazonaws.com --rate 60:10-200,300:200
+    python -m sbi_fpt.loadtest http://localhost:8080 --concurrency 30:1-50,60:50 --request / --request "POST /api/orders"
+    python -m sbi_fpt.loadtest http://localhost:8080 --rate 60:100 --output run.json --baseline baseline.json
+
+Open loop (--rate) sends requests on a schedule of arrivals per second,
+whether or not earlier ones have answered, and measures latency from the
+scheduled time: a saturated service shows up as latency instead of being
+hidden by a client that slowed down (coordinated omission). Closed loop
+(--concurrency) keeps that many users each sending the next request when the
+previous one answers. Both take stages of SECONDS:START[-END], ramped
+linearly. Requests share a pool of keep-alive HTTP/1.1 connections.
+
+Results are JSON with the run's settings, totals, a latency histogram in
+microseconds buckets (sbi_fpt.alb_logs.LatencyHistogram) and a per-second
+timeline; --baseline compares against an earlier run and fails on a p99 or
+error rate regression.
+"""
+import argparse
+import asyncio
+import json
+import math
+import ssl
+import sys
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+from sbi_fpt.alb_logs import LatencyHistogram
+
+RESULTS_FORMAT = 1
+
+
+########### Profile ##################
+
+def parse_stages(value: str) -> list:
+    """"60:10-200,300:200" -> [(60.0, 10.0, 200.0), (300.0, 200.0, 200.0)]."""
+    stages = []
+    for stage in value.split(","):
+        seconds, _, level = stage.strip().partition(":")
+        start, _, end = level.partition("-")
+        try:
+            stages.append((float(seconds), float(start), float(end or start)))
+        except ValueError:
+            raise ValueError(f"Stage '{stage}' is not SECONDS:START[-END]") from None
+        if stages[-1][0] <= 0 or min(stages[-1][1:]) < 0:
+            raise ValueError(f"Stage '{stage}' needs a positive duration and levels of 0 or more")
+    return stages
+
+
+def parse_request(value: str) -> tuple:
+    """ "METHOD /path" or a path (GET), like java.warmUp.requests."""
+    method, _, path = value.strip().partition(" ")
+    return (method.upper(), path.strip()) if path else ("GET", method)
+
+
+def arrival_times(stages: list):
+    """Offsets (s) of the open-loop arrivals: the rate ramps linearly within each stage."""
+    offset, due = 0.0, 1.0
+    for seconds, start, end in stages:
+        slope = (end - start) / seconds
+        while True:
+            # Solve start*t + slope*t^2/2 = due, the arrivals expected by t
+            if slope:
+                discriminant = start * start + 2 * slope * due
+                t = (-start + math.sqrt(discriminant)) / slope if discriminant >= 0 else math.inf
+            else:
+                t = due / start if start else math.inf
+            if t > seconds:
+                break
+            yield offset + t
+            due += 1
+        due -= (start + end) * seconds / 2
+        offset += seconds
+
+
+def level_at(stages: list, elapsed: float) -> float:
+    offset = 0.0
+    for seconds, start, end in stages:
+        if elapsed < offset + seconds:
+            return start + (end - start) * (elapsed - offset) / seconds
+        offset += seconds
+    return 0.0
+
+
+########### HTTP client ##################
+
+class ConnectError(OSError):
+    """The target refused or could not be reached, as opposed to failing mid-request."""
+
+
+class ConnectionPool:
+    """Keep-alive HTTP/1.1 connections to one host, at most `size` open."""
+
+    def __init__(self, url: str, size: int, timeout: float):
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https"):
+            raise ValueError(f"Target must be an http(s) URL, got '{url}'")
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == "https" else 80)
+        self.ssl = ssl.create_default_context() if parts.scheme == "https" else None
+        self.base_path = parts.path.rstrip("/")
+        self.timeout = timeout
+        self.opened = 0
+        self._idle = []
+        self._slots = asyncio.Semaphore(size)
+
+    async def request(self, method: str, path: str) -> int:
+        """Status code of one request; raises on connect, timeout and protocol errors."""
+        async with self._slots:
+            connection = self._idle.pop() if self._idle else None
+            if connection is None:
+                try:
+                    connection = await asyncio.wait_for(
+                        asyncio.open_connection(self.host, self.port, ssl=self.ssl), self.timeout)
+                except asyncio.TimeoutError:
+                    raise
+                except OSError as error:
+                    raise ConnectError(str(error)) from error
+                self.opened += 1
+            try:
+                status, keep_alive = await asyncio.wait_for(self._exchange(connection, method, path), self.timeout)
+            except BaseException:
+                connection[1].close()
+                raise
+            if keep_alive:
+                self._idle.append(connection)
+            else:
+                connection[1].close()
+            return status
+
+    async def _exchange(self, connection, method: str, path: str):
+        reader, writer = connection
+        writer.write(f"{method} {self.base_path}{path} HTTP/1.1\r\nHost: {self.host}\r\n"
+                     f"User-Agent: sbi-fpt-loadtest\r\nContent-Length: 0\r\n\r\n".encode())
+        await writer.drain()
+
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError("Connection closed before the response")
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            while True:
+                size = int((await reader.readline()).split(b";")[0], 16)
+                await reader.readexactly(size + 2)
+                if size == 0:
+                    break
+        elif "content-length" in headers:
+            await reader.readexactly(int(headers["content-length"]))
+        elif method != "HEAD" and status >= 200 and status not in (204, 304):
+            await reader.read()
+            return status, False
+
+        return status, headers.get("connection", "").lower() != "close"
+
+    def close(self) -> None:
+        for _, writer in self._idle:
+            writer.close()
+        self._idle.clear()
+
+
+########### Results ##################
+
+class Recorder:
+    """Latency histogram, status codes and errors, in total and per second of the run."""
+
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.status = Counter()
+        self.errors = Counter()
+        self.sent = 0
+        self.dropped = 0
+        self.seconds = {}
+
+    def _second(self, offset: float) -> dict:
+        return self.seconds.setdefault(int(offset), {"sent": 0, "ok": 0, "failed": 0, "latency": LatencyHistogram()})
+
+    def record(self, offset: float, seconds: float, status: int = None, error: str = None) -> None:
+        second = self._second(offset)
+        second["sent"] += 1
+        if error:
+            self.errors[error] += 1
+            second["failed"] += 1
+            return
+        self.status[str(status)] += 1
+        self.latency.record(seconds)
+        second["latency"].record(seconds)
+        second["ok" if status < 500 else "failed"] += 1
+
+    def to_dict(self, settings: dict, elapsed: float) -> dict:
+        completed = self.latency.count
+        failed = sum(self.errors.values()) + sum(n for status, n in self.status.items() if int(status) >= 500)
+        return {
+            "format": RESULTS_FORMAT,
+            "settings": settings,
+            "elapsedSeconds": round(elapsed, 3),
+            "totals": {
+                "sent": self.sent,
+                "completed": completed,
+                "dropped": self.dropped,
+                "errorRate": round(failed / self.sent, 6) if self.sent else 0.0,
+                "throughput": round(completed / elapsed, 3) if elapsed else 0.0,
+                "status": dict(sorted(self.status.items())),
+                "errors": dict(sorted(self.errors.items())),
+            },
+            "latency": {**self.latency.summary(), "p999": self.latency.percentile(99.9)},
+            "histogram": {str(bucket): count for bucket, count in sorted(self.latency.counts.items())},
+            "timeline": [
+                {"second": offset, "sent": second["sent"], "ok": second["ok"], "failed": second["failed"],
+                 "p50": second["latency"].percentile(50), "p99": second["latency"].percentile(99)}
+                for offset, second in sorted(self.seconds.items())
+            ],
+        }
+
+
+########### Load ##################
+
+async def _send(pool: ConnectionPool, recorder: Recorder, request: tuple, scheduled: float, started: float) -> None:
+    loop = asyncio.get_running_loop()
+    # TimeoutError is an OSError since Python 3.11, and ConnectError one too: most specific first
+    try:
+        status = await pool.request(*request)
+    except asyncio.TimeoutError:
+        recorder.record(scheduled - started, loop.time() - scheduled, error="timeout")
+    except ConnectError:
+        recorder.record(scheduled - started, loop.time() - scheduled, error="connect")
+    except (OSError, asyncio.IncompleteReadError, ValueError, IndexError):
+        recorder.record(scheduled - started, loop.time() - scheduled, error="connection")
+    else:
+        recorder.record(scheduled - started, loop.time() - scheduled, status=status)
+
+
+async def open_loop(pool: ConnectionPool, recorder: Recorder, requests: list, stages: list,
+                    max_pending: int) -> None:
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    pending = set()
+    for index, offset in enumerate(arrival_times(stages)):
+        scheduled = started + offset
+        delay = scheduled - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        recorder.sent += 1
+        if len(pending) >= max_pending:
+            # The client would be measuring itself: count it, don't queue it
+            recorder.dropped += 1
+            recorder.record(offset, 0.0, error="dropped")
+            continue
+        task = asyncio.ensure_future(_send(pool, recorder, requests[index % len(requests)], scheduled, started))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+
+    if pending:
+        await asyncio.wait(pending)
+
+
+async def closed_loop(pool: ConnectionPool, recorder: Recorder, requests: list, stages: list,
+                      think_seconds: float) -> None:
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    duration = sum(stage[0] for stage in stages)
+    users = {}
+    sent = 0
+
+    async def user(number):
+        nonlocal sent
+        # Users above the current level finish their request and leave
+        while loop.time() - started < duration and number < round(level_at(stages, loop.time() - started)):
+            request = requests[sent % len(requests)]
+            sent += 1
+            recorder.sent += 1
+            await _send(pool, recorder, request, loop.time(), started)
+            if think_seconds:
+                await asyncio.sleep(think_seconds)
+
+    while loop.time() - started < duration:
+        level = round(level_at(stages, loop.time() - started))
+        for number in range(level):
+            if number not in users or users[number].done():
+                users[number] = asyncio.ensure_future(user(number))
+        await asyncio.sleep(0.05)
+
+    await asyncio.gather(*users.values())
+
+
+async def run(url: str, requests: list, *, rate: list = None, concurrency: list = None, connections: int = 100,
+              timeout: float = 10.0, think_seconds: float = 0.0, max_pending: int = 10000) -> dict:
+    """Run one load test and return its results (see RESULTS_FORMAT)."""
+    if (rate is None) == (concurrency is None):
+        raise ValueError("Pass exactly one of rate (open loop) or concurrency (closed loop)")
+    requests = [parse_request(request) if isinstance(request, str) else tuple(request) for request in requests]
+
+    pool = ConnectionPool(url, connections, timeout)
+    recorder = Recorder()
+    wall_start = time.time()
+    start = time.perf_counter()
+    try:
+        if rate is not None:
+            await open_loop(pool, recorder, requests, rate, max_pending)
+        else:
+            await closed_loop(pool, recorder, requests, concurrency, think_seconds)
+    finally:
+        pool.close()
+    elapsed = time.perf_counter() - start
+
+    settings = {
+        "target": url,
+        "mode": "open" if rate is not None else "closed",
+        "stages": [list(stage) for stage in (rate if rate is not None else concurrency)],
+        "requests": [f"{method} {path}" for method, path in requests],
+        "connections": connections,
+        "timeoutSeconds": timeout,
+        "thinkSeconds": think_seconds,
+        "startedAt": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(wall_start)),
+    }
+    results = recorder.to_dict(settings, elapsed)
+    results["totals"]["connectionsOpened"] = pool.opened
+    return results
+
+
+########### Comparison ##################
+
+COMPARED = (
+    ("latency", "p50"), ("latency", "p90"), ("latency", "p99"), ("latency", "p999"), ("latency", "max"),
+    ("totals", "throughput"), ("totals", "errorRate"),
+)
+
+
+def compare(base: dict, other: dict) -> dict:
+    """{metric: {"base", "run", "changePercent"}} for two results files."""
+    for results in (base, other):
+        if results.get("format") != RESULTS_FORMAT:
+            raise ValueError(f"Results format {results.get('format')} is not {RESULTS_FORMAT}")
+
+    comparison = {}
+    for section, metric in COMPARED:
+        before, after = base[section][metric], other[section][metric]
+        comparison[f"{section}.{metric}"] = {
+            "base": before,
+            "run": after,
+            "changePercent": round((after - before) / before * 100, 1) if before else None,
+        }
+    return comparison
+
+
+def regressions(comparison: dict, max_p99_increase: float, max_error_rate_increase: float) -> list:
+    p99 = comparison["latency.p99"]
+    error_rate = comparison["totals.errorRate"]
+    found = []
+    if p99["changePercent"] is not None and p99["changePercent"] > max_p99_increase:
+        found.append(f"p99 {p99['base']:.3f}s -> {p99['run']:.3f}s (+{p99['changePercent']}%, limit {max_p99_increase}%)")
+    if error_rate["run"] - error_rate["base"] > max_error_rate_increase / 100:
+        found.append(f"error rate {error_rate['base']:.2%} -> {error_rate['run']:.2%}")
+    return found
+
+
+########### Report ##################
+
+def text_report(results: dict, comparison: dict = None) -> str:
+    settings, totals, latency = results["settings"], results["totals"], results["latency"]
+    lines = [
+        f"{settings['mode']} loop against {settings['target']}, {results['elapsedSeconds']}s, "
+        f"{totals['connectionsOpened']} connections opened",
+        f"sent {totals['sent']}, completed {totals['completed']}, dropped {totals['dropped']}, "
+        f"{totals['throughput']}/s, error rate {totals['errorRate']:.2%}",
+        "status: " + ", ".join(f"{status}={count}" for status, count in totals["status"].items())
+        + ("; errors: " + ", ".join(f"{error}={count}" for error, count in totals["errors"].items())
+           if totals["errors"] else ""),
+        "latency (s): " + "  ".join(f"{key} {latency[key]:.4f}" for key in ("mean", "p50", "p90", "p99", "p999", "max")),
+        "",
+        f"  {'second':>6} {'sent':>7} {'ok':>7} {'failed':>7} {'p50':>8} {'p99':>8}",
+    ]
+    lines += [f"  {row['second']:>6} {row['sent']:>7} {row['ok']:>7} {row['failed']:>7} {row['p50']:>8.4f} {row['p99']:>8.4f}"
+              for row in results["timeline"]]
+
+    if comparison:
+        lines.extend(["", f"  {'metric':<18} {'base':>10} {'run':>10} {'change':>8}"])
+        for metric, values in comparison.items():
+            change = "-" if values["changePercent"] is None else f"{values['changePercent']:+.1f}%"
+            lines.append(f"  {metric:<18} {values['base']:>10.4f} {values['run']:>10.4f} {change:>8}")
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m sbi_fpt.loadtest", description=__doc__.splitlines()[0])
+    parser.add_argument("url", help="Base URL, e.g. the ALB DNS name or the stand-in (python -m sbi_fpt.stand_in)")
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument("--rate", type=parse_stages, help="Open loop: requests per second, SECONDS:START[-END],...")
+    mode.add_argument("--concurrency", type=parse_stages, help="Closed loop: users, SECONDS:START[-END],...")
+    parser.add_argument("--request", action="append", help='"METHOD /path" or a path, repeatable, default /')
+    parser.add_argument("--connections", type=int, default=100, help="Keep-alive connection pool size")
+    parser.add_argument("--timeout", type=float, default=10.0, help="Per request, connecting included (s)")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="Closed loop: pause between a user's requests")
+    parser.add_argument("--max-pending", type=int, default=10000, help="Open loop: in-flight requests before dropping")
+    parser.add_argument("--output", help="Write the results JSON here")
+    parser.add_argument("--baseline", help="Results JSON of an earlier run to compare against")
+    parser.add_argument("--max-p99-increase", type=float, default=10.0, help="Percent, with --baseline")
+    parser.add_argument("--max-error-rate-increase", type=float, default=0.1, help="Percentage points, with --baseline")
+    parser.add_argument("--format", choices=["text", "json"], default="text")
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(run(args.url, args.request or ["/"], rate=args.rate, concurrency=args.concurrency,
+                              connections=args.connections, timeout=args.timeout,
+                              think_seconds=args.think_ms / 1000, max_pending=args.max_pending))
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+            file.write("\n")
+
+    comparison = None
+    if args.baseline:
+        with open(args.baseline) as file:
+            comparison = compare(json.load(file), results)
+    print(json.dumps({**results, "comparison": comparison} if comparison else results, indent=2)
+          if args.format == "json" else text_report(results, comparison))
+
+    found = regressions(comparison, args.max_p99_increase, args.max_error_rate_increase) if comparison else []
+    for regression in found:
+        print(f"Regression: {regression}", file=sys.stderr)
+    return 1 if found else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
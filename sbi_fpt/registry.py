@@ -0,0 +1,150 @@
+import fnmatch
+import importlib
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class StackSpec:
+    construct_id: str
+    module: str
+    class_name: str
+    name_suffix: str
+    description: str
+    pin_env: bool = True
+    # Ordering that the templates cannot show, e.g. context lookups of resources
+    # another stack creates. Export/ImportValue edges are read from the assembly.
+    depends_on: tuple = ()
+    # Optional stacks are only built when this dotted key is set in parameters.yaml
+    requires: str = None
+    # Top-level parameters.yaml sections the stack reads (synth cache fingerprint), None for all
+    context_keys: tuple = None
+
+    def enabled(self, context: dict) -> bool:
+        value = context
+        for key in (self.requires or "").split("."):
+            if not key:
+                continue
+            if not isinstance(value, dict) or key not in value:
+                return False
+            value = value[key]
+        return bool(value)
+
+    def stack_class(self):
+        # Import on demand so unselected stacks never load their modules
+        return getattr(importlib.import_module(self.module), self.class_name)
+
+    def stack_name(self, context: dict) -> str:
+        return f"{context['env']['prefix']}-{context['env']['environment']}-{self.name_suffix}"
+
+
+########### Stack registry (deploy order) ##################
+STACKS = [
+    StackSpec("SbiFptStack", "sbi_fpt.sbi_fpt_stack", "SbiFptStack",
+        name_suffix="stack",
+        description="Stack for creating vpc, ec2",
+        context_keys=("env", "vpc")),
+    StackSpec("GoldenAmiStack", "sbi_fpt.stack.ami_stack", "GoldenAmiStack",
+        name_suffix="golden-ami-stack",
+        description="Stack for baking the java runtime ami",
+        requires="java.goldenAmi",
+        context_keys=("env", "java")),
+    StackSpec("CacheStack", "sbi_fpt.stack.cache_stack", "CacheStack",
+        name_suffix="cache-stack",
+        description="Stack for the elasticache replication group of java",
+        depends_on=("SbiFptStack",),
+        requires="java.cache",
+        context_keys=("env", "java", "vpc")),
+    StackSpec("JavaStack", "sbi_fpt.stack.java_stack", "JavaStack",
+        name_suffix="java-stack",
+        description="Stack for creating ec2",
+        depends_on=("SbiFptStack", "GoldenAmiStack"),
+        context_keys=("env", "java", "vpc")),
+    StackSpec("EdgeStack", "sbi_fpt.stack.edge_stack", "EdgeStack",
+        name_suffix="edge-stack",
+        description="Stack for the cloudfront distribution in front of the java alb",
+        requires="java.edge",
+        context_keys=("env", "java")),
+    StackSpec("PipelineJavaStack", "sbi_fpt.stack.java_pipeline", "PipelineJavaStack",
+        name_suffix="java-pipeline-stack",
+        description="Stack for create pipeline java",
+        pin_env=False,
+        context_keys=("env", "java")),
+    StackSpec("PipelineCDKStack", "sbi_fpt.stack.cdk_pipeline", "PipelineCDKStack",
+        name_suffix="cdk-pipeline-stack",
+        description="Stack for create pipeline cdk",
+        pin_env=False,
+        context_keys=("env", "cdk")),
+]
+
+STACKS_BY_ID = {spec.construct_id: spec for spec in STACKS}
+
+
+def _context_list(value) -> list:
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [item.strip() for item in value.split(",") if item.strip()]
+    return list(value)
+
+
+def _context_flag(value, default: bool) -> bool:
+    if value is None:
+        return default
+    if isinstance(value, str):
+        return value.strip().lower() not in ("false", "0", "no", "off")
+    return bool(value)
+
+
+# aws_cdk is imported inside the builders: loading it starts the jsii runtime,
+# which tooling that only reads this registry (sbi_fpt.deploy) does not need.
+
+def selected_stack_ids(app) -> list:
+    """Stacks requested with `-c stacks=A,B` (glob patterns allowed, like the CLI selector).
+
+    The CDK CLI does not pass its positional stack selector to the app, so
+    callers that want a single stack pass the same names as context. An empty
+    selection builds every stack, which `cdk ls` needs.
+    """
+    patterns = _context_list(app.node.try_get_context("stacks"))
+    if not patterns:
+        return [spec.construct_id for spec in STACKS]
+
+    selected = []
+    for pattern in patterns:
+        matches = fnmatch.filter(STACKS_BY_ID, pattern)
+        if not matches:
+            raise ValueError(f"Unknown stack '{pattern}', expected one of: {', '.join(STACKS_BY_ID)}")
+        selected.extend(match for match in matches if match not in selected)
+
+    return [spec.construct_id for spec in STACKS if spec.construct_id in selected]
+
+
+def build_stacks(app, context: dict, stack_ids: list) -> dict:
+    import aws_cdk as cdk
+    from cdk_nag import AwsSolutionsChecks
+
+    env = context["env"]
+    nag_enabled = _context_flag(app.node.try_get_context("nag"), default=True)
+
+    stacks = {}
+    for stack_id in stack_ids:
+        spec = STACKS_BY_ID[stack_id]
+        if not spec.enabled(context):
+            continue
+
+        kwargs = {}
+        if spec.pin_env:
+            kwargs["env"] = cdk.Environment(account=env["account"], region=env["region"])
+
+        stack = spec.stack_class()(app, spec.construct_id,
+            context=context,
+            stack_name=spec.stack_name(context),
+            description=spec.description,
+            **kwargs)
+
+        if nag_enabled:
+            cdk.Aspects.of(stack).add(AwsSolutionsChecks())
+
+        stacks[stack_id] = stack
+
+    return stacks
@@ -9,6 +9,8 @@ import aws_cdk as cdk
 from cdk_nag import NagSuppressions
 from constructs import Construct
 
+from sbi_fpt.stack.network import SUBNET_TYPES, nat_gateway_azs, ordered_subnets, vpc_parameter_name
+
 class SbiFptStack(Stack):
 
     def __init__(self, scope: Construct, construct_id: str,context: dict, **kwargs) -> None:
@@ -36,13 +38,18 @@ class SbiFptStack(Stack):
         output = {
             'vpc': vpc,
             'publicSubnets': [],
-            'privateSubnets': []
+            'privateSubnets': [],
+            'subnetsByCidr': {},
+            'natGateways': {}
         }
         
         
         # Generate subnets
         self.gen_subnet(vpc_config['subnets'], vpc, context, output)
 
+        # Create VPC endpoints for AWS API traffic from the private subnets
+        self.gen_endpoints(vpc_config.get('endpoints', {}), vpc, output)
+
         # Create sg
         ec2_sg = ec2.SecurityGroup(self, "Ec2SecurityGroup", vpc=vpc)
         
@@ -53,6 +60,28 @@ class SbiFptStack(Stack):
             export_name=f"{self.context_global['prefix']}-{self.context_global['environment']}-vpcId"
         )
 
+        # Publish the network for JavaStack and CacheStack, which import it without a lookup
+        if not vpc_config.get('lookup'):
+            self.publish_network(vpc_config, vpc, context, output)
+
+    def publish_network(self, vpc_config, vpc, context, output):
+        values = {'id': vpc.vpc_id}
+        for subnet_type in SUBNET_TYPES:
+            subnets = [output['subnetsByCidr'][net['cidr']] for net in ordered_subnets(vpc_config, subnet_type)]
+            if subnets:
+                values[f'{subnet_type}-subnet-ids'] = cdk.Fn.join(",", [subnet.subnet_id for subnet in subnets])
+                values[f'{subnet_type}-route-table-ids'] = cdk.Fn.join(",", [subnet.route_table.route_table_id for subnet in subnets])
+        if output['natGateways']:
+            values['nat-gateway-ids'] = cdk.Fn.join(",", [nat.attr_nat_gateway_id for nat in output['natGateways'].values()])
+
+        # Comma-separated in ordered_subnets order, the order Vpc.from_vpc_attributes expects
+        for key, value in values.items():
+            ssm.StringParameter(self, f"VpcParameter-{key}",
+                parameter_name=vpc_parameter_name(context, key),
+                string_value=value,
+                description=f"{key.replace('-', ' ')} of {self.context_global['prefix']}-{self.context_global['environment']}-vpc"
+            )
+
     def gen_subnet(self, subnet_props, vpc, context, output):
         # Create Internet Gateway
         cfn_internet_gateway = ec2.CfnInternetGateway(self, "InternetGateway")
@@ -61,11 +90,16 @@ class SbiFptStack(Stack):
             internet_gateway_id=cfn_internet_gateway.attr_internet_gateway_id
         )
 
-        nat = None
+        # NAT mode: "single" routes every private subnet through the first public
+        # subnet's NAT, "per-az" gives each AZ its own NAT for AZ-local egress
+        nat_azs = nat_gateway_azs(context['vpc'])
+
+        nat_gateways = output['natGateways']
         public_subnet_count = 1
         private_subnet_count = 1
 
-        for net in subnet_props:
+        # Public subnets first so every private subnet has a NAT to route to
+        for net in sorted(subnet_props, key=lambda net: net["type"] != "public"):
             if net["type"] == "public":
                 print(f"Create public subnet with cidr: {net['cidr']}")
                 public_subnet = ec2.PublicSubnet(self, f"{self.context_global['prefix']}-{self.context_global['environment']}-PublicSubnet{public_subnet_count}",
@@ -79,10 +113,11 @@ class SbiFptStack(Stack):
                     cfn_internet_gateway.attr_internet_gateway_id,
                     gateway_attachment=cfn_gateway_attach)
 
-                if public_subnet_count == 1:
-                    # Create NAT Gateway
-                    nat = public_subnet.add_nat_gateway()
+                # Create NAT Gateway
+                if net["availabilityZone"] in nat_azs and net["availabilityZone"] not in nat_gateways:
+                    nat_gateways[net["availabilityZone"]] = public_subnet.add_nat_gateway()
 
+                if public_subnet_count == 1:
                     # Create Bastion Security Group
                     bastion_sg = ec2.SecurityGroup(self, "BastionSG", vpc=vpc)
                     NagSuppressions.add_stack_suppressions(self, [
@@ -125,6 +160,7 @@ class SbiFptStack(Stack):
 
                 public_subnet_count += 1
                 output['publicSubnets'].append(public_subnet)
+                output['subnetsByCidr'][net['cidr']] = public_subnet
 
             if net["type"] == "private":
                 print(f"Create private subnet with cidr: {net['cidr']}")
@@ -134,11 +170,16 @@ class SbiFptStack(Stack):
                     vpc_id=vpc.vpc_id
                 )
 
-                # Add NAT Gateway route to private subnet
+                if not nat_gateways:
+                    raise ValueError("Private subnets need at least one public subnet for the NAT gateway")
+
+                # Add NAT Gateway route to private subnet, preferring the NAT in its own AZ
+                nat = nat_gateways.get(net["availabilityZone"], next(iter(nat_gateways.values())))
                 private_subnet.add_default_nat_route(nat.attr_nat_gateway_id)
 
                 private_subnet_count += 1
                 output['privateSubnets'].append(private_subnet)
+                output['subnetsByCidr'][net['cidr']] = private_subnet
 
         # Add tags to the subnets
         for subnet in output['publicSubnets'] + output['privateSubnets']:
@@ -146,3 +187,37 @@ class SbiFptStack(Stack):
                 "Name",
                 f"{vpc.node.id}-{subnet.node.id.replace('Subnet', '')}-{subnet.availability_zone}"
             )
+
+    def gen_endpoints(self, endpoint_props, vpc, output):
+        private_subnets = ec2.SubnetSelection(subnets=output['privateSubnets'])
+
+        # S3 gateway endpoint: CodeDeploy revisions and artifacts skip the NAT
+        if endpoint_props.get('s3Gateway', False):
+            ec2.GatewayVpcEndpoint(self, "S3GatewayEndpoint",
+                vpc=vpc,
+                service=ec2.GatewayVpcEndpointAwsService.S3,
+                subnets=[private_subnets]
+            )
+
+        interface_services = endpoint_props.get('interface', [])
+        if not interface_services:
+            return
+
+        # Create Endpoint Security Group, HTTPS from inside the VPC only
+        endpoint_sg = ec2.SecurityGroup(self, "EndpointSecurityGroup",
+            vpc=vpc,
+            description="Interface VPC endpoints",
+            allow_all_outbound=False
+        )
+        endpoint_sg.add_ingress_rule(ec2.Peer.ipv4(vpc.vpc_cidr_block), ec2.Port.tcp(443))
+
+        for service in interface_services:
+            print(f"Create interface endpoint for: {service}")
+            ec2.InterfaceVpcEndpoint(self, f"{service.title().replace('-', '')}Endpoint",
+                vpc=vpc,
+                service=ec2.InterfaceVpcEndpointAwsService(service),
+                private_dns_enabled=True,
+                subnets=ec2.SubnetSelection(subnets=output['privateSubnets'], one_per_az=True),
+                security_groups=[endpoint_sg],
+                open=False
+            )
@@ -0,0 +1,116 @@
+import hashlib
+
+from aws_cdk import (
+    aws_iam as iam,
+    aws_imagebuilder as imagebuilder,
+    aws_ssm as ssm,
+    Stack,
+    CfnOutput,
+)
+from cdk_nag import NagSuppressions
+from constructs import Construct
+
+from sbi_fpt.stack.bootstrap import golden_ami_component, read_script
+
+
+class GoldenAmiStack(Stack):
+
+    def __init__(self, scope: Construct, construct_id: str, context: dict, **kwargs) -> None:
+        super().__init__(scope, construct_id, **kwargs)
+
+        ########### Global context ##################
+        global_context = context["env"]
+        backend = context["java"]
+        ami_config = backend["goldenAmi"]
+        name = f"{global_context['prefix']}-{global_context['environment']}-{backend['name']}"
+
+        ########### Component baked from user_data.sh ##################
+        component_data = golden_ami_component(read_script("user_data/user_data.sh"))
+
+        # Image Builder versions are immutable: a content hash in the names turns a
+        # script change into new resources instead of a failed in-place update
+        content_hash = hashlib.sha256(
+            f"{component_data}{ami_config.get('parentImage', backend['ami'])}".encode()
+        ).hexdigest()[:8]
+
+        component = imagebuilder.CfnComponent(self, "RuntimeComponent",
+            name=f"{name}-runtime-{content_hash}",
+            platform="Linux",
+            version=ami_config["version"],
+            data=component_data,
+        )
+
+        recipe = imagebuilder.CfnImageRecipe(self, "ImageRecipe",
+            name=f"{name}-recipe-{content_hash}",
+            version=ami_config["version"],
+            parent_image=ami_config.get("parentImage", backend["ami"]),
+            components=[imagebuilder.CfnImageRecipe.ComponentConfigurationProperty(
+                component_arn=component.attr_arn
+            )],
+        )
+
+        ########### Build instance ##################
+        instance_role = iam.Role(self, "ImageBuilderInstanceRole",
+            role_name=f"{name}-image-builder-role",
+            assumed_by=iam.ServicePrincipal("ec2.amazonaws.com"),
+            managed_policies=[
+                iam.ManagedPolicy.from_aws_managed_policy_name("AmazonSSMManagedInstanceCore"),
+                iam.ManagedPolicy.from_aws_managed_policy_name("EC2InstanceProfileForImageBuilder"),
+            ]
+        )
+
+        NagSuppressions.add_resource_suppressions(
+            instance_role,
+            [
+                {
+                    'id': 'AwsSolutions-IAM4',
+                    'reason': 'AWS managed policies required by EC2 Image Builder build instances.',
+                },
+            ],
+            True
+        )
+
+        instance_profile = iam.CfnInstanceProfile(self, "ImageBuilderInstanceProfile",
+            instance_profile_name=f"{name}-image-builder-profile",
+            roles=[instance_role.role_name],
+        )
+
+        infrastructure = imagebuilder.CfnInfrastructureConfiguration(self, "InfrastructureConfiguration",
+            name=f"{name}-infrastructure",
+            instance_profile_name=instance_profile.ref,
+            instance_types=ami_config.get("instanceTypes", ["t3.small"]),
+            subnet_id=ami_config.get("subnetId"),
+            security_group_ids=ami_config.get("securityGroupIds"),
+            terminate_instance_on_failure=True,
+        )
+
+        distribution = imagebuilder.CfnDistributionConfiguration(self, "DistributionConfiguration",
+            name=f"{name}-distribution",
+            distributions=[imagebuilder.CfnDistributionConfiguration.DistributionProperty(
+                region=self.region,
+                ami_distribution_configuration={
+                    "Name": f"{name}-{{{{ imagebuilder:buildDate }}}}",
+                    "AmiTags": {"Version": ami_config["version"], "Recipe": recipe.name},
+                },
+            )],
+        )
+
+        ########### Versioned AMI published to SSM ##################
+        image = imagebuilder.CfnImage(self, "Image",
+            image_recipe_arn=recipe.attr_arn,
+            infrastructure_configuration_arn=infrastructure.attr_arn,
+            distribution_configuration_arn=distribution.attr_arn,
+            enhanced_image_metadata_enabled=True,
+        )
+
+        ssm.StringParameter(self, "AmiParameter",
+            parameter_name=ami_config["amiParameter"],
+            string_value=image.attr_image_id,
+            data_type=ssm.ParameterDataType.AWS_EC2_IMAGE,
+            description=f"Golden AMI for {name}, recipe {recipe.name} {ami_config['version']}",
+        )
+
+        CfnOutput(self, "amiId",
+            value=image.attr_image_id,
+            description="ID of the golden AMI"
+        )
@@ -0,0 +1,60 @@
+from sbi_fpt.stack.bootstrap import read_script, write_file_commands
+
+HOOK_DIR = "scripts/sbi-fpt"
+
+# CodeDeploy lifecycle hooks time out after at most an hour
+MAX_HOOK_TIMEOUT = 3600
+
+
+def warm_up_settings(warm_up_config: dict, app_port: int = 8080) -> str:
+    return "\n".join([
+        f"APP_PORT={app_port}",
+        f"ROUND_REQUESTS={warm_up_config.get('roundRequests', 100)}",
+        f"CONCURRENCY={warm_up_config.get('concurrency', 4)}",
+        f"MAX_ROUNDS={warm_up_config.get('maxRounds', 30)}",
+        f"SETTLE_ROUNDS={warm_up_config.get('settleRounds', 3)}",
+        f"TOLERANCE_PERCENT={warm_up_config.get('tolerancePercent', 10)}",
+        f"TARGET_P99_MS={warm_up_config.get('targetP99Ms', 0)}",
+    ])
+
+
+def warm_up_requests(warm_up_config: dict) -> str:
+    """One "METHOD /path" per line; a bare path is a GET."""
+    lines = []
+    for request in warm_up_config.get("requests", ["/"]):
+        request = request.strip()
+        if not request:
+            continue
+        method, _, path = request.partition(" ") if " " in request else ("GET", "", request)
+        lines.append(f"{method.upper()} {path.strip()}")
+    if not lines:
+        raise ValueError("java.warmUp.requests needs at least one request")
+    return "\n".join(lines)
+
+
+def package_build_spec(warm_up_config: dict) -> dict:
+    """Buildspec that adds the warm-up hook to the BuildArtifact bundle."""
+    timeout = warm_up_config.get("timeoutSeconds", 900)
+    if timeout > MAX_HOOK_TIMEOUT:
+        raise ValueError(f"java.warmUp.timeoutSeconds is at most {MAX_HOOK_TIMEOUT}, got {timeout}")
+
+    return {
+        "version": "0.2",
+        "phases": {
+            "install": {
+                "runtime-versions": {"python": "3.12"},
+                "commands": ["pip install pyyaml"],
+            },
+            "build": {
+                "commands": [
+                    f"mkdir -p {HOOK_DIR}",
+                    "\n".join(write_file_commands(f"{HOOK_DIR}/warm_up.sh", read_script("codedeploy/warm_up.sh"), "0755")),
+                    "\n".join(write_file_commands(f"{HOOK_DIR}/warm_up.env", warm_up_settings(warm_up_config))),
+                    "\n".join(write_file_commands(f"{HOOK_DIR}/warm_up_requests.txt", warm_up_requests(warm_up_config))),
+                    "\n".join(write_file_commands("/tmp/merge_appspec.py", read_script("codedeploy/merge_appspec.py"))),
+                    f"python /tmp/merge_appspec.py . {HOOK_DIR}/warm_up.sh {timeout}",
+                ],
+            },
+        },
+        "artifacts": {"files": ["**/*"]},
+    }
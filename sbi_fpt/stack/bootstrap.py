@@ -0,0 +1,172 @@
+import os
+
+from sbi_fpt.stack.jvm import CDS_ARCHIVE, TOMCAT_ENVIRONMENT_FILE
+from sbi_fpt.stack.metrics import AGENT_DIR, JMX_EXPORTER_DIR, JMX_EXPORTER_JAR, JMX_EXPORTER_RULES
+
+
+def read_script(path: str) -> str:
+    with open(path) as file:
+        return file.read()
+
+
+def write_file_commands(path: str, content: str, mode: str = "0644") -> list:
+    return [
+        f"cat > {path} <<'SBI_FPT_EOF'",
+        content.rstrip("\n"),
+        "SBI_FPT_EOF",
+        f"chmod {mode} {path}",
+    ]
+
+
+def warm_pool_commands(hook_name: str, app_port: int, ready_timeout: int) -> list:
+    """Install a per-boot service that completes the launch lifecycle hook."""
+    unit = "\n".join([
+        "[Unit]",
+        "Description=Complete the ASG launch lifecycle action",
+        "After=network-online.target",
+        "Wants=network-online.target",
+        "",
+        "[Service]",
+        "Type=oneshot",
+        "ExecStart=/usr/local/bin/warm-pool-lifecycle.sh",
+        "",
+        "[Install]",
+        "WantedBy=multi-user.target",
+    ])
+    settings = "\n".join([
+        f"LIFECYCLE_HOOK_NAME={hook_name}",
+        f"APP_PORT={app_port}",
+        f"READY_TIMEOUT={ready_timeout}",
+    ])
+
+    return [
+        "command -v aws >/dev/null || snap install aws-cli --classic",
+        *write_file_commands("/etc/default/warm-pool-lifecycle", settings),
+        *write_file_commands("/usr/local/bin/warm-pool-lifecycle.sh", read_script("user_data/warm_pool_lifecycle.sh"), "0755"),
+        *write_file_commands("/etc/systemd/system/warm-pool-lifecycle.service", unit),
+        "systemctl daemon-reload",
+        # --no-block: the service waits for cloud-init, which is running this script
+        "systemctl enable warm-pool-lifecycle.service",
+        "systemctl start --no-block warm-pool-lifecycle.service",
+    ]
+
+
+def jvm_profile_commands(environment: str) -> list:
+    """Install the generated CATALINA_OPTS and restart Tomcat if it is already up."""
+    drop_in = "\n".join([
+        "[Service]",
+        f"EnvironmentFile={TOMCAT_ENVIRONMENT_FILE}",
+    ])
+
+    return [
+        f"mkdir -p {os.path.dirname(CDS_ARCHIVE)}",
+        *write_file_commands(TOMCAT_ENVIRONMENT_FILE, environment),
+        # Also covers AMIs baked before user_data.sh read the environment file
+        "mkdir -p /etc/systemd/system/tomcat.service.d",
+        *write_file_commands("/etc/systemd/system/tomcat.service.d/jvm-profile.conf", drop_in),
+        "systemctl daemon-reload",
+        "systemctl try-restart tomcat.service",
+    ]
+
+
+def tomcat_connector_commands(port: int, keep_alive_seconds: int) -> list:
+    """Set keepAliveTimeout on Tomcat's HTTP connector, above the ALB idle timeout."""
+    server_xml = "/root/tomcat/latest/conf/server.xml"
+    timeout = f'keepAliveTimeout="{keep_alive_seconds * 1000}"'
+
+    return [
+        f"if [ -f {server_xml} ]; then",
+        f"  sed -i -E 's/ keepAliveTimeout=\"[0-9]+\"//' {server_xml}",
+        f"  sed -i -E 's/<Connector port=\"{port}\"/& {timeout}/' {server_xml}",
+        "fi",
+    ]
+
+
+def cloudwatch_agent_commands(agent_config: str, prometheus_config: str, exporter_version: str) -> list:
+    """Install the CloudWatch agent and the JMX exporter javaagent, then start the agent.
+
+    Runs before jvm_profile_commands so the Tomcat restart picks up the javaagent.
+    """
+    agent_ctl = "/opt/aws/amazon-cloudwatch-agent/bin/amazon-cloudwatch-agent-ctl"
+    exporter_url = ("https://repo1.maven.org/maven2/io/prometheus/jmx/jmx_prometheus_javaagent/"
+                    f"{exporter_version}/jmx_prometheus_javaagent-{exporter_version}.jar")
+
+    return [
+        f"if [ ! -x {agent_ctl} ]; then",
+        "  curl -fsSL -o /tmp/amazon-cloudwatch-agent.deb "
+        "https://amazoncloudwatch-agent.s3.amazonaws.com/ubuntu/$(dpkg --print-architecture)/latest/amazon-cloudwatch-agent.deb",
+        "  dpkg -i -E /tmp/amazon-cloudwatch-agent.deb",
+        "fi",
+        f"mkdir -p {JMX_EXPORTER_DIR}",
+        f"[ -f {JMX_EXPORTER_JAR} ] || curl -fsSL -o {JMX_EXPORTER_JAR} {exporter_url}",
+        *write_file_commands(f"{JMX_EXPORTER_DIR}/config.yaml", JMX_EXPORTER_RULES),
+        *write_file_commands(f"{AGENT_DIR}/prometheus.yaml", prometheus_config),
+        'IMDS_TOKEN=$(curl -sf -X PUT "http://169.254.169.254/latest/api/token" -H "X-aws-ec2-metadata-token-ttl-seconds: 300")',
+        'INSTANCE_ID=$(curl -sf -H "X-aws-ec2-metadata-token: $IMDS_TOKEN" "http://169.254.169.254/latest/meta-data/instance-id")',
+        f'sed -i "s/__INSTANCE_ID__/$INSTANCE_ID/" {AGENT_DIR}/prometheus.yaml',
+        *write_file_commands(f"{AGENT_DIR}/amazon-cloudwatch-agent.json", agent_config),
+        f"{agent_ctl} -a fetch-config -m ec2 -s -c file:{AGENT_DIR}/amazon-cloudwatch-agent.json",
+    ]
+
+
+def golden_ami_component(runtime_script: str) -> str:
+    """Image Builder component that bakes user_data.sh into the AMI.
+
+    The script runs as root with the same HOME/USER cloud-init gives it, so the
+    baked layout (/root/tomcat/latest, tomcat and codedeploy-agent services) is
+    exactly what a user_data.sh boot used to produce.
+    """
+    import yaml
+
+    document = {
+        "name": "java-runtime",
+        "description": "OpenJDK, Tomcat service and CodeDeploy agent from user_data/user_data.sh",
+        "schemaVersion": 1.0,
+        "phases": [
+            {
+                "name": "build",
+                "steps": [
+                    {
+                        "name": "InstallRuntime",
+                        "action": "ExecuteBash",
+                        "inputs": {"commands": [
+                            "export HOME=/root USER=root DEBIAN_FRONTEND=noninteractive",
+                            runtime_script,
+                        ]},
+                    },
+                    {
+                        # Services stay enabled; drop the state of the bake-time run
+                        "name": "CleanRuntimeState",
+                        "action": "ExecuteBash",
+                        "inputs": {"commands": [
+                            "systemctl stop tomcat codedeploy-agent",
+                            "rm -f /root/tomcat/latest/temp/tomcat.pid",
+                            "rm -rf /root/tomcat/latest/logs/* /root/install /tmp/apache-tomcat-*.tar.gz",
+                        ]},
+                    },
+                ],
+            },
+            {
+                "name": "validate",
+                "steps": [
+                    {
+                        "name": "ValidateRuntime",
+                        "action": "ExecuteBash",
+                        "inputs": {"commands": [
+                            "java -version",
+                            "test -x /root/tomcat/latest/bin/startup.sh",
+                            "systemctl is-enabled tomcat codedeploy-agent",
+                        ]},
+                    },
+                ],
+            },
+        ],
+    }
+    class LiteralDumper(yaml.SafeDumper):
+        pass
+
+    # Keep scripts readable in the component document
+    LiteralDumper.add_representer(str, lambda dumper, value: dumper.represent_scalar(
+        "tag:yaml.org,2002:str", value, style="|" if "\n" in value else None))
+
+    return yaml.dump(document, Dumper=LiteralDumper, sort_keys=False)
@@ -0,0 +1,116 @@
+from aws_cdk import (
+    aws_ec2 as ec2,
+    aws_elasticache as elasticache,
+    aws_ssm as ssm,
+    Stack,
+    CfnOutput,
+)
+from cdk_nag import NagSuppressions
+from constructs import Construct
+
+from sbi_fpt.stack.network import import_vpc
+
+
+class CacheStack(Stack):
+
+    def __init__(self, scope: Construct, construct_id: str, context: dict, **kwargs) -> None:
+        super().__init__(scope, construct_id, **kwargs)
+
+        ########### Global context ##################
+        global_context = context["env"]
+        backend = context["java"]
+        cache_config = backend["cache"]
+        name = f"{global_context['prefix']}-{global_context['environment']}-{backend['name']}-cache"
+        vpc = import_vpc(self, "ImportedVpc", context)
+
+        engine = cache_config.get("engine", "valkey")
+        if engine not in ("valkey", "redis"):
+            raise ValueError(f"java.cache.engine must be valkey or redis, got '{engine}'")
+        engine_version = str(cache_config.get("engineVersion", "8.0" if engine == "valkey" else "7.1"))
+        shards = cache_config.get("shards", 1)
+        replicas = cache_config.get("replicasPerShard", 1)
+        port = cache_config.get("port", 6379)
+        cluster_mode = shards > 1
+
+        ########### Network ##################
+        # The private subnets SbiFptStack.gen_subnet created, next to the Java fleet
+        subnet_group = elasticache.CfnSubnetGroup(self, "SubnetGroup",
+            cache_subnet_group_name=f"{name}-subnets",
+            description=f"Private subnets for {name}",
+            subnet_ids=vpc.select_subnets(subnet_type=ec2.SubnetType.PRIVATE_WITH_EGRESS).subnet_ids,
+        )
+
+        cache_sg = ec2.SecurityGroup(self, "CacheSecurityGroup",
+            vpc=vpc,
+            security_group_name=f"{name}-sg",
+            description=f"{name} from the Java instances",
+            allow_all_outbound=False,
+        )
+        cache_sg.add_ingress_rule(ec2.Peer.security_group_id(backend["sg"]), ec2.Port.tcp(port),
+            "Java launch template instances")
+
+        ########### Replication group ##################
+        replication_group = elasticache.CfnReplicationGroup(self, "ReplicationGroup",
+            replication_group_id=name,
+            replication_group_description=f"Shared cache and sessions for {backend['name']}",
+            engine=engine,
+            engine_version=engine_version,
+            cache_node_type=cache_config.get("nodeType", "cache.t4g.micro"),
+            cluster_mode="enabled" if cluster_mode else "disabled",
+            num_node_groups=shards,
+            replicas_per_node_group=replicas,
+            # Cluster mode needs the cluster-enabled parameter group of the engine's major version
+            cache_parameter_group_name=cache_config.get(
+                "parameterGroup",
+                f"default.{engine}{engine_version.split('.')[0]}.cluster.on" if cluster_mode else None),
+            automatic_failover_enabled=cluster_mode or replicas > 0,
+            multi_az_enabled=replicas > 0,
+            port=port,
+            cache_subnet_group_name=subnet_group.ref,
+            security_group_ids=[cache_sg.security_group_id],
+            at_rest_encryption_enabled=True,
+            transit_encryption_enabled=True,
+            snapshot_retention_limit=cache_config.get("snapshotRetentionDays", 1),
+        )
+        replication_group.add_dependency(subnet_group)
+
+        NagSuppressions.add_resource_suppressions(
+            replication_group,
+            [
+                {
+                    'id': 'AwsSolutions-AEC5',
+                    'reason': 'Port comes from parameters.yaml, access is limited to the Java instances SG.',
+                },
+                {
+                    'id': 'AwsSolutions-AEC6',
+                    'reason': 'No AUTH token: TLS in transit and only the Java instances SG can connect.',
+                },
+            ],
+            True
+        )
+
+        ########### Endpoints for the build ##################
+        # Published under the paramaterStoreEnv path the Java build already reads
+        if cluster_mode:
+            endpoints = {
+                "endpoint": replication_group.attr_configuration_end_point_address,
+                "port": replication_group.attr_configuration_end_point_port,
+            }
+        else:
+            endpoints = {
+                "endpoint": replication_group.attr_primary_end_point_address,
+                "port": replication_group.attr_primary_end_point_port,
+                "reader-endpoint": replication_group.attr_reader_end_point_address,
+            }
+
+        for key, value in endpoints.items():
+            ssm.StringParameter(self, f"CacheParameter-{key}",
+                parameter_name=f"/{backend['paramaterStoreEnv']}/cache/{key}",
+                string_value=value,
+                description=f"{key} of {name}",
+            )
+
+        CfnOutput(self, "cacheendpoint",
+            value=endpoints["endpoint"],
+            description="Endpoint of the cache replication group"
+        )
@@ -121,6 +121,10 @@ class PipelineCDKStack(Stack):
                         type=codebuild.BuildEnvironmentVariableType.PLAINTEXT,
                         value=f"{global_context['environment']}"
                     ),
+                    "ARTIFACT_BUCKET": codebuild.BuildEnvironmentVariable(
+                        type=codebuild.BuildEnvironmentVariableType.PLAINTEXT,
+                        value=artifact_cdk_bucket.bucket_name
+                    ),
                 },
             ),
             role=build_role,
@@ -0,0 +1,166 @@
+from aws_cdk import (
+    aws_cloudfront as cloudfront,
+    aws_cloudfront_origins as origins,
+    aws_s3 as s3,
+    Stack,
+    Duration,
+    RemovalPolicy,
+    CfnOutput,
+    Fn,
+)
+from cdk_nag import NagSuppressions
+from constructs import Construct
+
+
+class EdgeStack(Stack):
+
+    def __init__(self, scope: Construct, construct_id: str, context: dict, **kwargs) -> None:
+        super().__init__(scope, construct_id, **kwargs)
+
+        ########### Global context ##################
+        global_context = context["env"]
+        backend = context["java"]
+        edge_config = backend["edge"]
+        self.name = f"{global_context['prefix']}-{global_context['environment']}-{backend['name']}-edge"
+
+        NagSuppressions.add_stack_suppressions(self, [
+            {
+                'id': 'AwsSolutions-S10',
+                'reason': 'The S3 Bucket or bucket policy does not require requests to use SSL',
+            },
+        ])
+
+        ########### CloudFront access logs ##################
+        # Standard logging writes with ACLs, so the bucket keeps object-writer ownership
+        log_edge = s3.Bucket(self, "logCloudFront",
+            bucket_name=f"{global_context['prefix']}-{global_context['environment']}-cloudfront-log",
+            block_public_access=s3.BlockPublicAccess.BLOCK_ALL,
+            encryption=s3.BucketEncryption.S3_MANAGED,
+            object_ownership=s3.ObjectOwnership.OBJECT_WRITER,
+            versioned=True,
+            server_access_logs_prefix="logs",
+            removal_policy=RemovalPolicy.DESTROY,
+            auto_delete_objects=True,
+        )
+
+        ########### Origins ##################
+        # The ALB of JavaStack, kept warm with long-lived connections and shielded
+        # in the deployment region so cache misses from every edge collapse there
+        alb_origin = origins.HttpOrigin(Fn.import_value("loadbalancerdns"),
+            protocol_policy=cloudfront.OriginProtocolPolicy[edge_config.get("originProtocol", "HTTP_ONLY")],
+            keepalive_timeout=Duration.seconds(edge_config.get("originKeepaliveSeconds", 60)),
+            read_timeout=Duration.seconds(edge_config.get("originReadTimeoutSeconds", 30)),
+            origin_shield_enabled=True,
+            origin_shield_region=edge_config.get("originShieldRegion", self.region),
+        )
+
+        static_origin = None
+        if edge_config.get("staticBucket"):
+            static_bucket = s3.Bucket(self, "StaticBucket",
+                bucket_name=f"{self.name}-static",
+                block_public_access=s3.BlockPublicAccess.BLOCK_ALL,
+                encryption=s3.BucketEncryption.S3_MANAGED,
+                enforce_ssl=True,
+                server_access_logs_bucket=log_edge,
+                server_access_logs_prefix="static",
+                removal_policy=RemovalPolicy.DESTROY,
+                auto_delete_objects=True,
+            )
+            static_origin = origins.S3BucketOrigin.with_origin_access_control(static_bucket,
+                origin_shield_enabled=True,
+                origin_shield_region=edge_config.get("originShieldRegion", self.region),
+            )
+
+            CfnOutput(self, "staticbucket",
+                value=static_bucket.bucket_name,
+                description="Bucket for static content served under the static behaviors"
+            )
+
+        self.origins = {"alb": alb_origin, "static": static_origin}
+
+        ########### Distribution ##################
+        additional_behaviors = {}
+        for index, behavior in enumerate(edge_config.get("behaviors", [])):
+            additional_behaviors[behavior["pathPattern"]] = self.gen_behavior(f"Behavior{index}", behavior)
+
+        distribution = cloudfront.Distribution(self, "Distribution",
+            comment=f"{self.name} in front of the java ALB",
+            default_behavior=self.gen_behavior("DefaultBehavior", edge_config.get("defaultBehavior", {})),
+            additional_behaviors=additional_behaviors,
+            price_class=cloudfront.PriceClass[edge_config.get("priceClass", "PRICE_CLASS_200")],
+            http_version=cloudfront.HttpVersion.HTTP2_AND_3,
+            enable_logging=True,
+            log_bucket=log_edge,
+            log_file_prefix="cloudfront",
+        )
+
+        NagSuppressions.add_resource_suppressions(
+            distribution,
+            [
+                {
+                    'id': 'AwsSolutions-CFR1',
+                    'reason': 'The application is served globally, no geo restrictions.',
+                },
+                {
+                    'id': 'AwsSolutions-CFR2',
+                    'reason': 'No WAF web ACL for this environment.',
+                },
+                {
+                    'id': 'AwsSolutions-CFR4',
+                    'reason': 'Uses the default CloudFront certificate until a custom domain is configured.',
+                },
+                {
+                    'id': 'AwsSolutions-CFR5',
+                    'reason': 'The ALB origin listens on HTTP only.',
+                },
+            ],
+            True
+        )
+
+        CfnOutput(self, "distributiondomain",
+            value=distribution.distribution_domain_name,
+            description="Domain name of the CloudFront distribution"
+        )
+
+    def gen_behavior(self, construct_id, behavior):
+        origin_name = behavior.get("origin", "alb")
+        origin = self.origins[origin_name]
+        if origin is None:
+            raise ValueError(f"Behavior {behavior.get('pathPattern', 'default')} uses the {origin_name} origin, set java.edge.staticBucket")
+
+        max_ttl = behavior.get("maxTtlSeconds", 86400)
+        if max_ttl == 0:
+            cache_policy = cloudfront.CachePolicy.CACHING_DISABLED
+        else:
+            query_strings = behavior.get("queryStrings", True)
+            if query_strings is True:
+                query_string_behavior = cloudfront.CacheQueryStringBehavior.all()
+            elif query_strings:
+                query_string_behavior = cloudfront.CacheQueryStringBehavior.allow_list(*query_strings)
+            else:
+                query_string_behavior = cloudfront.CacheQueryStringBehavior.none()
+
+            # TTLs only bound what the origin's Cache-Control asks for; brotli/gzip in
+            # the cache key lets CloudFront serve compressed variants
+            cache_policy = cloudfront.CachePolicy(self, f"{construct_id}CachePolicy",
+                cache_policy_name=f"{self.name}-{construct_id.lower()}",
+                default_ttl=Duration.seconds(behavior.get("defaultTtlSeconds", 0)),
+                min_ttl=Duration.seconds(behavior.get("minTtlSeconds", 0)),
+                max_ttl=Duration.seconds(max_ttl),
+                query_string_behavior=query_string_behavior,
+                header_behavior=cloudfront.CacheHeaderBehavior.allow_list(*behavior["headers"]) if behavior.get("headers") else cloudfront.CacheHeaderBehavior.none(),
+                cookie_behavior=cloudfront.CacheCookieBehavior.allow_list(*behavior["cookies"]) if behavior.get("cookies") else cloudfront.CacheCookieBehavior.none(),
+                enable_accept_encoding_brotli=True,
+                enable_accept_encoding_gzip=True,
+            )
+
+        return cloudfront.BehaviorOptions(
+            origin=origin,
+            cache_policy=cache_policy,
+            # Everything the viewer sent still reaches Tomcat, only the cache key is narrowed
+            origin_request_policy=cloudfront.OriginRequestPolicy.ALL_VIEWER if origin_name == "alb" else None,
+            allowed_methods=cloudfront.AllowedMethods.ALLOW_ALL if origin_name == "alb" else cloudfront.AllowedMethods.ALLOW_GET_HEAD,
+            cached_methods=cloudfront.CachedMethods.CACHE_GET_HEAD,
+            viewer_protocol_policy=cloudfront.ViewerProtocolPolicy.REDIRECT_TO_HTTPS,
+            compress=behavior.get("compress", True),
+        )
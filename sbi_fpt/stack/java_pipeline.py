@@ -13,12 +13,21 @@ from aws_cdk import (
     aws_codedeploy as codedeploy,
     custom_resources as custom_resources,
     aws_kms as kms,
+    aws_cloudwatch as cloudwatch,
+    aws_ecr as ecr,
+    aws_lambda as lambda_,
+    aws_events as events,
+    aws_events_targets as targets,
     Fn
 )
 import aws_cdk as cdk
 from constructs import Construct
 from cdk_nag import NagSuppressions
 
+from sbi_fpt.construct.service_dashboard import slo_alarm_names
+from sbi_fpt.stack.appspec import package_build_spec
+from sbi_fpt.stack.scaling import predictive_policies, predictive_scaling_configuration
+
 
 class PipelineJavaStack(Stack):
     
@@ -194,16 +203,51 @@ class PipelineJavaStack(Stack):
                   alias="alias/codebuild/buildprojectkey",
                   enable_key_rotation=True)
         
+        build_config = codepipeline_context.get("build", {})
+
+        # Prebuilt image with the JDK and build tools, else the CodeBuild standard image
+        if build_config.get("prebuiltImage"):
+            build_image = codebuild.LinuxBuildImage.from_ecr_repository(
+                ecr.Repository.from_repository_name(self, "BuildImageRepository", build_config["prebuiltImage"]["repository"]),
+                build_config["prebuiltImage"].get("tag", "latest"))
+        else:
+            build_image = codebuild.LinuxBuildImage.from_code_build_image_id(build_config.get("image", "aws/codebuild/standard:7.0"))
+
+        # The app's buildspec.yaml lists what to keep, e.g. /root/.m2/**/* and /root/.gradle/caches/**/*
+        cache_config = build_config.get("cache", {})
+        cache_type = cache_config.get("type", "none")
+        if cache_type == "s3":
+            build_cache = codebuild.Cache.bucket(artifact_java_bucket, prefix=cache_config.get("prefix", "codebuild-cache"))
+        elif cache_type == "local":
+            build_cache = codebuild.Cache.local(*[
+                codebuild.LocalCacheMode[mode] for mode in cache_config.get("modes", ["SOURCE", "CUSTOM"])
+            ])
+        elif cache_type == "none":
+            build_cache = None
+        else:
+            raise ValueError(f"java.build.cache.type must be s3, local or none, got '{cache_type}'")
+
         build_project = codebuild.PipelineProject(self, "BuildProject",
             project_name=f"translate-gpt-backend-{global_context['environment']}",
             build_spec=codebuild.BuildSpec.from_source_filename("buildspec.yaml"),
+            cache=build_cache,
+            timeout=cdk.Duration.minutes(build_config["timeoutMinutes"]) if "timeoutMinutes" in build_config else None,
             environment={
-                "build_image": codebuild.LinuxBuildImage.from_code_build_image_id("aws/codebuild/standard:7.0"),
+                "build_image": build_image,
+                "compute_type": codebuild.ComputeType[build_config.get("computeType", "SMALL")],
                 "environment_variables": {
                     "ENV_FILE": {
                         "type": codebuild.BuildEnvironmentVariableType.PARAMETER_STORE,
                         "value": codepipeline_context["paramaterStoreEnv"]
                     },
+                    # Published by CacheStack
+                    **({
+                        f"CACHE_{key.upper().replace('-', '_')}": {
+                            "type": codebuild.BuildEnvironmentVariableType.PARAMETER_STORE,
+                            "value": f"/{codepipeline_context['paramaterStoreEnv']}/cache/{key}"
+                        }
+                        for key in ("endpoint", "port")
+                    } if codepipeline_context.get("cache") else {}),
                 },
                 "privileged": False,
             },
@@ -226,6 +270,31 @@ class PipelineJavaStack(Stack):
             actions=[build_action]
         )
 
+        ########### Package stage - JVM warm-up hook in the appspec ############
+        deploy_artifact = build_artifact
+        warm_up_context = codepipeline_context.get("warmUp")
+        if warm_up_context:
+            package_project = codebuild.PipelineProject(self, "PackageProject",
+                project_name=f"{global_context['prefix']}-{global_context['environment']}-{codepipeline_context['name']}-package",
+                build_spec=codebuild.BuildSpec.from_object(package_build_spec(warm_up_context)),
+                environment={
+                    "build_image": codebuild.LinuxBuildImage.from_code_build_image_id("aws/codebuild/standard:7.0"),
+                    "privileged": False,
+                },
+                encryption_key=kms_key
+            )
+
+            deploy_artifact = codepipeline.Artifact("DeployArtifact")
+            pipeline.add_stage(
+                stage_name="Package",
+                actions=[actions.CodeBuildAction(
+                    action_name="Package",
+                    project=package_project,
+                    input=build_artifact,
+                    outputs=[deploy_artifact]
+                )]
+            )
+
         ########### Deployment Stage - Blue-Green Deployment with WAR file copy ##########
         
         autoscaling_name=Fn.import_value("asgname")
@@ -247,14 +316,40 @@ class PipelineJavaStack(Stack):
         )
         
         
+        ########### Rollout strategy ##########
+        deployment_context = codepipeline_context.get("deployment", {})
+        deployment_config_type = deployment_context.get("config", "ONE_AT_A_TIME")
+        if deployment_config_type == "custom":
+            # Blue/green waits on this many healthy hosts while traffic moves over
+            minimum_healthy = deployment_context["minimumHealthyHostsPercent"]
+            deployment_config = codedeploy.ServerDeploymentConfig(self, "DeploymentConfig",
+                deployment_config_name=f"{global_context['prefix']}-{global_context['environment']}-min-healthy-{minimum_healthy}",
+                minimum_healthy_hosts=codedeploy.MinimumHealthyHosts.percentage(minimum_healthy),
+            )
+        elif deployment_config_type in ("ONE_AT_A_TIME", "HALF_AT_A_TIME", "ALL_AT_ONCE"):
+            deployment_config = getattr(codedeploy.ServerDeploymentConfig, deployment_config_type)
+        else:
+            raise ValueError(f"java.deployment.config must be ONE_AT_A_TIME, HALF_AT_A_TIME, ALL_AT_ONCE or custom, got '{deployment_config_type}'")
+
+        # SLO alarms of JavaStack's ServiceDashboard, plus any listed by name
+        rollback_alarm_names = list(deployment_context.get("rollbackAlarms", []))
+        if codepipeline_context.get("monitoring", {}).get("rollbackOnSloAlarms"):
+            rollback_alarm_names += slo_alarm_names(context)
+        rollback_alarms = [
+            cloudwatch.Alarm.from_alarm_name(self, f"RollbackAlarm{index}", alarm_name)
+            for index, alarm_name in enumerate(rollback_alarm_names)
+        ]
+
         deployment_group = codedeploy.ServerDeploymentGroup(self, "deployment",
             application=application,
             role=codedeploy_role,
             deployment_group_name=f"{global_context['prefix']}-{global_context['environment']}-deployment-group",
-            deployment_config=codedeploy.ServerDeploymentConfig.ONE_AT_A_TIME,
+            deployment_config=deployment_config,
             load_balancer=codedeploy.LoadBalancer.application(target_group),
+            alarms=rollback_alarms or None,
             auto_rollback=codedeploy.AutoRollbackConfig(
                 failed_deployment=True,
+                deployment_in_alarm=bool(rollback_alarms) or None,
             ),
         )
         
@@ -272,33 +367,47 @@ class PipelineJavaStack(Stack):
             ]
         ))
         
+        # STOP_DEPLOYMENT holds the green fleet for a manual reroute until the wait runs out
+        ready_action = deployment_context.get("readyAction", "CONTINUE_DEPLOYMENT")
+        deployment_ready_option = {"actionOnTimeout": ready_action}
+        if ready_action == "STOP_DEPLOYMENT":
+            deployment_ready_option["waitTimeInMinutes"] = deployment_context.get("readyWaitMinutes", 60)
+
+        deployment_group_parameters = {
+            "applicationName": application.application_name,
+            "currentDeploymentGroupName": deployment_group.deployment_group_name,
+            "deploymentStyle": {
+                "deploymentType": "BLUE_GREEN",
+                "deploymentOption": "WITH_TRAFFIC_CONTROL"
+            },
+            "deploymentConfigName": deployment_config.deployment_config_name,
+            "blueGreenDeploymentConfiguration": {
+                "terminateBlueInstancesOnDeploymentSuccess": {
+                    "action": "TERMINATE",
+                    "terminationWaitTimeInMinutes": deployment_context.get("terminationWaitMinutes", 0),
+                    },
+                "deploymentReadyOption": deployment_ready_option,
+                "greenFleetProvisioningOption": {
+                    "action": "COPY_AUTO_SCALING_GROUP",
+                    },
+            },
+        }
+
+        # On update too, so a changed rollout setting reaches the deployment group. Only
+        # the create call sets the ASG: after the first deployment the group tracks the
+        # green copy and JavaStack's original ASG is gone
         update_deployment_style = custom_resources.AwsCustomResource(
             self, "UpdateDeploymentStyle",
             on_create=custom_resources.AwsSdkCall(
                 service="CodeDeploy",
                 action="updateDeploymentGroup",
-                parameters={
-                    "applicationName": application.application_name,
-                    "currentDeploymentGroupName": deployment_group.deployment_group_name,
-                    "deploymentStyle": {
-                        "deploymentType": "BLUE_GREEN",
-                        "deploymentOption": "WITH_TRAFFIC_CONTROL"
-                    },
-                    "deploymentConfigName": "CodeDeployDefault.OneAtATime",
-                    "autoScalingGroups": [autoscaling_name],
-                    "blueGreenDeploymentConfiguration": {
-                        "terminateBlueInstancesOnDeploymentSuccess": {
-                            "action": "TERMINATE",
-                            "terminationWaitTimeInMinutes": 0,
-                            },
-                        "deploymentReadyOption": {
-                            "actionOnTimeout": "CONTINUE_DEPLOYMENT",
-                            },
-                        "greenFleetProvisioningOption": {
-                            "action": "COPY_AUTO_SCALING_GROUP",
-                            },
-                    },
-                },
+                parameters={**deployment_group_parameters, "autoScalingGroups": [autoscaling_name]},
+                physical_resource_id=custom_resources.PhysicalResourceId.of("UpdateDeploymentStyle")
+            ),
+            on_update=custom_resources.AwsSdkCall(
+                service="CodeDeploy",
+                action="updateDeploymentGroup",
+                parameters=deployment_group_parameters,
                 physical_resource_id=custom_resources.PhysicalResourceId.of("UpdateDeploymentStyle")
             ),
             policy=custom_resources.AwsCustomResourcePolicy.from_statements([
@@ -310,9 +419,60 @@ class PipelineJavaStack(Stack):
             role=custom_role
         )
 
+        ########### Predictive scaling on the green fleet ##########
+        # COPY_AUTO_SCALING_GROUP replaces the ASG JavaStack created, so re-apply the
+        # configured predictive policies to the deployment group's ASGs after each deploy
+        predictive = predictive_policies(codepipeline_context.get("scaling", {}))
+        if predictive:
+            predictive_function = lambda_.Function(self, "PredictiveScalingSync",
+                runtime=lambda_.Runtime.PYTHON_3_12,
+                handler="index.handler",
+                code=lambda_.Code.from_asset("functions/predictive_scaling"),
+                timeout=cdk.Duration.minutes(1),
+                environment={
+                    "APPLICATION_NAME": application.application_name,
+                    "DEPLOYMENT_GROUP_NAME": deployment_group.deployment_group_name,
+                    "LOAD_BALANCER_ARN": load_balancer_arn,
+                    "TARGET_GROUP_ARN": target_group_arn,
+                    "POLICIES": cdk.Stack.of(self).to_json_string([
+                        {
+                            "name": f"{global_context['prefix']}-{global_context['environment']}-{policy.get('name', 'PredictiveScaling')}",
+                            "configuration": predictive_scaling_configuration(policy),
+                        }
+                        for policy in predictive
+                    ]),
+                },
+            )
+
+            predictive_function.add_to_role_policy(iam.PolicyStatement(
+                actions=["codedeploy:GetDeploymentGroup"],
+                resources=[f"arn:aws:codedeploy:{self.region}:{self.account}:deploymentgroup:{global_context['prefix']}-{global_context['environment']}-code-deploy-app/{global_context['prefix']}-{global_context['environment']}-deployment-group"]
+            ))
+            predictive_function.add_to_role_policy(iam.PolicyStatement(
+                actions=[
+                    "autoscaling:DescribePolicies",
+                    "autoscaling:PutScalingPolicy",
+                    "autoscaling:DeletePolicy",
+                ],
+                resources=["*"]
+            ))
+
+            events.Rule(self, "DeploymentSucceededRule",
+                event_pattern=events.EventPattern(
+                    source=["aws.codedeploy"],
+                    detail_type=["CodeDeploy Deployment State-change Notification"],
+                    detail={
+                        "state": ["SUCCESS"],
+                        "application": [application.application_name],
+                        "deploymentGroup": [deployment_group.deployment_group_name],
+                    },
+                ),
+                targets=[targets.LambdaFunction(predictive_function)],
+            )
+
         deploy_action = actions.CodeDeployServerDeployAction(
             action_name="Deploy",
-            input=build_artifact,
+            input=deploy_artifact,
             deployment_group=deployment_group,
             role=codedeploy_role
         )
@@ -4,8 +4,11 @@ from aws_cdk import (
     aws_autoscaling as autoscaling,
     aws_iam as iam,
     aws_s3 as s3,
-    aws_cloudwatch as cloudwatch,
     aws_sns as sns,
+    aws_cloudwatch as cloudwatch,
+    aws_lambda as lambda_,
+    aws_events as events,
+    aws_events_targets as targets,
     Stack,
     RemovalPolicy,
     CfnOutput,
@@ -14,15 +17,32 @@ import aws_cdk as cdk
 from cdk_nag import NagSuppressions
 from constructs import Construct
 
+from sbi_fpt.construct.alb_log_analytics import AlbLogAnalytics
+from sbi_fpt.construct.service_dashboard import ServiceDashboard
+from sbi_fpt.stack.bootstrap import cloudwatch_agent_commands, jvm_profile_commands, tomcat_connector_commands, warm_pool_commands
+from sbi_fpt.stack.jvm import jvm_profile, smallest_instance_type, tomcat_environment
+from sbi_fpt.stack.metrics import agent_config, java_agent_option, prometheus_config
+from sbi_fpt.stack.network import import_vpc, nat_gateway_ids
+from sbi_fpt.stack.scaling import predictive_scaling_configuration
+
 
 class JavaStack(Stack):
 
     def __init__(self, scope: Construct, construct_id: str,context: dict, **kwargs) -> None:
         super().__init__(scope, construct_id, **kwargs)
         context_global = context["env"]
-        vpc_config = context["vpc"]
-        vpc = ec2.Vpc.from_lookup(self, "ImportedVpc", vpc_id=vpc_config["vpc_id"])
+        self.context_global = context_global
+        vpc = import_vpc(self, "ImportedVpc", context)
         backend = context["java"]
+        scaling_config = backend.get("scaling", {})
+        warm_pool_config = backend.get("warmPool", {})
+        hibernated = warm_pool_config.get("poolState") == "Hibernated"
+        instances_config = backend.get("instances", {})
+        lb_config = backend.get("loadBalancer", {})
+        self.metrics_config = backend.get("metrics", {})
+        self.service_name = f"{context_global['prefix']}-{context_global['environment']}-{backend['name']}"
+        if instances_config and warm_pool_config:
+            raise ValueError("java.warmPool can't be combined with java.instances: warm pools don't support mixed instances policies")
         ec2_sg = backend["sg"]
         key_name = backend["key_name"]
         
@@ -62,10 +82,22 @@ class JavaStack(Stack):
         alb = elbv2.ApplicationLoadBalancer(self, "myALB",
             vpc=vpc,
             internet_facing=True,
-            load_balancer_name=f"{context_global["prefix"]}-{context_global["environment"]}-alb"
+            load_balancer_name=f"{context_global["prefix"]}-{context_global["environment"]}-alb",
+            # Keep below Tomcat's keepAliveTimeout so the target never closes a connection the ALB reuses
+            idle_timeout=cdk.Duration.seconds(lb_config["idleTimeoutSeconds"]) if "idleTimeoutSeconds" in lb_config else None,
+            http2_enabled=lb_config.get("http2Enabled", True),
             )
         
         alb.log_access_logs(log_alb)
+
+        # Athena table and incident queries over the access logs, old logs tiered down
+        if backend.get("accessLogs"):
+            AlbLogAnalytics(self, "AlbLogAnalytics",
+                name=f"{context_global['prefix']}-{context_global['environment']}-alb-logs",
+                log_bucket=log_alb,
+                config=backend["accessLogs"],
+            )
+
         alb.connections.allow_from_any_ipv4(ec2.Port.tcp(80), "Internet access ALB 80")
         
         NagSuppressions.add_resource_suppressions(
@@ -79,9 +111,19 @@ class JavaStack(Stack):
             True
         )
         
-        listener = alb.add_listener("mylistener",
-            port=80,
-            open=True)
+        protocol_version = lb_config.get("protocolVersion", "HTTP1")
+        if protocol_version != "HTTP1" and not lb_config.get("certificateArn"):
+            raise ValueError(f"protocolVersion {protocol_version} needs an HTTPS listener, set java.loadBalancer.certificateArn")
+
+        if lb_config.get("certificateArn"):
+            listener = alb.add_listener("mylistener",
+                port=443,
+                certificates=[elbv2.ListenerCertificate.from_arn(lb_config["certificateArn"])],
+                open=True)
+        else:
+            listener = alb.add_listener("mylistener",
+                port=80,
+                open=True)
         
         # Create Launch Template
         role = iam.Role(self, "roleLaunchTemplate",
@@ -95,6 +137,9 @@ class JavaStack(Stack):
             ]
         )
         
+        if self.metrics_config:
+            role.add_managed_policy(iam.ManagedPolicy.from_aws_managed_policy_name("CloudWatchAgentServerPolicy"))
+
         # Add custom policy to allow KMS decrypt
         role.add_to_policy(iam.PolicyStatement(
             effect=iam.Effect.ALLOW,
@@ -125,16 +170,40 @@ class JavaStack(Stack):
         )
         
         
+        # Golden AMI published by GoldenAmiStack, resolved at deploy time without a lookup
+        if backend.get("goldenAmi"):
+            machine_image = ec2.MachineImage.from_ssm_parameter(backend["goldenAmi"]["amiParameter"])
+        else:
+            machine_image = ec2.MachineImage.generic_linux({
+                f"{self.region}": backend["ami"]
+            })
+
+        security_group = ec2.SecurityGroup.from_security_group_id(self, "SG", ec2_sg)
+
         launch_template = ec2.LaunchTemplate(self, "LaunchTemplate",
             launch_template_name=f"{context_global["prefix"]}-{context_global["environment"]}-launch-template",
-            instance_type=ec2.InstanceType(backend["instanceType"]),
-            machine_image=ec2.MachineImage.generic_linux({
-                f"{self.region}": backend["ami"]
-            }),
-            security_group=ec2.SecurityGroup.from_security_group_id(self, "SG", ec2_sg),
+            # With a mixed instances policy the overrides pick the instance types
+            instance_type=None if instances_config else ec2.InstanceType(backend["instanceType"]),
+            machine_image=machine_image,
+            security_group=security_group,
             role=role,
             key_name=key_name,
+            # Hibernation needs an encrypted root volume large enough for the RAM image
+            hibernation_configured=hibernated or None,
+            block_devices=[ec2.BlockDevice(
+                device_name=warm_pool_config.get("rootDeviceName", "/dev/sda1"),
+                volume=ec2.BlockDeviceVolume.ebs(warm_pool_config.get("rootVolumeSize", 20), encrypted=True)
+            )] if hibernated else None,
         )
+
+        x86_types = instances_config.get("architectures", {}).get("x86_64", {}).get("instanceTypes", [backend["instanceType"]])
+        self.add_instance_bootstrap(launch_template, x86_types, backend.get("jvm", {}), lb_config)
+
+        # Mixed instances and Spot, with a launch template per extra architecture
+        mixed_instances_policy = None
+        if instances_config:
+            mixed_instances_policy = self.gen_mixed_instances_policy(
+                launch_template, security_group, role, key_name, instances_config, backend.get("jvm", {}), lb_config)
         
          # Configure Auto Scaling Notifications
         
@@ -179,39 +248,78 @@ class JavaStack(Stack):
             auto_scaling_group_name=f"{context_global["prefix"]}-{context_global["environment"]}-asg-blue",
             vpc=vpc,
             ssm_session_permissions=True,
-            launch_template=launch_template,
+            launch_template=None if mixed_instances_policy else launch_template,
+            mixed_instances_policy=mixed_instances_policy,
+            # Replace Spot instances at elevated interruption risk before they are reclaimed
+            capacity_rebalance=instances_config.get("capacityRebalance", True) if instances_config else None,
             notifications=[autoscaling.NotificationConfiguration(topic=sns_topic)],
-            min_capacity=1,
-            max_capacity=2,
+            # Group metrics for the capacity widgets, copied to the green ASG by CodeDeploy
+            group_metrics=[autoscaling.GroupMetrics.all()] if backend.get("monitoring") else None,
+            min_capacity=scaling_config.get("minCapacity", 1),
+            max_capacity=scaling_config.get("maxCapacity", 2),
         )
         
         
         
         
+        # Warm pool of pre-initialized instances to cut scale-out latency
+        if warm_pool_config:
+            self.gen_warm_pool(asg, launch_template, warm_pool_config)
+
         # Attach ASGs to the Load Balancer Target Groups
+        health_check_config = lb_config.get("healthCheck", {})
+        if instances_config:
+            # Spot gives a two-minute warning: finish draining well inside it
+            deregistration_delay = lb_config.get("deregistrationDelaySeconds", 90)
+        else:
+            deregistration_delay = lb_config.get("deregistrationDelaySeconds")
+        algorithm = lb_config.get("algorithm", "round_robin")
+        if algorithm == "least_outstanding_requests" and lb_config.get("slowStartSeconds"):
+            raise ValueError("The ALB can't combine slow start with least_outstanding_requests")
+
         target_group = listener.add_targets("TargetGroup",
             port=8080,
             targets=[asg],
+            protocol_version=elbv2.ApplicationProtocolVersion[protocol_version],
+            load_balancing_algorithm_type=elbv2.TargetGroupLoadBalancingAlgorithmType[algorithm.upper()],
+            # Ramp traffic up while a freshly registered JVM is still JIT-compiling
+            slow_start=cdk.Duration.seconds(lb_config["slowStartSeconds"]) if lb_config.get("slowStartSeconds") else None,
+            deregistration_delay=cdk.Duration.seconds(deregistration_delay) if deregistration_delay is not None else None,
             health_check=elbv2.HealthCheck(
-                path="/",
-                interval=cdk.Duration.seconds(30),
-                timeout=cdk.Duration.seconds(5),
-                healthy_threshold_count=2,
-                unhealthy_threshold_count=2,
-                healthy_http_codes="200"
-            )
+                path=health_check_config.get("path", "/"),
+                interval=cdk.Duration.seconds(health_check_config.get("intervalSeconds", 30)),
+                timeout=cdk.Duration.seconds(health_check_config.get("timeoutSeconds", 5)),
+                healthy_threshold_count=health_check_config.get("healthyThreshold", 2),
+                unhealthy_threshold_count=health_check_config.get("unhealthyThreshold", 2),
+                healthy_http_codes=health_check_config.get("healthyHttpCodes", "200")
+            ),
         )
+
+        if "crossZone" in lb_config:
+            target_group.set_attribute("load_balancing.cross_zone.enabled", str(lb_config["crossZone"]).lower())
+
+        if instances_config:
+            self.gen_spot_drain(target_group)
         
        
         
         
-        asg.scale_on_cpu_utilization("CpuScaling",
-            target_utilization_percent=70,
-            cooldown=cdk.Duration.minutes(5)
-        )
-        
-        
-        # asg.add_alarm(sns_topic)
+        # Scaling policies, after the target group so request metrics can reference it
+        self.gen_scaling_policies(asg, target_group, scaling_config)
+
+        # Dashboard and SLO alarms, notifying the Auto Scaling topic and rolling back CodeDeploy
+        monitoring_config = backend.get("monitoring", {})
+        if monitoring_config:
+            ServiceDashboard(self, "ServiceDashboard",
+                name=f"{context_global['prefix']}-{context_global['environment']}-{backend['name']}",
+                load_balancer=alb,
+                target_group=target_group,
+                search_term=f"{context_global['prefix']}-{context_global['environment']}",
+                alarm_topic=sns_topic,
+                slo=monitoring_config.get("slo", {}),
+                period_seconds=monitoring_config.get("periodSeconds", 60),
+                nat_gateway_ids=nat_gateway_ids(self, context),
+            )
         
         CfnOutput(self, "targetgrouparn",
             value=target_group.target_group_arn,
@@ -225,8 +333,231 @@ class JavaStack(Stack):
             description="ARN of the Application Load Balancer"
         )
 
+        CfnOutput(self, "loadbalancerdns",
+            value=alb.load_balancer_dns_name,
+            export_name= "loadbalancerdns",
+            description="DNS name of the Application Load Balancer"
+        )
+
         CfnOutput(self, "asgname",
             value=asg.auto_scaling_group_name,
             export_name= "asgname",
             description="Name of the Auto Scaling Group"
-        )
\ No newline at end of file
+        )
+
+    def add_instance_bootstrap(self, launch_template, instance_types, jvm_config, lb_config):
+        extra_options = []
+        if "idleTimeoutSeconds" in lb_config:
+            launch_template.user_data.add_commands(*tomcat_connector_commands(8080, lb_config["idleTimeoutSeconds"] + 5))
+
+        # CloudWatch agent scraping the JMX exporter javaagent, before Tomcat restarts with it
+        if self.metrics_config:
+            launch_template.user_data.add_commands(*cloudwatch_agent_commands(
+                agent_config(self.metrics_config, self.service_name),
+                prometheus_config(self.metrics_config, self.service_name),
+                self.metrics_config.get("jmxExporterVersion", "1.0.1")))
+            extra_options.append(java_agent_option(self.metrics_config))
+
+        # JVM options sized for the instance type, applied before the warm pool hook checks Tomcat
+        jvm = jvm_profile(smallest_instance_type(instance_types), jvm_config)
+        launch_template.user_data.add_commands(*jvm_profile_commands(tomcat_environment(jvm, extra_options)))
+
+    def gen_mixed_instances_policy(self, launch_template, security_group, role, key_name, instances_config, jvm_config, lb_config):
+        context_global = self.context_global
+        overrides = []
+
+        for architecture, arch_config in instances_config["architectures"].items():
+            expected = ec2.InstanceArchitecture.X86_64 if architecture == "x86_64" else ec2.InstanceArchitecture.ARM_64
+            for instance_type in arch_config["instanceTypes"]:
+                if ec2.InstanceType(instance_type).architecture != expected:
+                    raise ValueError(f"Instance type '{instance_type}' is not {architecture}")
+
+            if architecture == "x86_64":
+                # The primary launch template, with the java.ami / golden AMI
+                arch_template = None
+            else:
+                if arch_config.get("amiParameter"):
+                    arch_image = ec2.MachineImage.from_ssm_parameter(arch_config["amiParameter"])
+                else:
+                    arch_image = ec2.MachineImage.generic_linux({
+                        f"{self.region}": arch_config["ami"]
+                    })
+
+                arch_template = ec2.LaunchTemplate(self, f"LaunchTemplate{architecture.replace('_', '').title()}",
+                    launch_template_name=f"{context_global['prefix']}-{context_global['environment']}-launch-template-{architecture}",
+                    machine_image=arch_image,
+                    security_group=security_group,
+                    role=role,
+                    key_name=key_name,
+                )
+                self.add_instance_bootstrap(arch_template, arch_config["instanceTypes"], jvm_config, lb_config)
+
+            overrides += [
+                autoscaling.LaunchTemplateOverrides(
+                    instance_type=ec2.InstanceType(instance_type),
+                    launch_template=arch_template,
+                )
+                for instance_type in arch_config["instanceTypes"]
+            ]
+
+        return autoscaling.MixedInstancesPolicy(
+            launch_template=launch_template,
+            launch_template_overrides=overrides,
+            instances_distribution=autoscaling.InstancesDistribution(
+                on_demand_allocation_strategy=autoscaling.OnDemandAllocationStrategy.PRIORITIZED,
+                on_demand_base_capacity=instances_config.get("onDemandBaseCapacity", 1),
+                on_demand_percentage_above_base_capacity=instances_config.get("onDemandPercentageAboveBaseCapacity", 0),
+                spot_allocation_strategy=autoscaling.SpotAllocationStrategy[
+                    instances_config.get("spotAllocationStrategy", "capacity-optimized").upper().replace("-", "_")],
+            ),
+        )
+
+    def gen_spot_drain(self, target_group):
+        drain_function = lambda_.Function(self, "SpotDrain",
+            runtime=lambda_.Runtime.PYTHON_3_12,
+            handler="index.handler",
+            code=lambda_.Code.from_asset("functions/spot_drain"),
+            timeout=cdk.Duration.seconds(30),
+            environment={
+                "TARGET_GROUP_ARN": target_group.target_group_arn,
+            },
+        )
+
+        drain_function.add_to_role_policy(iam.PolicyStatement(
+            actions=["elasticloadbalancing:DeregisterTargets"],
+            resources=[target_group.target_group_arn]
+        ))
+        drain_function.add_to_role_policy(iam.PolicyStatement(
+            actions=["elasticloadbalancing:DescribeTargetHealth"],
+            resources=["*"]
+        ))
+
+        NagSuppressions.add_resource_suppressions(
+            drain_function,
+            [
+                {
+                    'id': 'AwsSolutions-IAM4',
+                    'reason': 'AWSLambdaBasicExecutionRole for the function logs.',
+                },
+                {
+                    'id': 'AwsSolutions-IAM5',
+                    'reason': 'DescribeTargetHealth does not support resource-level permissions.',
+                },
+            ],
+            True
+        )
+
+        events.Rule(self, "SpotInterruptionRule",
+            event_pattern=events.EventPattern(
+                source=["aws.ec2"],
+                detail_type=["EC2 Spot Instance Interruption Warning"],
+            ),
+            targets=[targets.LambdaFunction(drain_function)],
+        )
+
+    def gen_warm_pool(self, asg, launch_template, warm_pool_config):
+        context_global = self.context_global
+        hook_name = f"{context_global['prefix']}-{context_global['environment']}-launch-hook"
+        ready_timeout = warm_pool_config.get("readyTimeoutSeconds", 900)
+
+        asg.add_warm_pool(
+            min_size=warm_pool_config.get("minSize", 1),
+            max_group_prepared_capacity=warm_pool_config.get("maxGroupPreparedCapacity"),
+            pool_state=autoscaling.PoolState[warm_pool_config.get("poolState", "Stopped").upper()],
+            reuse_on_scale_in=warm_pool_config.get("reuseOnScaleIn", True),
+        )
+
+        # Held on launch into the pool and again on the way out of it, until the
+        # instance reports Tomcat and the CodeDeploy agent ready
+        asg.add_lifecycle_hook("LaunchLifecycleHook",
+            lifecycle_hook_name=hook_name,
+            lifecycle_transition=autoscaling.LifecycleTransition.INSTANCE_LAUNCHING,
+            default_result=autoscaling.DefaultResult.ABANDON,
+            heartbeat_timeout=cdk.Duration.seconds(ready_timeout + 120),
+        )
+
+        launch_template.user_data.add_commands(*warm_pool_commands(hook_name, 8080, ready_timeout))
+
+    def gen_scaling_policies(self, asg, target_group, scaling_config):
+        policies = scaling_config.get("policies", [
+            {"type": "cpu", "targetUtilizationPercent": 70, "cooldownMinutes": 5},
+        ])
+
+        for policy in policies:
+            policy_type = policy["type"]
+            cooldown = cdk.Duration.minutes(policy["cooldownMinutes"]) if "cooldownMinutes" in policy else None
+            warmup = cdk.Duration.seconds(policy["warmupSeconds"]) if "warmupSeconds" in policy else None
+
+            if policy_type == "cpu":
+                asg.scale_on_cpu_utilization(policy.get("name", "CpuScaling"),
+                    target_utilization_percent=policy["targetUtilizationPercent"],
+                    cooldown=cooldown,
+                    estimated_instance_warmup=warmup
+                )
+
+            elif policy_type == "requestCount":
+                # Target tracking on ALBRequestCountPerTarget of the ASG's target group
+                asg.scale_on_request_count(policy.get("name", "RequestCountScaling"),
+                    target_requests_per_minute=policy["targetRequestsPerMinute"],
+                    cooldown=cooldown,
+                    estimated_instance_warmup=warmup
+                )
+
+            elif policy_type == "responseTime":
+                # Step scaling on TargetResponseTime (p99 by default), steps in seconds
+                asg.scale_on_metric(policy.get("name", "ResponseTimeScaling"),
+                    metric=target_group.metrics.target_response_time(
+                        statistic=policy.get("statistic", "p99"),
+                        period=cdk.Duration.seconds(policy.get("periodSeconds", 60))
+                    ),
+                    scaling_steps=[
+                        autoscaling.ScalingInterval(lower=step.get("lower"), upper=step.get("upper"), change=step["change"])
+                        for step in policy["steps"]
+                    ],
+                    adjustment_type=autoscaling.AdjustmentType.CHANGE_IN_CAPACITY,
+                    evaluation_periods=policy.get("evaluationPeriods", 2),
+                    cooldown=cooldown,
+                    estimated_instance_warmup=warmup
+                )
+
+            elif policy_type == "metric":
+                # Target tracking on a java.metrics metric (e.g. Tomcat busy threads,
+                # mem_used_percent), aggregated over the service so it survives blue/green
+                if not self.metrics_config:
+                    raise ValueError("Scaling policies of type 'metric' need java.metrics")
+                asg.scale_to_track_metric(policy.get("name", "MetricScaling"),
+                    metric=cloudwatch.Metric(
+                        namespace=self.metrics_config.get("namespace", "SbiFpt/Java"),
+                        metric_name=policy["metricName"],
+                        dimensions_map=policy.get("dimensions", {"Service": self.service_name}),
+                        statistic=policy.get("statistic", "Average"),
+                        period=cdk.Duration.seconds(policy.get("periodSeconds", 60))
+                    ),
+                    target_value=policy["targetValue"],
+                    cooldown=cooldown,
+                    estimated_instance_warmup=warmup
+                )
+
+            elif policy_type == "schedule":
+                # Known peaks and overnight scale-down, cron in the given time zone
+                asg.scale_on_schedule(policy["name"],
+                    schedule=autoscaling.Schedule.expression(policy["schedule"]),
+                    min_capacity=policy.get("minCapacity"),
+                    max_capacity=policy.get("maxCapacity"),
+                    desired_capacity=policy.get("desiredCapacity"),
+                    time_zone=policy.get("timeZone")
+                )
+
+            elif policy_type == "predictive":
+                # Forecast capacity from the daily pattern; PipelineJavaStack re-applies
+                # the same policy to the green ASG that CodeDeploy copies
+                resource_label = f"{target_group.first_load_balancer_full_name}/{target_group.target_group_full_name}"
+                predictive_policy = autoscaling.CfnScalingPolicy(self, policy.get("name", "PredictiveScaling"),
+                    auto_scaling_group_name=asg.auto_scaling_group_name,
+                    policy_type="PredictiveScaling"
+                )
+                predictive_policy.add_property_override("PredictiveScalingConfiguration",
+                    predictive_scaling_configuration(policy, resource_label))
+
+            else:
+                raise ValueError(f"Unknown scaling policy type '{policy_type}'")
@@ -0,0 +1,121 @@
+"""JVM options for the Tomcat service, sized from the EC2 instance type."""
+
+# Burstable sizes don't follow the vCPU x GiB-per-vCPU rule of the other families
+BURSTABLE_MEMORY_MIB = {
+    "nano": 512,
+    "micro": 1024,
+    "small": 2048,
+    "medium": 4096,
+    "large": 8192,
+    "xlarge": 16384,
+    "2xlarge": 32768,
+}
+
+# GiB per vCPU by family class (c5, m6i, r7g, ...)
+MEMORY_PER_VCPU_GIB = {"c": 2, "m": 4, "r": 8}
+
+# Where the dynamic AppCDS archive lives; Tomcat runs as root (user_data.sh)
+CDS_ARCHIVE = "/var/cache/tomcat/tomcat.jsa"
+
+TOMCAT_ENVIRONMENT_FILE = "/etc/default/tomcat"
+
+
+# vCPUs of the named sizes; NNxlarge is 4 x NN
+VCPUS = {"medium": 1, "large": 2, "xlarge": 4}
+
+
+def instance_memory_mib(instance_type: str) -> int:
+    family, _, size = instance_type.partition(".")
+    unknown = ValueError(f"No memory size known for instance type '{instance_type}', set java.jvm.memoryMib")
+    if family.startswith("t"):
+        if size not in BURSTABLE_MEMORY_MIB:
+            raise unknown
+        return BURSTABLE_MEMORY_MIB[size]
+
+    if family[:1] not in MEMORY_PER_VCPU_GIB:
+        raise unknown
+    if size in VCPUS:
+        vcpus = VCPUS[size]
+    elif size.endswith("xlarge") and size.removesuffix("xlarge").isdigit():
+        vcpus = 4 * int(size.removesuffix("xlarge"))
+    else:
+        # metal sizes differ per family
+        raise unknown
+    return vcpus * MEMORY_PER_VCPU_GIB[family[0]] * 1024
+
+
+def smallest_instance_type(instance_types: list) -> str:
+    """Size the JVM for the smallest type a launch template can get."""
+    if len(instance_types) == 1:
+        return instance_types[0]
+    return min(instance_types, key=instance_memory_mib)
+
+
+def jvm_profile(instance_type: str, jvm_config: dict) -> dict:
+    """Pick heap share, GC and non-heap sizes for the instance's memory.
+
+    mode: balanced (G1), latency (generational ZGC from 4 GiB, else G1 with a
+    pause goal) or throughput (Parallel). Heap is a share of RAM so the same
+    options suit every size the ASG launches.
+    """
+    memory_mib = jvm_config.get("memoryMib") or instance_memory_mib(instance_type)
+    small = memory_mib < 2048
+    mode = jvm_config.get("mode", "balanced")
+
+    if mode == "throughput":
+        gc = "Parallel"
+    elif mode == "latency":
+        gc = "ZGC" if memory_mib >= 4096 else "G1"
+    elif mode == "balanced":
+        gc = "G1"
+    else:
+        raise ValueError(f"JVM mode must be balanced, latency or throughput, got '{mode}'")
+
+    # Leave room for the OS, CodeDeploy agent and off-heap; ZGC wants more headroom
+    default_heap = 50 if small else (65 if gc == "ZGC" else 70)
+
+    return {
+        "memoryMib": memory_mib,
+        "gc": gc,
+        "heapPercent": jvm_config.get("heapPercent", default_heap),
+        "metaspaceMb": jvm_config.get("metaspaceMb", 128 if small else 256),
+        "codeCacheMb": jvm_config.get("codeCacheMb", 64 if small else 240),
+        "alwaysPreTouch": jvm_config.get("alwaysPreTouch", True),
+        "maxGcPauseMillis": jvm_config.get("maxGcPauseMillis", 100 if mode == "latency" else None),
+        "cds": jvm_config.get("cds", True),
+    }
+
+
+def catalina_opts(profile: dict, extra_options: list = ()) -> str:
+    heap = profile["heapPercent"]
+    options = [
+        "-server",
+        f"-XX:InitialRAMPercentage={heap}",
+        f"-XX:MaxRAMPercentage={heap}",
+        f"-XX:MaxMetaspaceSize={profile['metaspaceMb']}m",
+        f"-XX:ReservedCodeCacheSize={profile['codeCacheMb']}m",
+    ]
+
+    if profile["gc"] == "ZGC":
+        options += ["-XX:+UseZGC", "-XX:+ZGenerational"]
+    elif profile["gc"] == "Parallel":
+        options.append("-XX:+UseParallelGC")
+    else:
+        options.append("-XX:+UseG1GC")
+        if profile["maxGcPauseMillis"]:
+            options.append(f"-XX:MaxGCPauseMillis={profile['maxGcPauseMillis']}")
+
+    if profile["alwaysPreTouch"]:
+        options.append("-XX:+AlwaysPreTouch")
+    if profile["cds"]:
+        # JDK 19+: dumps the archive on first exit and regenerates it when the JDK or classpath changes
+        options += ["-XX:+AutoCreateSharedArchive", f"-XX:SharedArchiveFile={CDS_ARCHIVE}"]
+
+    return " ".join([*options, *extra_options])
+
+
+def tomcat_environment(profile: dict, extra_options: list = ()) -> str:
+    return "\n".join([
+        f"# Generated for {profile['memoryMib']} MiB, {profile['gc']} GC",
+        f'CATALINA_OPTS="{catalina_opts(profile, extra_options)}"',
+    ])
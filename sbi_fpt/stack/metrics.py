@@ -0,0 +1,104 @@
+"""CloudWatch agent and Prometheus JMX exporter settings for the Java instances."""
+import json
+
+JMX_EXPORTER_DIR = "/opt/jmx-exporter"
+JMX_EXPORTER_JAR = f"{JMX_EXPORTER_DIR}/jmx_prometheus_javaagent.jar"
+AGENT_DIR = "/opt/aws/amazon-cloudwatch-agent/etc"
+
+# Tomcat connector MBeans; names are lowercased by the exporter
+JMX_EXPORTER_RULES = """\
+lowercaseOutputName: true
+lowercaseOutputLabelNames: true
+rules:
+  - pattern: 'Catalina<type=ThreadPool, name="(\\w+-\\w+)-(\\d+)"><>(currentThreadsBusy|currentThreadCount|maxThreads|connectionCount|keepAliveCount)'
+    name: tomcat_threadpool_$3
+    labels:
+      port: "$2"
+    type: GAUGE
+  - pattern: 'Catalina<type=GlobalRequestProcessor, name="(\\w+-\\w+)-(\\d+)"><>(requestCount|processingTime|errorCount)'
+    name: tomcat_requestprocessor_$3_total
+    labels:
+      port: "$2"
+    type: COUNTER
+"""
+
+# Metric selector -> labels added to the configured dimensions
+METRIC_GROUPS = [
+    # busy threads against max threads is pool exhaustion; connectionCount above
+    # busy threads is requests queued on the connector
+    (["^tomcat_threadpool_(currentthreadsbusy|maxthreads|connectioncount)$"], []),
+    # processingtime / requestcount is the mean request processing time (ms)
+    (["^tomcat_requestprocessor_(requestcount|processingtime|errorcount)_total$"], []),
+    (["^jvm_memory_(bytes_used|used_bytes|bytes_max|max_bytes)$"], ["area"]),
+    (["^jvm_gc_collection_seconds_(sum|count)$"], ["gc"]),
+]
+
+
+def java_agent_option(metrics_config: dict) -> str:
+    port = metrics_config.get("jmxExporterPort", 9404)
+    return f"-javaagent:{JMX_EXPORTER_JAR}={port}:{JMX_EXPORTER_DIR}/config.yaml"
+
+
+def prometheus_config(metrics_config: dict, service: str) -> str:
+    """Scrape config; __INSTANCE_ID__ is filled in on the instance."""
+    interval = metrics_config.get("intervalSeconds", 60)
+    return "\n".join([
+        "global:",
+        f"  scrape_interval: {interval}s",
+        f"  scrape_timeout: {min(interval, 10)}s",
+        "scrape_configs:",
+        "  - job_name: tomcat",
+        "    static_configs:",
+        f"      - targets: ['localhost:{metrics_config.get('jmxExporterPort', 9404)}']",
+        "        labels:",
+        f"          Service: {service}",
+        "          InstanceId: __INSTANCE_ID__",
+    ])
+
+
+def agent_config(metrics_config: dict, service: str) -> str:
+    namespace = metrics_config.get("namespace", "SbiFpt/Java")
+    dimensions = metrics_config.get("dimensions", [["Service"], ["Service", "InstanceId"]])
+
+    config = {
+        "agent": {"metrics_collection_interval": metrics_config.get("intervalSeconds", 60)},
+        "metrics": {
+            "namespace": namespace,
+            "append_dimensions": {"InstanceId": "${aws:InstanceId}"},
+            # Service, not the ASG name: CodeDeploy blue/green renames the ASG
+            "aggregation_dimensions": [["Service"]],
+            "metrics_collected": {
+                "mem": {
+                    "measurement": ["mem_used_percent", "mem_available"],
+                    "append_dimensions": {"Service": service},
+                },
+                "disk": {
+                    "measurement": ["used_percent"],
+                    "resources": ["/"],
+                    "append_dimensions": {"Service": service},
+                },
+            },
+        },
+        "logs": {
+            "metrics_collected": {
+                "prometheus": {
+                    "prometheus_config_path": f"{AGENT_DIR}/prometheus.yaml",
+                    # EMF events land here and become metrics in the namespace
+                    "log_group_name": f"/aws/ec2/{service}/prometheus",
+                    "emf_processor": {
+                        "metric_namespace": namespace,
+                        "metric_declaration": [
+                            {
+                                "source_labels": ["job"],
+                                "label_matcher": "^tomcat$",
+                                "dimensions": [dimension_set + labels for dimension_set in dimensions],
+                                "metric_selectors": selectors,
+                            }
+                            for selectors, labels in METRIC_GROUPS
+                        ],
+                    },
+                },
+            },
+        },
+    }
+    return json.dumps(config, indent=2)
@@ -0,0 +1,90 @@
+"""The VPC SbiFptStack creates, shared with the other stacks without a context lookup.
+
+SbiFptStack publishes the VPC id, subnet ids and route table ids as SSM
+parameters under /<prefix>/<environment>/vpc/, and the NAT gateway ids for
+the dashboards. The consuming stacks rebuild the
+VPC from those parameters (resolved by CloudFormation at deploy time) and from
+parameters.yaml, which fixes the AZs and the number of subnets at synth time.
+"""
+import aws_cdk as cdk
+from aws_cdk import aws_ec2 as ec2, aws_ssm as ssm
+from constructs import Construct
+
+SUBNET_TYPES = ("public", "private")
+VPC_PARAMETERS = ("id", "public-subnet-ids", "public-route-table-ids", "private-subnet-ids", "private-route-table-ids",
+                  "nat-gateway-ids")
+
+
+def vpc_parameter_name(context: dict, key: str) -> str:
+    return f"/{context['env']['prefix']}/{context['env']['environment']}/vpc/{key}"
+
+
+def availability_zones(vpc_config: dict) -> list:
+    return sorted({net["availabilityZone"] for net in vpc_config["subnets"]})
+
+
+def ordered_subnets(vpc_config: dict, subnet_type: str) -> list:
+    """Subnets of one type in Vpc.from_vpc_attributes order: AZs round-robin, by CIDR within an AZ.
+
+    from_vpc_attributes assigns the n-th subnet id to the n-th AZ (modulo the
+    AZ count), so every AZ needs the same number of subnets of each type.
+    """
+    azs = availability_zones(vpc_config)
+    by_az = {az: sorted((net for net in vpc_config["subnets"]
+                         if net["type"] == subnet_type and net["availabilityZone"] == az),
+                        key=lambda net: net["cidr"])
+             for az in azs}
+    counts = {len(subnets) for subnets in by_az.values()}
+    if len(counts) > 1:
+        raise ValueError(f"vpc.subnets: every AZ of {', '.join(azs)} needs the same number of {subnet_type} "
+                         f"subnets to import the VPC without a lookup, set vpc.lookup: true otherwise")
+    return [net for row in zip(*by_az.values()) for net in row]
+
+
+def nat_gateway_azs(vpc_config: dict) -> list:
+    """AZs that get a NAT gateway, in the order SbiFptStack creates and publishes them.
+
+    "single" puts one NAT in the AZ of the first public subnet, "per-az" one in
+    every AZ with a public subnet.
+    """
+    nat_mode = vpc_config.get("natGateways", "single")
+    if nat_mode not in ("single", "per-az"):
+        raise ValueError(f"vpc.natGateways must be 'single' or 'per-az', got '{nat_mode}'")
+    azs = list(dict.fromkeys(net["availabilityZone"] for net in vpc_config["subnets"] if net["type"] == "public"))
+    return azs[:1] if nat_mode == "single" else azs
+
+
+def nat_gateway_ids(scope: Construct, context: dict) -> list:
+    """NAT gateway ids SbiFptStack published, resolved at deploy time; empty for a looked-up VPC."""
+    vpc_config = context["vpc"]
+    count = len(nat_gateway_azs(vpc_config))
+    if vpc_config.get("lookup") or not count:
+        return []
+    ids = cdk.Fn.split(",", ssm.StringParameter.value_for_string_parameter(
+        scope, vpc_parameter_name(context, "nat-gateway-ids")), assumed_length=count)
+    return [cdk.Fn.select(index, ids) for index in range(count)]
+
+
+def import_vpc(scope: Construct, construct_id: str, context: dict) -> ec2.IVpc:
+    vpc_config = context["vpc"]
+    if vpc_config.get("lookup"):
+        # Needs credentials on the first synth, then cached in cdk.context.json
+        return ec2.Vpc.from_lookup(scope, construct_id, vpc_id=vpc_config["vpc_id"])
+
+    def parameter(key):
+        return ssm.StringParameter.value_for_string_parameter(scope, vpc_parameter_name(context, key))
+
+    def id_list(key, count):
+        return cdk.Fn.split(",", parameter(key), assumed_length=count) if count else None
+
+    public_count = len(ordered_subnets(vpc_config, "public"))
+    private_count = len(ordered_subnets(vpc_config, "private"))
+    return ec2.Vpc.from_vpc_attributes(scope, construct_id,
+        vpc_id=parameter("id"),
+        vpc_cidr_block=vpc_config["cidr"],
+        availability_zones=availability_zones(vpc_config),
+        public_subnet_ids=id_list("public-subnet-ids", public_count),
+        public_subnet_route_table_ids=id_list("public-route-table-ids", public_count),
+        private_subnet_ids=id_list("private-subnet-ids", private_count),
+        private_subnet_route_table_ids=id_list("private-route-table-ids", private_count),
+    )
@@ -0,0 +1,37 @@
+PREDICTIVE_METRICS = {
+    "cpu": "ASGCPUUtilization",
+    "requestCount": "ALBRequestCount",
+}
+
+
+def predictive_policies(scaling_config: dict) -> list:
+    return [policy for policy in scaling_config.get("policies", []) if policy["type"] == "predictive"]
+
+
+def predictive_scaling_configuration(policy: dict, resource_label=None) -> dict:
+    """PredictiveScalingConfiguration in CloudFormation / PutScalingPolicy shape.
+
+    `resource_label` ("app/<alb>/<id>/targetgroup/<tg>/<id>") is required for
+    the requestCount metric.
+    """
+    metric_type = PREDICTIVE_METRICS[policy.get("metric", "cpu")]
+    metric_pair = {"PredefinedMetricType": metric_type}
+    if metric_type == "ALBRequestCount":
+        metric_pair["ResourceLabel"] = resource_label
+
+    configuration = {
+        "MetricSpecifications": [{
+            "TargetValue": policy["targetValue"],
+            "PredefinedMetricPairSpecification": metric_pair,
+        }],
+        "Mode": policy.get("mode", "ForecastOnly"),
+        "SchedulingBufferTime": policy.get("schedulingBufferSeconds", 300),
+        "MaxCapacityBreachBehavior": policy.get("maxCapacityBreachBehavior", "HonorMaxCapacity"),
+    }
+    if configuration["MaxCapacityBreachBehavior"] == "IncreaseMaxCapacity":
+        configuration["MaxCapacityBuffer"] = policy.get("maxCapacityBuffer", 10)
+
+    if configuration["Mode"] not in ("ForecastOnly", "ForecastAndScale"):
+        raise ValueError(f"Predictive scaling mode must be ForecastOnly or ForecastAndScale, got '{configuration['Mode']}'")
+
+    return configuration
@@ -0,0 +1,166 @@
+"""Local HTTP server with the latency profile of the Tomcat app, for sbi_fpt.loadtest.
+
+    python -m sbi_fpt.stand_in --port 8080 --median-ms 20 --p99-ms 250
+    python -m sbi_fpt.stand_in --max-threads 20 --accept-count 10 --warmup-seconds 60
+
+Like Tomcat's HTTP connector, requests are served by at most maxThreads
+workers with up to acceptCount more waiting; beyond that the server answers
+503 at once. Service times are lognormal (median and p99) and start
+cold-factor times slower, decaying over the warm-up like a fresh JVM under
+JIT. Idle keep-alive connections close after keepAliveTimeout.
+"""
+import argparse
+import asyncio
+import math
+import random
+import sys
+
+# Tomcat's connector defaults; keepAliveTimeout as bootstrap.tomcat_connector_commands sets it (ALB idle + 5s)
+DEFAULTS = {
+    "max_threads": 200,
+    "accept_count": 100,
+    "keep_alive_seconds": 65,
+    "median_ms": 20.0,
+    "p99_ms": 250.0,
+    "error_rate": 0.0,
+    "warmup_seconds": 0.0,
+    "cold_factor": 1.0,
+}
+
+# z-score of the 99th percentile of the standard normal distribution
+Z_P99 = 2.3263
+
+
+class StandInServer:
+    """asyncio HTTP/1.1 server; `stats` counts what it served, for assertions and the log line."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, seed: int = None, **profile):
+        unknown = set(profile) - set(DEFAULTS)
+        if unknown:
+            raise ValueError(f"Unknown stand-in setting(s): {', '.join(sorted(unknown))}")
+        self.profile = {**DEFAULTS, **profile}
+        if self.profile["p99_ms"] < self.profile["median_ms"]:
+            raise ValueError("p99_ms must be at least median_ms")
+        self.host = host
+        self.port = port
+        self.random = random.Random(seed)
+        self.stats = {"connections": 0, "requests": 0, "rejected": 0, "errors": 0, "peakBusy": 0}
+        self._threads = asyncio.Semaphore(self.profile["max_threads"])
+        self._busy = 0
+        self._waiting = 0
+        self._server = None
+        self._started = None
+
+    async def start(self) -> "StandInServer":
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._started = asyncio.get_running_loop().time()
+        return self
+
+    async def close(self) -> None:
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def service_seconds(self) -> float:
+        median = self.profile["median_ms"] / 1000
+        sigma = math.log(self.profile["p99_ms"] / self.profile["median_ms"]) / Z_P99
+        seconds = self.random.lognormvariate(math.log(median), sigma)
+
+        warmup = self.profile["warmup_seconds"]
+        if warmup:
+            elapsed = asyncio.get_running_loop().time() - self._started
+            # cold_factor at start, 1 once warm; exponential like C2 compilation catching up
+            seconds *= 1 + (self.profile["cold_factor"] - 1) * math.exp(-5 * elapsed / warmup)
+        return seconds
+
+    async def _handle(self, reader, writer):
+        self.stats["connections"] += 1
+        try:
+            while True:
+                try:
+                    request_line = await asyncio.wait_for(reader.readline(), self.profile["keep_alive_seconds"])
+                except asyncio.TimeoutError:
+                    return
+                if not request_line.strip():
+                    return
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                if int(headers.get("content-length", 0)):
+                    await reader.readexactly(int(headers["content-length"]))
+
+                status, body = await self._serve(request_line.decode("latin-1").split(" ")[1])
+                close = headers.get("connection", "").lower() == "close"
+                writer.write(
+                    f"HTTP/1.1 {status}\r\nContent-Type: text/plain\r\nContent-Length: {len(body)}\r\n"
+                    f"{'Connection: close' if close else 'Keep-Alive: timeout=' + str(self.profile['keep_alive_seconds'])}"
+                    f"\r\n\r\n".encode() + body)
+                await writer.drain()
+                if close:
+                    return
+        except (ConnectionError, asyncio.IncompleteReadError, IndexError):
+            return
+        finally:
+            writer.close()
+
+    async def _serve(self, path: str):
+        self.stats["requests"] += 1
+        if self._busy >= self.profile["max_threads"] and self._waiting >= self.profile["accept_count"]:
+            self.stats["rejected"] += 1
+            return "503 Service Unavailable", b"accept queue full\n"
+
+        self._waiting += 1
+        async with self._threads:
+            self._waiting -= 1
+            self._busy += 1
+            self.stats["peakBusy"] = max(self.stats["peakBusy"], self._busy)
+            try:
+                await asyncio.sleep(self.service_seconds())
+            finally:
+                self._busy -= 1
+
+        if self.profile["error_rate"] and self.random.random() < self.profile["error_rate"]:
+            self.stats["errors"] += 1
+            return "500 Internal Server Error", b"error\n"
+        return "200 OK", f"ok {path}\n".encode()
+
+
+async def serve(host: str, port: int, seed: int, profile: dict) -> None:
+    async with StandInServer(host, port, seed, **profile) as server:
+        print(f"Stand-in listening on {server.url}: {profile}", file=sys.stderr)
+        await asyncio.Event().wait()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m sbi_fpt.stand_in", description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--seed", type=int, help="Seed of the latency and error draws")
+    for name, default in DEFAULTS.items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=type(default), default=default)
+    args = parser.parse_args(argv)
+
+    try:
+        asyncio.run(serve(args.host, args.port, args.seed, {name: getattr(args, name) for name in DEFAULTS}))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
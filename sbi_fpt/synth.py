@@ -0,0 +1,270 @@
+"""Synthesize the app in-process, for one environment or several in parallel.
+
+    python -m sbi_fpt.synth --environments dev,staging,prod --output cdk.out.envs
+    python -m sbi_fpt.synth --stacks JavaStack --base dev --format json
+
+parameters.yaml is read once; every environment is synthesized in its own
+process (and jsii kernel) into <output>/<environment>, then resource counts
+are summarized and each environment's templates are diffed against the base
+environment, with environment names, accounts and regions normalized. The
+summary is printed and written to <output>/summary.json.
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import yaml
+
+from sbi_fpt.registry import STACKS
+
+
+def load_parameters(path: str = "parameters.yaml") -> dict:
+    with open(path) as file:
+        return yaml.safe_load(file)
+
+
+def load_cdk_context(root: str = ".") -> dict:
+    """The context `cdk synth` hands to the app: cdk.json flags plus cached lookups."""
+    context = {}
+    with open(os.path.join(root, "cdk.json")) as file:
+        context.update(json.load(file).get("context", {}))
+
+    cached = os.path.join(root, "cdk.context.json")
+    if os.path.exists(cached):
+        with open(cached) as file:
+            context.update(json.load(file))
+
+    return context
+
+
+def offline_context(context: dict) -> dict:
+    """Answers for the context lookups the app makes, derived from parameters.yaml.
+
+    A stand-in for the CDK CLI's context providers, so synth needs no AWS
+    credentials and gives the same templates everywhere: the availability
+    zones of the environment and, for `vpc.lookup: true`, the VPC with
+    placeholder subnet and route table ids derived from the CIDRs.
+    """
+    from sbi_fpt.stack.network import availability_zones
+
+    env, vpc_config = context["env"], context["vpc"]
+    scope = f"account={env['account']}:region={env['region']}"
+    azs = availability_zones(vpc_config)
+    lookups = {f"availability-zones:{scope}": azs}
+
+    if vpc_config.get("lookup"):
+        def placeholder(kind, cidr):
+            return f"{kind}-{hashlib.sha256(f'{vpc_config['vpc_id']}/{cidr}'.encode()).hexdigest()[:17]}"
+
+        lookups[f"vpc-provider:account={env['account']}:filter.vpc-id={vpc_config['vpc_id']}"
+                f":region={env['region']}:returnAsymmetricSubnets=true"] = {
+            "vpcId": vpc_config["vpc_id"],
+            "vpcCidrBlock": vpc_config["cidr"],
+            "ownerAccountId": env["account"],
+            "availabilityZones": [],
+            "subnetGroups": [
+                {
+                    "name": subnet_type.title(),
+                    "type": subnet_type.title(),
+                    "subnets": [
+                        {
+                            "subnetId": placeholder("subnet", net["cidr"]),
+                            "cidr": net["cidr"],
+                            "availabilityZone": net["availabilityZone"],
+                            "routeTableId": placeholder("rtb", net["cidr"]),
+                        }
+                        for net in sorted(vpc_config["subnets"], key=lambda net: net["availabilityZone"])
+                        if net["type"] == subnet_type
+                    ],
+                }
+                for subnet_type in ("public", "private")
+                if any(net["type"] == subnet_type for net in vpc_config["subnets"])
+            ],
+        }
+    return lookups
+
+
+def missing_context(assembly) -> list:
+    """Context keys the app looked up but was not given (dummy values were used)."""
+    with open(os.path.join(assembly.directory, "manifest.json")) as file:
+        return [missing["key"] for missing in json.load(file).get("missing", [])]
+
+
+def synth_app(context: dict, outdir: str, stack_ids=None, cdk_context=None, nag: bool = True):
+    """Synthesize the selected stacks in-process, without the CDK CLI."""
+    import aws_cdk as cdk
+    from sbi_fpt.registry import build_stacks
+
+    app = cdk.App(outdir=outdir, context={**(cdk_context or {}), "nag": nag})
+    build_stacks(app, context, stack_ids or [spec.construct_id for spec in STACKS])
+    return app.synth()
+
+
+########### Multi-environment synth ##################
+
+def synth_environment(context: dict, outdir: str, stack_ids=None, root: str = ".", nag: bool = True,
+                      offline: bool = False) -> dict:
+    """Worker: synthesize one environment, return {stack_id: template path}."""
+    cdk_context = load_cdk_context(root)
+    if offline:
+        cdk_context.update(offline_context(context))
+    assembly = synth_app(context, outdir, stack_ids, cdk_context, nag=nag)
+    missing = missing_context(assembly)
+    if missing:
+        raise RuntimeError(f"Context lookups not cached in cdk.context.json: {', '.join(missing)}; "
+                           f"run cdk synth with credentials or pass --offline")
+    return {stack.id: stack.template_full_path for stack in assembly.stacks}
+
+
+def synth_environments(parameters: dict, names: list, outdir: str, stack_ids=None, workers: int = None,
+                       root: str = ".", nag: bool = True, offline: bool = False) -> dict:
+    """{environment: {stack_id: template path}}, environments synthesized in parallel."""
+    workers = workers or min(len(names), os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn")) as pool:
+        futures = {
+            name: pool.submit(synth_environment, parameters[name], os.path.join(outdir, name), stack_ids, root, nag,
+                                offline)
+            for name in names
+        }
+        return {name: future.result() for name, future in futures.items()}
+
+
+def _normalized(path: str, context: dict) -> dict:
+    with open(path) as file:
+        body = file.read()
+    env = context["env"]
+
+    # Constructs named after prefix-environment get logical ids like sbifptdevVpc8378EB38,
+    # with a hash suffix that changes with the name too
+    squashed = re.sub(r"[^A-Za-z0-9]", "", f"{env.get('prefix', '')}{env.get('environment', '')}")
+    if squashed:
+        for logical_id in json.loads(body).get("Resources", {}):
+            if squashed in logical_id:
+                normalized = re.sub(r"[0-9A-F]{8}$", "", logical_id.replace(squashed, "Env"))
+                body = re.sub(rf"(?<![A-Za-z0-9]){logical_id}(?![A-Za-z0-9])", normalized, body)
+
+    for value, placeholder in ((env.get("account"), "<account>"), (env.get("region"), "<region>"),
+                               (env.get("environment"), "<environment>")):
+        if value:
+            body = re.sub(rf"(?<![A-Za-z0-9]){re.escape(str(value))}(?![A-Za-z0-9])", placeholder, body)
+    return json.loads(body)
+
+
+def template_diff(base: dict, other: dict) -> dict:
+    """Resources added, removed and changed (with the differing top-level keys)."""
+    base_resources, other_resources = base.get("Resources", {}), other.get("Resources", {})
+    changed = {}
+    for logical_id in sorted(base_resources.keys() & other_resources.keys()):
+        before, after = base_resources[logical_id], other_resources[logical_id]
+        keys = []
+        for section in sorted(before.keys() | after.keys()):
+            if section == "Properties":
+                properties_before, properties_after = before.get(section) or {}, after.get(section) or {}
+                keys += [f"Properties.{key}" for key in sorted(properties_before.keys() | properties_after.keys())
+                         if properties_before.get(key) != properties_after.get(key)]
+            elif before.get(section) != after.get(section):
+                keys.append(section)
+        if keys:
+            changed[logical_id] = keys
+
+    return {
+        "added": sorted(other_resources.keys() - base_resources.keys()),
+        "removed": sorted(base_resources.keys() - other_resources.keys()),
+        "changed": changed,
+    }
+
+
+def summarize(parameters: dict, assemblies: dict, base: str) -> dict:
+    templates = {
+        name: {stack_id: _normalized(path, parameters[name]) for stack_id, path in stacks.items()}
+        for name, stacks in assemblies.items()
+    }
+    summary = {
+        "base": base,
+        "resourceCounts": {
+            name: {stack_id: len(template.get("Resources", {})) for stack_id, template in stacks.items()}
+            for name, stacks in templates.items()
+        },
+        "diffs": {},
+    }
+    for name, stacks in templates.items():
+        if name == base:
+            continue
+        summary["diffs"][name] = {}
+        for stack_id in sorted(stacks.keys() | templates[base].keys()):
+            if stack_id not in templates[base]:
+                summary["diffs"][name][stack_id] = "only in this environment"
+            elif stack_id not in stacks:
+                summary["diffs"][name][stack_id] = f"only in {base}"
+            else:
+                diff = template_diff(templates[base][stack_id], stacks[stack_id])
+                if any(diff.values()):
+                    summary["diffs"][name][stack_id] = diff
+    return summary
+
+
+def text_summary(summary: dict) -> str:
+    names = list(summary["resourceCounts"])
+    stack_ids = [spec.construct_id for spec in STACKS
+                 if any(spec.construct_id in counts for counts in summary["resourceCounts"].values())]
+    width = max([len(name) for name in names] + [9])
+    lines = [f"{'resources':<20}" + "".join(f"{name:>{width + 2}}" for name in names)]
+    for stack_id in stack_ids:
+        lines.append(f"{stack_id:<20}" + "".join(
+            f"{summary['resourceCounts'][name].get(stack_id, '-'):>{width + 2}}" for name in names))
+
+    for name, stacks in summary["diffs"].items():
+        lines.extend(["", f"{name} against {summary['base']}:" + ("" if stacks else " no differences")])
+        for stack_id, diff in stacks.items():
+            if isinstance(diff, str):
+                lines.append(f"  {stack_id}: {diff}")
+                continue
+            lines.append(f"  {stack_id}:")
+            lines += [f"    + {logical_id}" for logical_id in diff["added"]]
+            lines += [f"    - {logical_id}" for logical_id in diff["removed"]]
+            lines += [f"    ~ {logical_id}: {', '.join(keys)}" for logical_id, keys in diff["changed"].items()]
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m sbi_fpt.synth", description=__doc__.splitlines()[0])
+    parser.add_argument("--parameters", default="parameters.yaml")
+    parser.add_argument("--environments", help="Comma-separated environment keys, default all")
+    parser.add_argument("--stacks", help="Comma-separated stack ids, default all")
+    parser.add_argument("--base", help="Environment the others are diffed against, default the first")
+    parser.add_argument("--output", default="cdk.out.envs")
+    parser.add_argument("--workers", type=int, help="Parallel synths, default one per environment up to the CPU count")
+    parser.add_argument("--no-nag", action="store_true", help="Skip the cdk-nag checks")
+    parser.add_argument("--offline", action="store_true",
+                        help="Answer context lookups from parameters.yaml instead of cdk.context.json")
+    parser.add_argument("--format", choices=["text", "json"], default="text")
+    args = parser.parse_args(argv)
+
+    parameters = load_parameters(args.parameters)
+    names = [name.strip() for name in args.environments.split(",")] if args.environments else list(parameters)
+    unknown = [name for name in names if name not in parameters]
+    if unknown:
+        parser.error(f"Unknown environment(s) {', '.join(unknown)}, expected one of: {', '.join(parameters)}")
+    base = args.base or names[0]
+    if base not in names:
+        parser.error(f"--base {base} is not one of the synthesized environments: {', '.join(names)}")
+    stack_ids = [name.strip() for name in args.stacks.split(",")] if args.stacks else None
+
+    assemblies = synth_environments(parameters, names, args.output, stack_ids, args.workers, nag=not args.no_nag,
+                                    offline=args.offline)
+    summary = summarize(parameters, assemblies, base)
+    # Workers print while synthesizing; the file is the clean copy for tooling
+    with open(os.path.join(args.output, "summary.json"), "w") as file:
+        json.dump(summary, file, indent=2)
+        file.write("\n")
+    print(json.dumps(summary, indent=2) if args.format == "json" else text_summary(summary))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
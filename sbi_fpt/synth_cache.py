@@ -0,0 +1,169 @@
+"""Content-addressed fingerprints of stacks, so deploys skip what did not change.
+
+Two fingerprints are kept per stack, in a state file per environment under a
+local directory or an s3://bucket/prefix (the CDK pipeline's artifact bucket):
+
+- inputs: the stack's parameters.yaml sections, the source of its module and
+  every sbi_fpt module it imports, the files those modules reference
+  (user_data/..., functions/...), the app-wide cdk.json, cdk.context.json,
+  requirements.txt and stack registry, and the inputs of the stacks it
+  depends on (it reads their AMI and subnet ids from SSM at deploy time).
+  Unchanged inputs: the stack is not even synthesized.
+- template: the synthesized template and its asset hashes. Changed inputs with
+  an identical template (a refactor, a comment): synthesized, not deployed.
+
+Fingerprints are only recorded after a successful deploy.
+"""
+import ast
+import hashlib
+import json
+import os
+import subprocess
+import tempfile
+
+# Read by every stack's synth without being imported by its module
+APP_INPUTS = ("app.py", "cdk.json", "cdk.context.json", "requirements.txt", "sbi_fpt/registry.py", "sbi_fpt/synth.py")
+
+
+########### Inputs ##################
+
+def _module_file(module: str, root: str):
+    base = os.path.join(root, *module.split("."))
+    for path in (f"{base}.py", os.path.join(base, "__init__.py")):
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+def source_files(module: str, root: str = ".") -> list:
+    """The module, the sbi_fpt modules it imports (transitively) and the files they reference."""
+    pending = [module]
+    seen = set()
+    files = set()
+
+    while pending:
+        name = pending.pop()
+        path = _module_file(name, root)
+        if not path or path in seen:
+            continue
+        seen.add(path)
+        files.add(path)
+
+        with open(path) as file:
+            tree = ast.parse(file.read(), path)
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                pending += [alias.name for alias in node.names if alias.name.startswith("sbi_fpt")]
+            elif isinstance(node, ast.ImportFrom) and (node.module or "").startswith("sbi_fpt"):
+                pending.append(node.module)
+                # from sbi_fpt.construct import service_dashboard
+                pending += [f"{node.module}.{alias.name}" for alias in node.names]
+            elif isinstance(node, ast.Constant) and isinstance(node.value, str) and "/" in node.value:
+                # Scripts and asset directories read at synth time, relative to the app root
+                referenced = os.path.join(root, node.value)
+                if not node.value.startswith("/") and os.path.exists(referenced):
+                    files.add(referenced)
+
+    return sorted(files)
+
+
+def _hash_path(digest, path: str, root: str) -> None:
+    if os.path.isdir(path):
+        for directory, directories, names in os.walk(path):
+            directories[:] = sorted(name for name in directories if name != "__pycache__")
+            for name in sorted(names):
+                _hash_path(digest, os.path.join(directory, name), root)
+        return
+
+    digest.update(os.path.relpath(path, root).encode() + b"\0")
+    with open(path, "rb") as file:
+        digest.update(hashlib.sha256(file.read()).digest())
+
+
+def input_fingerprint(spec, context: dict, root: str = ".") -> str:
+    from sbi_fpt.registry import STACKS_BY_ID
+
+    keys = spec.context_keys or sorted(context)
+    digest = hashlib.sha256()
+    digest.update(json.dumps({key: context.get(key) for key in keys}, sort_keys=True).encode())
+    for path in [os.path.join(root, name) for name in APP_INPUTS] + source_files(spec.module, root):
+        if os.path.exists(path):
+            _hash_path(digest, path, root)
+    # A new golden AMI or changed subnets reach the stack through SSM, not its own inputs
+    for name in sorted(spec.depends_on):
+        dependency = STACKS_BY_ID[name]
+        if dependency.enabled(context):
+            digest.update(f"{name}:{input_fingerprint(dependency, context, root)}".encode())
+    return digest.hexdigest()
+
+
+########### Outputs ##################
+
+def template_fingerprint(outdir: str, stack_id: str) -> str:
+    with open(os.path.join(outdir, "manifest.json")) as file:
+        artifacts = json.load(file)["artifacts"]
+
+    digest = hashlib.sha256()
+    _hash_path(digest, os.path.join(outdir, artifacts[stack_id]["properties"]["templateFile"]), outdir)
+
+    # Asset ids are the hashes of their sources (Lambda code, scripts)
+    assets = artifacts.get(f"{stack_id}.assets")
+    if assets:
+        with open(os.path.join(outdir, assets["properties"]["file"])) as file:
+            manifest = json.load(file)
+        for kind in ("files", "dockerImages"):
+            for asset_id in sorted(manifest.get(kind, {})):
+                digest.update(f"{kind}:{asset_id}\0".encode())
+
+    return digest.hexdigest()
+
+
+########### State ##################
+
+class SynthCache:
+    """Recorded fingerprints of one environment: {stack_id: {"inputs": ..., "template": ...}}."""
+
+    def __init__(self, location: str, context_name: str, aws: str = "aws"):
+        self.location = location.rstrip("/")
+        self.key = f"{context_name}.json"
+        self.aws = aws
+        self.stacks = {}
+
+    def _s3_copy(self, source: str, target: str) -> bool:
+        return subprocess.run([self.aws, "s3", "cp", "--only-show-errors", source, target],
+                              capture_output=True).returncode == 0
+
+    def load(self) -> "SynthCache":
+        if self.location.startswith("s3://"):
+            with tempfile.TemporaryDirectory() as directory:
+                local = os.path.join(directory, self.key)
+                # Missing on the first run: every stack counts as changed
+                if self._s3_copy(f"{self.location}/{self.key}", local):
+                    with open(local) as file:
+                        self.stacks = json.load(file)
+        elif os.path.exists(os.path.join(self.location, self.key)):
+            with open(os.path.join(self.location, self.key)) as file:
+                self.stacks = json.load(file)
+        return self
+
+    def save(self) -> None:
+        body = json.dumps(self.stacks, indent=2, sort_keys=True) + "\n"
+        if self.location.startswith("s3://"):
+            with tempfile.TemporaryDirectory() as directory:
+                local = os.path.join(directory, self.key)
+                with open(local, "w") as file:
+                    file.write(body)
+                if not self._s3_copy(local, f"{self.location}/{self.key}"):
+                    raise RuntimeError(f"Could not write {self.location}/{self.key}")
+            return
+
+        os.makedirs(self.location, exist_ok=True)
+        with open(os.path.join(self.location, self.key), "w") as file:
+            file.write(body)
+
+    def matches(self, stack_id: str, kind: str, fingerprint: str) -> bool:
+        return self.stacks.get(stack_id, {}).get(kind) == fingerprint
+
+    def record(self, stack_id: str, inputs: str, template: str = None) -> None:
+        recorded = self.stacks.get(stack_id, {})
+        self.stacks[stack_id] = {"inputs": inputs, "template": template or recorded.get("template")}
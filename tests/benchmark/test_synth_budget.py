@@ -0,0 +1,36 @@
+import json
+import os
+
+import pytest
+
+from sbi_fpt.bench import check_budgets, run_benchmark
+from sbi_fpt.registry import STACKS
+from tests.conftest import FIXTURE_CONTEXT, FIXTURE_PARAMETERS, ROOT
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+@pytest.fixture(scope="module")
+def results():
+    return run_benchmark(FIXTURE_PARAMETERS, FIXTURE_CONTEXT, root=ROOT)
+
+
+@pytest.fixture(scope="module")
+def baseline():
+    with open(BASELINE) as file:
+        return json.load(file)
+
+
+@pytest.mark.parametrize("stack_id", [spec.construct_id for spec in STACKS])
+def test_stack_within_budget(stack_id, results, baseline):
+    assert stack_id in baseline["stacks"], "run `python -m sbi_fpt.bench --update-baseline` for new stacks"
+    assert check_budgets({stack_id: results[stack_id]}, baseline) == []
+
+
+def test_budget_flags_regressions_and_cloudformation_limits():
+    reference = {"synthSeconds": 1.0, "nagSeconds": 1.0, "templateBytes": 10_000, "resourceCount": 20}
+    result = {"synthSeconds": 5.0, "nagSeconds": 1.0, "templateBytes": 900_000, "resourceCount": 450}
+
+    violations = check_budgets({"JavaStack": result}, {"stacks": {"JavaStack": reference}})
+
+    assert len(violations) == 5
@@ -0,0 +1,39 @@
+import copy
+import os
+
+import pytest
+
+from sbi_fpt.synth import load_cdk_context, load_parameters, offline_context
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURE_PARAMETERS = os.path.join(ROOT, "tests", "fixtures", "parameters.yaml")
+FIXTURE_CONTEXT = "bench"
+
+
+@pytest.fixture(scope="session")
+def parameters():
+    return load_parameters(FIXTURE_PARAMETERS)
+
+
+@pytest.fixture
+def context(parameters):
+    return copy.deepcopy(parameters[FIXTURE_CONTEXT])
+
+
+@pytest.fixture(scope="session")
+def cdk_context():
+    return load_cdk_context(ROOT)
+
+
+@pytest.fixture
+def template_of(cdk_context):
+    """Template of one registry stack built from the fixture context, offline."""
+    import aws_cdk as cdk
+    import aws_cdk.assertions as assertions
+    from sbi_fpt.registry import build_stacks
+
+    def build(stack_id, context):
+        app = cdk.App(context={**cdk_context, **offline_context(context), "nag": False})
+        return assertions.Template.from_stack(build_stacks(app, context, [stack_id])[stack_id])
+
+    return build
@@ -0,0 +1,71 @@
+import re
+
+from sbi_fpt.alb_logs import ALB_LOG_COLUMNS, ALB_LOG_REGEX
+
+# Sample entry from the ALB access log documentation
+SAMPLE = (
+    'http 2018-07-02T22:23:00.186641Z app/my-loadbalancer/50dc6c495c0c9188 192.168.131.39:2817 10.0.0.1:80 '
+    '0.000 0.001 0.000 200 200 34 366 "GET http://www.example.com:80/ HTTP/1.1" "curl/7.46.0" - - '
+    'arn:aws:elasticloadbalancing:us-east-2:123456789012:targetgroup/my-targets/73e2d6bc24d8a067 '
+    '"Root=1-58337262-36d228ad5d99923122bbe354" "-" "-" 0 2018-07-02T22:22:48.364000Z "forward" "-" "-" '
+    '"10.0.0.1:80" "200" "-" "-" TID_1234abcd5678ef90'
+)
+
+
+def test_regex_matches_documented_entry():
+    fields = dict(zip([column for column, _ in ALB_LOG_COLUMNS], re.fullmatch(ALB_LOG_REGEX, SAMPLE).groups()))
+
+    assert fields["target_ip"] == "10.0.0.1"
+    assert fields["target_processing_time"] == "0.001"
+    assert fields["request_url"] == "http://www.example.com:80/"
+    assert fields["target_status_code_list"] == "200"
+    assert fields["conn_trace_id"] == "TID_1234abcd5678ef90"
+
+
+def test_athena_over_access_logs(context, template_of):
+    template = template_of("JavaStack", context)
+
+    (table,) = template.find_resources("AWS::Glue::Table").values()
+    table_input = table["Properties"]["TableInput"]
+    assert table_input["PartitionKeys"] == [{"Name": "day", "Type": "string"}]
+    assert table_input["Parameters"]["projection.day.format"] == "yyyy/MM/dd"
+    assert table_input["Parameters"]["projection.day.range"] == "2024/01/01,NOW"
+    assert len(table_input["StorageDescriptor"]["Columns"]) == len(ALB_LOG_COLUMNS)
+
+    (workgroup,) = template.find_resources("AWS::Athena::WorkGroup").values()
+    configuration = workgroup["Properties"]["WorkGroupConfiguration"]
+    assert configuration["BytesScannedCutoffPerQuery"] == 10240 * 1024 * 1024
+    assert configuration["EnforceWorkGroupConfiguration"] is True
+
+    queries = template.find_resources("AWS::Athena::NamedQuery")
+    assert len(queries) == 4
+    # Every query is pruned to the requested days
+    assert all("WHERE day BETWEEN ? AND ?" in query["Properties"]["QueryString"] for query in queries.values())
+
+    (log_bucket,) = template.find_resources("AWS::S3::Bucket", {
+        "Properties": {"BucketName": "sbi-fpt-bench-alb-log"},
+    }).values()
+    (rule,) = log_bucket["Properties"]["LifecycleConfiguration"]["Rules"]
+    assert [transition["StorageClass"] for transition in rule["Transitions"]] == ["STANDARD_IA", "GLACIER_IR"]
+    assert rule["ExpirationInDays"] == 365
+    assert "NoncurrentVersionExpiration" not in rule
+
+
+def test_access_logs_kept_without_expiration_days(context, template_of):
+    del context["java"]["accessLogs"]["expirationDays"]
+    template = template_of("JavaStack", context)
+
+    (log_bucket,) = template.find_resources("AWS::S3::Bucket", {
+        "Properties": {"BucketName": "sbi-fpt-bench-alb-log"},
+    }).values()
+    (rule,) = log_bucket["Properties"]["LifecycleConfiguration"]["Rules"]
+    assert "ExpirationInDays" not in rule
+    assert len(rule["Transitions"]) == 2
+
+
+def test_access_logs_without_analytics(context, template_of):
+    del context["java"]["accessLogs"]
+    template = template_of("JavaStack", context)
+
+    template.resource_count_is("AWS::Glue::Table", 0)
+    template.resource_count_is("AWS::Athena::WorkGroup", 0)
@@ -0,0 +1,136 @@
+import gzip
+import json
+import os
+import stat
+import sys
+
+import pytest
+
+from sbi_fpt.alb_logs import LatencyHistogram, LogStats, analyze, list_sources, main, normalize_path
+
+
+def log_line(time, url, target_seconds, status=200, target="10.0.0.1:8080"):
+    return (
+        f'http {time} app/sbi-fpt-dev-alb/50dc6c495c0c9188 192.168.131.39:2817 {target} '
+        f'0.001 {target_seconds} 0.000 {status} {status if target != "-" else "-"} 34 366 '
+        f'"GET http://example.com:80{url} HTTP/1.1" "curl/8.5.0" - - '
+        'arn:aws:elasticloadbalancing:ap-southeast-1:123456789012:targetgroup/tg/73e2d6bc24d8a067 '
+        '"Root=1-58337262-36d228ad5d99923122bbe354" "-" "-" 0 2024-05-01T10:00:00.000000Z "forward" "-" "-" '
+        f'"{target}" "{status}" "-" "-" TID_1234abcd5678ef90\n'
+    )
+
+
+# Stand-in for the AWS CLI: s3://<bucket>/<key> is the file <FAKE_S3_ROOT>/<bucket>/<key>
+FAKE_AWS = f"""#!{sys.executable}
+import json, os, shutil, sys
+
+root, args = os.environ["FAKE_S3_ROOT"], sys.argv[1:]
+if args[:2] == ["s3api", "list-objects-v2"]:
+    bucket, prefix = args[args.index("--bucket") + 1], args[args.index("--prefix") + 1]
+    keys = sorted(os.path.relpath(os.path.join(directory, name), os.path.join(root, bucket))
+                  for directory, _, names in os.walk(os.path.join(root, bucket)) for name in names)
+    print(json.dumps([key for key in keys if key.startswith(prefix)] or None))
+elif args[:2] == ["s3", "cp"]:
+    path = os.path.join(root, args[-2][len("s3://"):])
+    if not os.path.exists(path):
+        sys.exit("download failed: (404) Not Found")
+    with open(path, "rb") as file:
+        shutil.copyfileobj(file, sys.stdout.buffer)
+"""
+
+
+def write_log(path, lines):
+    with gzip.open(path, "wt") as file:
+        file.writelines(lines)
+
+
+def test_histogram_percentiles_and_merge():
+    first, second = LatencyHistogram(), LatencyHistogram()
+    for millis in range(1, 51):
+        first.record(millis / 1000)
+    for millis in range(51, 101):
+        second.record(millis / 1000)
+
+    merged = LatencyHistogram().merge(first).merge(second)
+    assert merged.count == 100
+    # Buckets keep 7 significant bits: within 1% of the exact value
+    assert abs(merged.percentile(50) - 0.050) <= 0.0005
+    assert abs(merged.percentile(99) - 0.099) <= 0.001
+    assert merged.summary()["max"] <= 0.100
+
+
+def test_normalize_path():
+    assert normalize_path("http://example.com:80/orders/12345?page=2") == "/orders/{id}"
+    assert normalize_path("https://example.com:443/users/0f8fad5b-d9cb-469f-a165-70867728950e/cart") == "/users/{id}/cart"
+    assert normalize_path("http://example.com:80") == "/"
+
+
+def test_stats_by_path_target_and_minute():
+    stats = LogStats(top=2)
+    stats.add_line(log_line("2024-05-01T10:00:01.000000Z", "/orders/1", 0.100))
+    stats.add_line(log_line("2024-05-01T10:00:02.000000Z", "/orders/2", 0.300, target="10.0.0.2:8080"))
+    stats.add_line(log_line("2024-05-01T10:01:00.000000Z", "/health", 0.002))
+    # Target unreachable: counted, but no target timing
+    stats.add_line(log_line("2024-05-01T10:01:30.000000Z", "/orders/3", -1, status=502, target="-"))
+    stats.add_line("not an access log line\n")
+
+    report = stats.to_dict()
+    assert report["records"] == 4
+    assert report["unparsed"] == 1
+    assert report["status"] == {"200": 3, "502": 1}
+    assert report["paths"]["/orders/{id}"]["status"] == {"200": 2, "502": 1}
+    assert report["paths"]["/orders/{id}"]["target"]["count"] == 2
+    assert set(report["targets"]) == {"10.0.0.1:8080", "10.0.0.2:8080"}
+    assert set(report["minutes"]) == {"2024-05-01T10:00", "2024-05-01T10:01"}
+    assert [entry["url"] for entry in report["slowest"]] == [
+        "http://example.com:80/orders/2", "http://example.com:80/orders/1"]
+
+
+def test_process_pool_matches_single_process(tmp_path):
+    day = tmp_path / "AWSLogs" / "123456789012" / "elasticloadbalancing" / "ap-southeast-1" / "2024" / "05" / "01"
+    day.mkdir(parents=True)
+    # More files than the two per worker analyze keeps in flight
+    for index in range(6):
+        write_log(day / f"part{index}.log.gz", [
+            log_line(f"2024-05-01T10:0{index}:00.000000Z", f"/items/{n}", n / 1000) for n in range(1, 200)
+        ])
+
+    sources = list_sources(str(tmp_path))
+    assert len(sources) == 6
+    pooled = analyze(sources, workers=2).to_dict()
+    assert pooled == analyze(sources, workers=1).to_dict()
+    assert pooled["records"] == 1194
+    assert pooled["paths"]["/items/{id}"]["target"]["count"] == 1194
+
+
+def test_cli_json_output(tmp_path, capsys):
+    write_log(tmp_path / "one.log.gz", [log_line("2024-05-01T10:00:00.000000Z", "/", 0.010)])
+
+    assert main([str(tmp_path), "--format", "json", "--workers", "1"]) == 0
+    assert json.loads(capsys.readouterr().out)["records"] == 1
+
+    assert main([str(tmp_path / "empty")]) == 1
+
+
+def test_streams_from_s3_through_the_aws_cli(tmp_path, monkeypatch, capsys):
+    aws = tmp_path / "aws"
+    aws.write_text(FAKE_AWS)
+    aws.chmod(aws.stat().st_mode | stat.S_IEXEC)
+    day = tmp_path / "s3" / "alb-log" / "AWSLogs" / "2024" / "05" / "01"
+    day.mkdir(parents=True)
+    for index in range(3):
+        write_log(day / f"part{index}.log.gz", [log_line("2024-05-01T10:00:00.000000Z", f"/items/{index}", 0.010)])
+    (day / "digest.json").write_text("{}")
+    monkeypatch.setenv("FAKE_S3_ROOT", str(tmp_path / "s3"))
+
+    assert list_sources("s3://alb-log/AWSLogs/2024/05/01/", str(aws)) == [
+        f"s3://alb-log/AWSLogs/2024/05/01/part{index}.log.gz" for index in range(3)]
+    assert list_sources("s3://alb-log/AWSLogs/2023/", str(aws)) == []
+
+    assert main(["s3://alb-log/AWSLogs/2024/", "--format", "json", "--workers", "2", "--aws", str(aws)]) == 0
+    report = json.loads(capsys.readouterr().out)
+    assert report["files"] == 3 and report["records"] == 3
+
+    os.remove(day / "part1.log.gz")
+    with pytest.raises(RuntimeError, match="404"):
+        analyze(["s3://alb-log/AWSLogs/2024/05/01/part1.log.gz"], workers=1, aws=str(aws))
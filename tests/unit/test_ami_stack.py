@@ -0,0 +1,44 @@
+import aws_cdk as core
+import aws_cdk.assertions as assertions
+import yaml
+
+from sbi_fpt.registry import build_stacks
+
+
+def test_golden_ami_baked_and_published(context, template_of):
+    template = template_of("GoldenAmiStack", context)
+
+    (component,) = template.find_resources("AWS::ImageBuilder::Component").values()
+    document = yaml.safe_load(component["Properties"]["Data"])
+    with open("user_data/user_data.sh") as file:
+        assert file.read() in document["phases"][0]["steps"][0]["inputs"]["commands"]
+
+    template.has_resource_properties("AWS::ImageBuilder::ImageRecipe", {
+        "Version": "1.0.0",
+        "ParentImage": "ami-0b27123918631e63f",
+    })
+    template.resource_count_is("AWS::ImageBuilder::Image", 1)
+    template.has_resource_properties("AWS::SSM::Parameter", {
+        "Name": "/sbi-fpt/bench/java/ami",
+        "DataType": "aws:ec2:image",
+        "Value": {"Fn::GetAtt": [assertions.Match.any_value(), "ImageId"]},
+    })
+
+
+def test_java_launch_template_resolves_golden_ami(context, template_of):
+    template = template_of("JavaStack", context)
+
+    parameters = template.find_parameters("*", {"Default": "/sbi-fpt/bench/java/ami"})
+    (parameter,) = parameters.values()
+    assert parameter["Type"] == "AWS::SSM::Parameter::Value<AWS::EC2::Image::Id>"
+
+
+def test_golden_ami_stack_is_optional(context, cdk_context):
+    del context["java"]["goldenAmi"]
+    app = core.App(context={**cdk_context, "nag": False})
+
+    stacks = build_stacks(app, context, ["GoldenAmiStack", "JavaStack"])
+
+    assert list(stacks) == ["JavaStack"]
+    template = assertions.Template.from_stack(stacks["JavaStack"])
+    assert template.find_parameters("*", {"Default": "/sbi-fpt/bench/java/ami"}) == {}
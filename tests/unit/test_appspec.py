@@ -0,0 +1,121 @@
+import importlib.util
+import shutil
+import subprocess
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import aws_cdk.assertions as assertions
+import pytest
+
+from sbi_fpt.stack.appspec import package_build_spec, warm_up_requests, warm_up_settings
+
+
+def load_merge_appspec():
+    spec = importlib.util.spec_from_file_location("merge_appspec", "codedeploy/merge_appspec.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_merge_keeps_application_hooks():
+    merge_appspec = load_merge_appspec()
+    appspec = {
+        "version": 0.0,
+        "os": "linux",
+        "hooks": {"ValidateService": [{"location": "scripts/check.sh", "timeout": 60}]},
+    }
+
+    merged = merge_appspec.merge(appspec, "scripts/sbi-fpt/warm_up.sh", 900)
+    merged = merge_appspec.merge(merged, "scripts/sbi-fpt/warm_up.sh", 900)
+
+    assert merged["hooks"]["ValidateService"] == [
+        {"location": "scripts/check.sh", "timeout": 60},
+        {"location": "scripts/sbi-fpt/warm_up.sh", "timeout": 900, "runas": "root"},
+    ]
+    assert merge_appspec.merge(None, "warm_up.sh", 60)["os"] == "linux"
+
+
+def test_warm_up_requests_default_to_get():
+    assert warm_up_requests({"requests": ["/", "post /api/login"]}) == "GET /\nPOST /api/login"
+    assert warm_up_requests({}) == "GET /"
+    for requests in ([], ["", "  "]):
+        with pytest.raises(ValueError, match="at least one request"):
+            package_build_spec({"requests": requests})
+
+
+def run_warm_up(tmp_path, status, requests=None):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(status)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        shutil.copy("codedeploy/warm_up.sh", tmp_path)
+        # As the buildspec heredocs write them, newline-terminated
+        (tmp_path / "warm_up.env").write_text(warm_up_settings(
+            {"roundRequests": 8, "concurrency": 4, "maxRounds": 4, "settleRounds": 2, "tolerancePercent": 100000},
+            app_port=server.server_address[1]) + "\n")
+        (tmp_path / "warm_up_requests.txt").write_text(requests or warm_up_requests({"requests": ["/"]}) + "\n")
+        return subprocess.run(["bash", str(tmp_path / "warm_up.sh")], capture_output=True, text=True, timeout=60)
+    finally:
+        server.shutdown()
+
+
+@pytest.mark.skipif(not shutil.which("curl"), reason="needs curl")
+def test_warm_up_ignores_error_responses(tmp_path):
+    failing = run_warm_up(tmp_path, 500)
+    assert failing.returncode == 1
+    assert "8 of 8 requests failed (status 500 x8), not settled" in failing.stdout
+    assert "Warm-up converged" not in failing.stdout
+
+    healthy = run_warm_up(tmp_path, 200)
+    assert healthy.returncode == 0
+    assert "0 of 8 failed" in healthy.stdout and "Warm-up converged" in healthy.stdout
+
+
+@pytest.mark.skipif(not shutil.which("curl"), reason="needs curl")
+def test_warm_up_fails_fast_without_requests(tmp_path):
+    empty = run_warm_up(tmp_path, 200, requests="# edited by hand\n\n")
+    assert empty.returncode == 1
+    assert "No requests in" in empty.stdout
+
+    # A last line without a newline still counts
+    unterminated = run_warm_up(tmp_path, 200, requests="GET /")
+    assert unterminated.returncode == 0
+
+
+def test_hook_timeout_limit():
+    with pytest.raises(ValueError):
+        package_build_spec({"timeoutSeconds": 7200})
+
+
+def test_package_stage_before_deploy(context, template_of):
+    template = template_of("PipelineJavaStack", context)
+
+    template.has_resource_properties("AWS::CodePipeline::Pipeline", {
+        "Stages": assertions.Match.array_with([
+            assertions.Match.object_like({"Name": "Build"}),
+            assertions.Match.object_like({
+                "Name": "Package",
+                "Actions": [assertions.Match.object_like({
+                    "InputArtifacts": [{"Name": "BuildArtifact"}],
+                    "OutputArtifacts": [{"Name": "DeployArtifact"}],
+                })],
+            }),
+            assertions.Match.object_like({
+                "Name": "deploy",
+                "Actions": [assertions.Match.object_like({"InputArtifacts": [{"Name": "DeployArtifact"}]})],
+            }),
+        ]),
+    })
+    template.has_resource_properties("AWS::CodeBuild::Project", {
+        "Source": assertions.Match.object_like({
+            "BuildSpec": assertions.Match.string_like_regexp("scripts/sbi-fpt/warm_up.sh 900"),
+        }),
+    })
@@ -0,0 +1,64 @@
+import aws_cdk.assertions as assertions
+import pytest
+
+
+def test_replication_group_in_private_subnets(context, template_of):
+    template = template_of("CacheStack", context)
+
+    template.has_resource_properties("AWS::ElastiCache::ReplicationGroup", {
+        "Engine": "valkey",
+        "CacheNodeType": "cache.t4g.micro",
+        "ClusterMode": "disabled",
+        "ReplicasPerNodeGroup": 1,
+        "MultiAZEnabled": True,
+        "TransitEncryptionEnabled": True,
+    })
+    template.has_resource_properties("AWS::ElastiCache::SubnetGroup", {
+        "SubnetIds": assertions.Match.any_value(),
+    })
+    template.has_resource_properties("AWS::EC2::SecurityGroup", {
+        "SecurityGroupIngress": [assertions.Match.object_like({
+            "SourceSecurityGroupId": "sg-084571521e53cacd0",
+            "FromPort": 6379,
+        })],
+    })
+    template.has_resource_properties("AWS::SSM::Parameter", {
+        "Name": "/sbi-fpt-dev-java/cache/endpoint",
+        "Value": {"Fn::GetAtt": ["ReplicationGroup", "PrimaryEndPoint.Address"]},
+    })
+
+
+def test_cluster_mode_with_shards(context, template_of):
+    context["java"]["cache"]["shards"] = 3
+    template = template_of("CacheStack", context)
+
+    template.has_resource_properties("AWS::ElastiCache::ReplicationGroup", {
+        "ClusterMode": "enabled",
+        "NumNodeGroups": 3,
+        "CacheParameterGroupName": "default.valkey8.cluster.on",
+    })
+    template.has_resource_properties("AWS::SSM::Parameter", {
+        "Name": "/sbi-fpt-dev-java/cache/endpoint",
+        "Value": {"Fn::GetAtt": ["ReplicationGroup", "ConfigurationEndPoint.Address"]},
+    })
+
+
+def test_unknown_engine(context, template_of):
+    context["java"]["cache"]["engine"] = "memcached"
+
+    with pytest.raises(ValueError):
+        template_of("CacheStack", context)
+
+
+def test_build_reads_cache_endpoint(context, template_of):
+    template = template_of("PipelineJavaStack", context)
+
+    template.has_resource_properties("AWS::CodeBuild::Project", {
+        "Environment": assertions.Match.object_like({
+            "EnvironmentVariables": assertions.Match.array_with([{
+                "Name": "CACHE_ENDPOINT",
+                "Type": "PARAMETER_STORE",
+                "Value": "/sbi-fpt-dev-java/cache/endpoint",
+            }]),
+        }),
+    })
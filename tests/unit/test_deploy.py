@@ -0,0 +1,95 @@
+import json
+import threading
+import time
+
+import pytest
+
+from sbi_fpt.deploy import deploy_all, deploy_order, main, read_assembly
+
+
+def write_assembly(outdir, templates):
+    artifacts = {}
+    for stack_id, template in templates.items():
+        (outdir / f"{stack_id}.template.json").write_text(json.dumps(template))
+        artifacts[stack_id] = {
+            "type": "aws:cloudformation:stack",
+            "properties": {"templateFile": f"{stack_id}.template.json", "stackName": f"sbi-fpt-dev-{stack_id}"},
+            "dependencies": [f"{stack_id}.assets"],
+        }
+    (outdir / "manifest.json").write_text(json.dumps({"artifacts": artifacts}))
+
+
+@pytest.fixture
+def assembly(tmp_path):
+    write_assembly(tmp_path, {
+        "SbiFptStack": {"Outputs": {"VpcId": {"Value": "vpc", "Export": {"Name": "sbi-fpt-dev-vpcId"}}}},
+        "JavaStack": {"Outputs": {"asgname": {"Value": "asg", "Export": {"Name": "asgname"}}}},
+        "PipelineJavaStack": {"Resources": {"Group": {"Properties": {"AutoScalingGroups": [{"Fn::ImportValue": "asgname"}]}}}},
+        "PipelineCDKStack": {"Resources": {}},
+    })
+    return str(tmp_path)
+
+
+def test_dependencies_from_imports_and_registry(assembly):
+    stacks = read_assembly(assembly)
+
+    assert stacks["SbiFptStack"]["dependencies"] == set()
+    assert stacks["JavaStack"]["dependencies"] == {"SbiFptStack"}
+    assert stacks["PipelineJavaStack"]["dependencies"] == {"JavaStack"}
+    assert stacks["PipelineCDKStack"]["dependencies"] == set()
+    assert deploy_order(stacks) == ["SbiFptStack", "JavaStack", "PipelineJavaStack", "PipelineCDKStack"]
+
+
+def test_cycle_is_rejected():
+    stacks = {"A": {"dependencies": {"B"}}, "B": {"dependencies": {"A"}}}
+
+    with pytest.raises(ValueError):
+        deploy_order(stacks)
+
+
+def test_independent_stacks_deploy_concurrently(assembly):
+    stacks = read_assembly(assembly)
+    lock = threading.Lock()
+    active, started, peak = set(), [], [0]
+
+    def run(stack_id):
+        with lock:
+            assert stacks[stack_id]["dependencies"] <= set(started) - active
+            active.add(stack_id)
+            started.append(stack_id)
+            peak[0] = max(peak[0], len(active))
+        time.sleep(0.05)
+        with lock:
+            active.discard(stack_id)
+
+    results = deploy_all(stacks, run, concurrency=2)
+
+    assert set(results.values()) == {"deployed"}
+    assert peak[0] == 2
+    assert started.index("PipelineCDKStack") < started.index("JavaStack")
+
+
+def test_failure_skips_dependents_only(assembly):
+    stacks = read_assembly(assembly)
+
+    def run(stack_id):
+        if stack_id == "JavaStack":
+            raise RuntimeError("boom")
+
+    results = deploy_all(stacks, run, concurrency=1)
+
+    assert results == {
+        "SbiFptStack": "deployed",
+        "JavaStack": "failed",
+        "PipelineJavaStack": "skipped",
+        "PipelineCDKStack": "deployed",
+    }
+
+
+def test_concurrency_below_one(assembly, capsys):
+    # Deploys one at a time instead of never submitting anything
+    assert set(deploy_all(read_assembly(assembly), lambda stack_id: None, concurrency=0).values()) == {"deployed"}
+
+    with pytest.raises(SystemExit):
+        main(["--context", "dev", "--concurrency", "0", "--output", assembly, "--dry-run"])
+    assert "--concurrency must be at least 1" in capsys.readouterr().err
@@ -0,0 +1,44 @@
+import aws_cdk.assertions as assertions
+import pytest
+
+
+def test_distribution_in_front_of_alb(context, template_of):
+    template = template_of("EdgeStack", context)
+
+    template.has_resource_properties("AWS::CloudFront::Distribution", {
+        "DistributionConfig": assertions.Match.object_like({
+            "HttpVersion": "http2and3",
+            "Logging": assertions.Match.object_like({"Prefix": "cloudfront"}),
+            "Origins": assertions.Match.array_with([assertions.Match.object_like({
+                "DomainName": {"Fn::ImportValue": "loadbalancerdns"},
+                "OriginShield": {"Enabled": True, "OriginShieldRegion": "ap-southeast-1"},
+                "CustomOriginConfig": assertions.Match.object_like({"OriginKeepaliveTimeout": 60}),
+            })]),
+            "DefaultCacheBehavior": assertions.Match.object_like({"Compress": True}),
+        }),
+    })
+    # Default and /static/* get cache policies, /api/* uses the managed CachingDisabled
+    template.resource_count_is("AWS::CloudFront::CachePolicy", 2)
+    template.has_resource_properties("AWS::CloudFront::CachePolicy", {
+        "CachePolicyConfig": assertions.Match.object_like({
+            "DefaultTTL": 86400,
+            "ParametersInCacheKeyAndForwardedToOrigin": assertions.Match.object_like({
+                "EnableAcceptEncodingBrotli": True,
+                "EnableAcceptEncodingGzip": True,
+            }),
+        }),
+    })
+    template.resource_count_is("AWS::CloudFront::OriginAccessControl", 1)
+
+
+def test_static_behavior_needs_static_bucket(context, template_of):
+    context["java"]["edge"]["staticBucket"] = False
+
+    with pytest.raises(ValueError):
+        template_of("EdgeStack", context)
+
+
+def test_java_stack_exports_alb_dns(context, template_of):
+    template = template_of("JavaStack", context)
+
+    template.has_output("loadbalancerdns", {"Export": {"Name": "loadbalancerdns"}})
@@ -0,0 +1,108 @@
+import json
+
+import aws_cdk.assertions as assertions
+
+
+def test_predictive_scaling_reapplied_after_deploy(context, template_of):
+    template = template_of("PipelineJavaStack", context)
+
+    template.has_resource_properties("AWS::Events::Rule", {
+        "EventPattern": assertions.Match.object_like({
+            "source": ["aws.codedeploy"],
+            "detail": assertions.Match.object_like({"state": ["SUCCESS"]}),
+        }),
+    })
+    (function,) = [
+        function for function in template.find_resources("AWS::Lambda::Function").values()
+        if "POLICIES" in function["Properties"].get("Environment", {}).get("Variables", {})
+    ]
+    policies = json.loads(function["Properties"]["Environment"]["Variables"]["POLICIES"])
+    assert policies[0]["name"] == "sbi-fpt-bench-PredictiveScaling"
+    assert policies[0]["configuration"]["Mode"] == "ForecastOnly"
+
+
+def test_no_predictive_sync_without_predictive_policy(context, template_of):
+    context["java"]["scaling"]["policies"] = [
+        policy for policy in context["java"]["scaling"]["policies"] if policy["type"] != "predictive"
+    ]
+    template = template_of("PipelineJavaStack", context)
+
+    template.resource_count_is("AWS::Events::Rule", 0)
+
+
+def test_build_project_cache_and_compute(context, template_of):
+    template = template_of("PipelineJavaStack", context)
+
+    template.has_resource_properties("AWS::CodeBuild::Project", {
+        "Cache": {
+            "Type": "S3",
+            "Location": assertions.Match.any_value(),
+        },
+        "Environment": assertions.Match.object_like({
+            "ComputeType": "BUILD_GENERAL1_MEDIUM",
+            "Image": "aws/codebuild/standard:7.0",
+        }),
+    })
+
+
+def test_build_project_local_cache_and_prebuilt_image(context, template_of):
+    context["java"]["build"] = {
+        "prebuiltImage": {"repository": "sbi-fpt-java-build", "tag": "jdk21"},
+        "cache": {"type": "local", "modes": ["SOURCE", "CUSTOM"]},
+    }
+    template = template_of("PipelineJavaStack", context)
+
+    template.has_resource_properties("AWS::CodeBuild::Project", {
+        "Cache": {"Type": "LOCAL", "Modes": ["LOCAL_SOURCE_CACHE", "LOCAL_CUSTOM_CACHE"]},
+        "Environment": assertions.Match.object_like({
+            "ComputeType": "BUILD_GENERAL1_SMALL",
+            "Image": {"Fn::Join": ["", assertions.Match.array_with(["/sbi-fpt-java-build:jdk21"])]},
+            "ImagePullCredentialsType": "SERVICE_ROLE",
+        }),
+    })
+
+
+def deployment_style_calls(template):
+    (resource,) = template.find_resources("Custom::AWS").values()
+    return resource["Properties"]["Create"], resource["Properties"]["Update"]
+
+
+def test_rollout_config_from_parameters(context, template_of):
+    template = template_of("PipelineJavaStack", context)
+
+    template.has_resource_properties("AWS::CodeDeploy::DeploymentGroup", {
+        "DeploymentConfigName": "CodeDeployDefault.HalfAtATime",
+    })
+    create, update = deployment_style_calls(template)
+    assert "CodeDeployDefault.HalfAtATime" in str(create)
+    assert "CodeDeployDefault.HalfAtATime" in str(update)
+    # Only the first call points the group at JavaStack's ASG
+    assert "autoScalingGroups" in str(create)
+    assert "autoScalingGroups" not in str(update)
+
+
+def test_custom_rollout_with_alarm_rollback(context, template_of):
+    del context["java"]["monitoring"]
+    context["java"]["deployment"] = {
+        "config": "custom",
+        "minimumHealthyHostsPercent": 75,
+        "readyAction": "STOP_DEPLOYMENT",
+        "readyWaitMinutes": 30,
+        "terminationWaitMinutes": 15,
+        "rollbackAlarms": ["sbi-fpt-bench-java-5xx"],
+    }
+    template = template_of("PipelineJavaStack", context)
+
+    template.has_resource_properties("AWS::CodeDeploy::DeploymentConfig", {
+        "MinimumHealthyHosts": {"Type": "FLEET_PERCENT", "Value": 75},
+    })
+    template.has_resource_properties("AWS::CodeDeploy::DeploymentGroup", {
+        "AlarmConfiguration": {"Alarms": [{"Name": "sbi-fpt-bench-java-5xx"}], "Enabled": True},
+        "AutoRollbackConfiguration": {
+            "Enabled": True,
+            "Events": ["DEPLOYMENT_FAILURE", "DEPLOYMENT_STOP_ON_ALARM"],
+        },
+    })
+    _, update = deployment_style_calls(template)
+    assert '\\"waitTimeInMinutes\\":30' in json.dumps(update)
+    assert '\\"terminationWaitTimeInMinutes\\":15' in json.dumps(update)
@@ -0,0 +1,233 @@
+import pytest
+import aws_cdk.assertions as assertions
+
+
+def test_scaling_policies_from_parameters(context, template_of):
+    template = template_of("JavaStack", context)
+
+    template.has_resource_properties("AWS::AutoScaling::AutoScalingGroup", {"MinSize": "1", "MaxSize": "2"})
+    template.has_resource_properties("AWS::AutoScaling::ScalingPolicy", {
+        "PolicyType": "TargetTrackingScaling",
+        "TargetTrackingConfiguration": assertions.Match.object_like({
+            "PredefinedMetricSpecification": assertions.Match.object_like({
+                "PredefinedMetricType": "ALBRequestCountPerTarget",
+            }),
+            "TargetValue": 600,
+        }),
+    })
+    template.has_resource_properties("AWS::AutoScaling::ScalingPolicy", {"PolicyType": "StepScaling"})
+    template.has_resource_properties("AWS::CloudWatch::Alarm", {
+        "MetricName": "TargetResponseTime",
+        "ExtendedStatistic": "p99",
+    })
+    template.resource_count_is("AWS::AutoScaling::ScheduledAction", 2)
+    template.has_resource_properties("AWS::AutoScaling::ScheduledAction", {
+        "Recurrence": "30 7 * * MON-FRI",
+        "TimeZone": "Asia/Ho_Chi_Minh",
+        "MinSize": 2,
+    })
+
+
+def test_default_scaling_is_cpu_only(context, template_of):
+    del context["java"]["scaling"]
+    template = template_of("JavaStack", context)
+
+    template.resource_count_is("AWS::AutoScaling::ScalingPolicy", 1)
+    template.has_resource_properties("AWS::AutoScaling::ScalingPolicy", {
+        "TargetTrackingConfiguration": assertions.Match.object_like({
+            "PredefinedMetricSpecification": {"PredefinedMetricType": "ASGAverageCPUUtilization"},
+            "TargetValue": 70,
+        }),
+    })
+
+
+def test_predictive_scaling_policy(context, template_of):
+    template = template_of("JavaStack", context)
+
+    template.has_resource_properties("AWS::AutoScaling::ScalingPolicy", {
+        "PolicyType": "PredictiveScaling",
+        "PredictiveScalingConfiguration": {
+            "MetricSpecifications": [{
+                "TargetValue": 60,
+                "PredefinedMetricPairSpecification": {"PredefinedMetricType": "ASGCPUUtilization"},
+            }],
+            "Mode": "ForecastOnly",
+            "SchedulingBufferTime": 600,
+            "MaxCapacityBreachBehavior": "HonorMaxCapacity",
+        },
+    })
+
+
+def test_warm_pool_with_launch_lifecycle_hook(context, template_of):
+    template = template_of("JavaStack", context)
+
+    template.has_resource_properties("AWS::AutoScaling::WarmPool", {
+        "MinSize": 1,
+        "MaxGroupPreparedCapacity": 2,
+        "PoolState": "Stopped",
+        "InstanceReusePolicy": {"ReuseOnScaleIn": True},
+    })
+    template.has_resource_properties("AWS::AutoScaling::LifecycleHook", {
+        "LifecycleHookName": "sbi-fpt-bench-launch-hook",
+        "LifecycleTransition": "autoscaling:EC2_INSTANCE_LAUNCHING",
+        "HeartbeatTimeout": 1020,
+    })
+    (launch_template,) = template.find_resources("AWS::EC2::LaunchTemplate").values()
+    user_data = str(launch_template["Properties"]["LaunchTemplateData"]["UserData"])
+    assert "LIFECYCLE_HOOK_NAME=sbi-fpt-bench-launch-hook" in user_data
+    assert "complete-lifecycle-action" in user_data
+
+
+def test_hibernated_warm_pool_encrypts_root_volume(context, template_of):
+    context["java"]["warmPool"]["poolState"] = "Hibernated"
+    template = template_of("JavaStack", context)
+
+    template.has_resource_properties("AWS::EC2::LaunchTemplate", {
+        "LaunchTemplateData": assertions.Match.object_like({
+            "HibernationOptions": {"Configured": True},
+            "BlockDeviceMappings": [assertions.Match.object_like({
+                "Ebs": assertions.Match.object_like({"Encrypted": True}),
+            })],
+        }),
+    })
+
+
+def mixed_instances(context):
+    del context["java"]["warmPool"]
+    del context["java"]["loadBalancer"]["deregistrationDelaySeconds"]
+    context["java"]["instances"] = {
+        "architectures": {
+            "x86_64": {"instanceTypes": ["m6i.large", "m5.large"]},
+            "arm64": {"ami": "ami-0123456789abcdef0", "instanceTypes": ["m7g.large"]},
+        },
+        "onDemandBaseCapacity": 1,
+        "onDemandPercentageAboveBaseCapacity": 25,
+        "spotAllocationStrategy": "capacity-optimized",
+    }
+    return context
+
+
+def test_mixed_instances_with_graviton(context, template_of):
+    template = template_of("JavaStack", mixed_instances(context))
+
+    template.resource_count_is("AWS::EC2::LaunchTemplate", 2)
+    template.has_resource_properties("AWS::AutoScaling::AutoScalingGroup", {
+        "CapacityRebalance": True,
+        "MixedInstancesPolicy": {
+            "LaunchTemplate": {
+                "LaunchTemplateSpecification": assertions.Match.any_value(),
+                "Overrides": [
+                    {"InstanceType": "m6i.large"},
+                    {"InstanceType": "m5.large"},
+                    {"InstanceType": "m7g.large", "LaunchTemplateSpecification": assertions.Match.any_value()},
+                ],
+            },
+            "InstancesDistribution": {
+                "OnDemandAllocationStrategy": "prioritized",
+                "OnDemandBaseCapacity": 1,
+                "OnDemandPercentageAboveBaseCapacity": 25,
+                "SpotAllocationStrategy": "capacity-optimized",
+            },
+        },
+    })
+    template.has_resource_properties("AWS::ElasticLoadBalancingV2::TargetGroup", {
+        "TargetGroupAttributes": assertions.Match.array_with([
+            {"Key": "deregistration_delay.timeout_seconds", "Value": "90"},
+        ]),
+    })
+    template.has_resource_properties("AWS::Events::Rule", {
+        "EventPattern": {"source": ["aws.ec2"], "detail-type": ["EC2 Spot Instance Interruption Warning"]},
+    })
+
+
+def test_mixed_instances_reject_wrong_architecture(context, template_of):
+    mixed_instances(context)["java"]["instances"]["architectures"]["arm64"]["instanceTypes"] = ["m6i.large"]
+
+    with pytest.raises(ValueError):
+        template_of("JavaStack", context)
+
+
+def test_mixed_instances_exclude_warm_pool(context, template_of):
+    context["java"]["instances"] = {"architectures": {"x86_64": {"instanceTypes": ["m6i.large"]}}}
+
+    with pytest.raises(ValueError):
+        template_of("JavaStack", context)
+
+
+def test_load_balancer_attributes_from_parameters(context, template_of):
+    template = template_of("JavaStack", context)
+
+    (target_group,) = template.find_resources("AWS::ElasticLoadBalancingV2::TargetGroup").values()
+    assert target_group["Properties"]["ProtocolVersion"] == "HTTP1"
+    assert target_group["Properties"]["HealthCheckIntervalSeconds"] == 15
+    attributes = {item["Key"]: item["Value"] for item in target_group["Properties"]["TargetGroupAttributes"]}
+    assert attributes["slow_start.duration_seconds"] == "120"
+    assert attributes["deregistration_delay.timeout_seconds"] == "30"
+    assert attributes["load_balancing.algorithm.type"] == "round_robin"
+    assert attributes["load_balancing.cross_zone.enabled"] == "true"
+    template.has_resource_properties("AWS::ElasticLoadBalancingV2::LoadBalancer", {
+        "LoadBalancerAttributes": assertions.Match.array_with([
+            {"Key": "idle_timeout.timeout_seconds", "Value": "60"},
+        ]),
+    })
+    (launch_template,) = template.find_resources("AWS::EC2::LaunchTemplate").values()
+    assert 'keepAliveTimeout="65000"' in launch_template["Properties"]["LaunchTemplateData"]["UserData"]["Fn::Base64"]
+
+
+def test_load_balancer_rejects_invalid_combinations(context, template_of):
+    context["java"]["loadBalancer"]["algorithm"] = "least_outstanding_requests"
+    with pytest.raises(ValueError):
+        template_of("JavaStack", context)
+
+    del context["java"]["loadBalancer"]["slowStartSeconds"]
+    context["java"]["loadBalancer"]["protocolVersion"] = "HTTP2"
+    with pytest.raises(ValueError):
+        template_of("JavaStack", context)
+
+
+def test_http2_targets_behind_https_listener(context, template_of):
+    context["java"]["loadBalancer"].update({
+        "algorithm": "least_outstanding_requests",
+        "slowStartSeconds": 0,
+        "protocolVersion": "HTTP2",
+        "certificateArn": "arn:aws:acm:ap-southeast-1:111111111111:certificate/example",
+    })
+    template = template_of("JavaStack", context)
+
+    template.has_resource_properties("AWS::ElasticLoadBalancingV2::Listener", {"Port": 443, "Protocol": "HTTPS"})
+    template.has_resource_properties("AWS::ElasticLoadBalancingV2::TargetGroup", {"ProtocolVersion": "HTTP2"})
+
+
+def test_cloudwatch_agent_and_metric_scaling(context, template_of):
+    template = template_of("JavaStack", context)
+
+    (launch_template,) = template.find_resources("AWS::EC2::LaunchTemplate").values()
+    user_data = launch_template["Properties"]["LaunchTemplateData"]["UserData"]["Fn::Base64"]
+    assert "amazon-cloudwatch-agent-ctl -a fetch-config" in user_data
+    assert "-javaagent:/opt/jmx-exporter/jmx_prometheus_javaagent.jar=9404:/opt/jmx-exporter/config.yaml" in user_data
+    # The agent is configured before Tomcat restarts with the javaagent
+    assert user_data.index("amazon-cloudwatch-agent-ctl -a") < user_data.index("systemctl try-restart tomcat")
+    assert '"metric_namespace": "SbiFpt/Java"' in user_data
+
+    (role,) = template.find_resources("AWS::IAM::Role", {
+        "Properties": {"RoleName": "sbi-fpt-bench-launch-template-role"},
+    }).values()
+    assert "CloudWatchAgentServerPolicy" in str(role["Properties"]["ManagedPolicyArns"])
+
+    template.has_resource_properties("AWS::AutoScaling::ScalingPolicy", {
+        "TargetTrackingConfiguration": assertions.Match.object_like({
+            "CustomizedMetricSpecification": {
+                "Namespace": "SbiFpt/Java",
+                "MetricName": "tomcat_threadpool_currentthreadsbusy",
+                "Dimensions": [{"Name": "Service", "Value": "sbi-fpt-bench-java"}],
+                "Statistic": "Average",
+            },
+            "TargetValue": 120,
+        }),
+    })
+
+
+def test_metric_scaling_needs_metrics(context, template_of):
+    del context["java"]["metrics"]
+    with pytest.raises(ValueError):
+        template_of("JavaStack", context)
@@ -0,0 +1,53 @@
+import pytest
+
+from sbi_fpt.stack.jvm import catalina_opts, instance_memory_mib, jvm_profile
+
+
+@pytest.mark.parametrize("instance_type, memory_mib", [
+    ("t2.micro", 1024),
+    ("t3.medium", 4096),
+    ("m6i.large", 8192),
+    ("c7g.xlarge", 8192),
+    ("r6g.2xlarge", 65536),
+    ("c6g.medium", 2048),
+    ("m7g.medium", 4096),
+])
+def test_instance_memory(instance_type, memory_mib):
+    assert instance_memory_mib(instance_type) == memory_mib
+
+
+@pytest.mark.parametrize("instance_type", ["m5.metal", "c7g.metal-48xl", "x2idn.large", "t3.metal"])
+def test_unknown_instance_memory_asks_for_memory_mib(instance_type):
+    with pytest.raises(ValueError, match="set java.jvm.memoryMib"):
+        instance_memory_mib(instance_type)
+
+
+def test_small_instance_keeps_headroom():
+    profile = jvm_profile("t2.micro", {})
+
+    assert profile["heapPercent"] == 50
+    options = catalina_opts(profile)
+    assert "-XX:MaxRAMPercentage=50" in options
+    assert "-XX:+UseG1GC" in options
+    assert "-XX:MaxMetaspaceSize=128m" in options
+    assert "-XX:SharedArchiveFile=/var/cache/tomcat/tomcat.jsa" in options
+
+
+def test_gc_by_mode():
+    assert "-XX:+UseZGC" in catalina_opts(jvm_profile("m6i.xlarge", {"mode": "latency"}))
+    # Too little memory for ZGC to pay off
+    assert "-XX:MaxGCPauseMillis=100" in catalina_opts(jvm_profile("t3.small", {"mode": "latency"}))
+    assert "-XX:+UseParallelGC" in catalina_opts(jvm_profile("c6i.large", {"mode": "throughput"}))
+    with pytest.raises(ValueError):
+        jvm_profile("t3.small", {"mode": "fast"})
+
+
+def test_launch_template_installs_profile(context, template_of):
+    context["java"]["instanceType"] = "m6i.large"
+    template = template_of("JavaStack", context)
+
+    (launch_template,) = template.find_resources("AWS::EC2::LaunchTemplate").values()
+    user_data = str(launch_template["Properties"]["LaunchTemplateData"]["UserData"])
+    assert "-XX:MaxRAMPercentage=70" in user_data
+    assert "EnvironmentFile=/etc/default/tomcat" in user_data
+    assert "-Xmx1024M" not in user_data
@@ -0,0 +1,98 @@
+import asyncio
+import json
+
+import pytest
+
+from sbi_fpt.loadtest import arrival_times, compare, main, parse_request, parse_stages, regressions, run
+from sbi_fpt.stand_in import StandInServer
+
+
+def run_against(profile, **kwargs):
+    async def scenario():
+        async with StandInServer(seed=7, **profile) as server:
+            return await run(server.url, ["/", "POST /api/orders"], **kwargs), dict(server.stats)
+
+    return asyncio.run(scenario())
+
+
+def test_stages_and_requests():
+    assert parse_stages("60:10-200, 300:200") == [(60.0, 10.0, 200.0), (300.0, 200.0, 200.0)]
+    assert parse_request("/health") == ("GET", "/health")
+    assert parse_request("post /api/orders") == ("POST", "/api/orders")
+    with pytest.raises(ValueError, match="SECONDS:START"):
+        parse_stages("fast")
+
+
+def test_arrivals_follow_the_ramp():
+    constant = list(arrival_times([(2, 10, 10)]))
+    assert len(constant) == 20
+    assert constant[:2] == pytest.approx([0.1, 0.2])
+
+    # 0 -> 20/s over 2s, then 20/s for 1s: 20 + 20 arrivals, denser towards the end of the ramp
+    ramp = list(arrival_times([(2, 0, 20), (1, 20, 20)]))
+    assert len(ramp) == 40
+    assert ramp[1] - ramp[0] > ramp[19] - ramp[18]
+    assert ramp[19] == pytest.approx(2.0)
+
+
+def test_open_loop_against_stand_in():
+    results, stats = run_against({"median_ms": 5, "p99_ms": 20}, rate=parse_stages("1:40"), connections=8)
+
+    assert results["settings"]["mode"] == "open"
+    assert results["totals"]["sent"] == results["totals"]["completed"] == 40
+    assert results["totals"]["status"] == {"200": 40}
+    assert results["totals"]["errorRate"] == 0.0
+    # Keep-alive: requests reuse the pooled connections
+    assert results["totals"]["connectionsOpened"] == stats["connections"] <= 8
+    assert 0.002 < results["latency"]["p50"] < 0.05
+    assert sum(results["histogram"].values()) == 40
+    assert sum(second["sent"] for second in results["timeline"]) == 40
+
+
+def test_closed_loop_ramps_users():
+    results, stats = run_against({"median_ms": 5, "p99_ms": 20}, concurrency=parse_stages("0.5:1-4,0.5:4"))
+
+    assert results["settings"]["mode"] == "closed"
+    assert results["totals"]["completed"] > 20
+    assert stats["peakBusy"] <= 4
+    assert results["totals"]["connectionsOpened"] <= 4
+
+
+def test_saturated_stand_in_rejects_like_tomcat():
+    results, stats = run_against({"median_ms": 50, "p99_ms": 60, "max_threads": 2, "accept_count": 2},
+                                 rate=parse_stages("0.5:100"), connections=50)
+
+    assert stats["peakBusy"] == 2
+    assert results["totals"]["status"]["503"] == stats["rejected"] > 0
+    assert results["totals"]["errorRate"] > 0.5
+
+
+def test_compare_flags_p99_regression():
+    base, _ = run_against({"median_ms": 2, "p99_ms": 5}, rate=parse_stages("0.5:40"))
+    # Far enough apart that scheduling jitter on the 5ms base can't close the gap
+    slower, _ = run_against({"median_ms": 100, "p99_ms": 200}, rate=parse_stages("0.5:40"))
+
+    comparison = compare(base, slower)
+    assert comparison["latency.p99"]["changePercent"] > 100
+    assert regressions(comparison, max_p99_increase=10, max_error_rate_increase=0.1)
+    assert not regressions(compare(base, base), max_p99_increase=10, max_error_rate_increase=0.1)
+    with pytest.raises(ValueError, match="format"):
+        compare({**base, "format": 0}, slower)
+
+
+def test_cli_writes_results_and_fails_on_regression(tmp_path, capsys):
+    async def scenario():
+        async with StandInServer(seed=7, median_ms=20, p99_ms=50) as server:
+            baseline = tmp_path / "baseline.json"
+            baseline.write_text(json.dumps(await run(server.url, ["/"], rate=parse_stages("0.5:20"))))
+            # Same server made faster: no regression
+            server.profile.update(median_ms=2, p99_ms=5)
+            args = [server.url, "--rate", "0.5:20", "--output", str(tmp_path / "run.json"), "--baseline", str(baseline)]
+            faster = await asyncio.get_running_loop().run_in_executor(None, main, args)
+            server.profile.update(median_ms=100, p99_ms=200)
+            slower = await asyncio.get_running_loop().run_in_executor(None, main, args)
+            return faster, slower
+
+    assert asyncio.run(scenario()) == (0, 1)
+    assert json.loads((tmp_path / "run.json").read_text())["format"] == 1
+    assert "Regression: p99" in capsys.readouterr().err
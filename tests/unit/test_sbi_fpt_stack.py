@@ -1,15 +1,114 @@
 import aws_cdk as core
 import aws_cdk.assertions as assertions
+import pytest
 
 from sbi_fpt.sbi_fpt_stack import SbiFptStack
+from sbi_fpt.stack.network import VPC_PARAMETERS, nat_gateway_azs, ordered_subnets
 
-# example tests. To run these tests, uncomment this file along with the example
-# resource in sbi_fpt/sbi_fpt_stack.py
-def test_sqs_queue_created():
+
+def test_vpc_and_subnets_created(context):
     app = core.App()
-    stack = SbiFptStack(app, "sbi-fpt")
+    stack = SbiFptStack(app, "sbi-fpt", context=context)
+    template = assertions.Template.from_stack(stack)
+
+    template.resource_count_is("AWS::EC2::VPC", 1)
+    template.resource_count_is("AWS::EC2::Subnet", len(context["vpc"]["subnets"]))
+    template.resource_count_is("AWS::EC2::NatGateway", 1)
+    template.has_output("VpcId", {"Export": {"Name": "sbi-fpt-bench-vpcId"}})
+
+
+def nat_az_by_private_subnet_az(template):
+    resources = template.to_json()["Resources"]
+    subnet_az = {name: res["Properties"]["AvailabilityZone"]
+        for name, res in resources.items() if res["Type"] == "AWS::EC2::Subnet"}
+    table_subnet = {res["Properties"]["RouteTableId"]["Ref"]: res["Properties"]["SubnetId"]["Ref"]
+        for res in resources.values() if res["Type"] == "AWS::EC2::SubnetRouteTableAssociation"}
+    nat_subnet = {name: res["Properties"]["SubnetId"]["Ref"]
+        for name, res in resources.items() if res["Type"] == "AWS::EC2::NatGateway"}
+
+    return {
+        subnet_az[table_subnet[res["Properties"]["RouteTableId"]["Ref"]]]:
+            subnet_az[nat_subnet[res["Properties"]["NatGatewayId"]["Fn::GetAtt"][0]]]
+        for res in resources.values()
+        if res["Type"] == "AWS::EC2::Route" and "NatGatewayId" in res["Properties"]
+    }
+
+
+def test_nat_gateway_per_az(context):
+    azs = ["ap-southeast-1a", "ap-southeast-1b", "ap-southeast-1c"]
+    context["vpc"]["natGateways"] = "per-az"
+    context["vpc"]["subnets"] = (
+        [{"cidr": f"10.0.{i}.0/24", "type": "private", "availabilityZone": az} for i, az in enumerate(azs)]
+        + [{"cidr": f"10.0.{i + 10}.0/24", "type": "public", "availabilityZone": az} for i, az in enumerate(azs)]
+    )
+
+    stack = SbiFptStack(core.App(), "sbi-fpt", context=context)
     template = assertions.Template.from_stack(stack)
 
-#     template.has_resource_properties("AWS::SQS::Queue", {
-#         "VisibilityTimeout": 300
-#     })
+    template.resource_count_is("AWS::EC2::NatGateway", 3)
+    assert nat_az_by_private_subnet_az(template) == {az: az for az in azs}
+    assert nat_gateway_azs(context["vpc"]) == azs
+
+
+def test_single_nat_gateway_shared(context):
+    template = assertions.Template.from_stack(SbiFptStack(core.App(), "sbi-fpt", context=context))
+
+    assert set(nat_az_by_private_subnet_az(template).values()) == {"ap-southeast-1c"}
+    assert nat_gateway_azs(context["vpc"]) == ["ap-southeast-1c"]
+
+
+def test_vpc_endpoints(context):
+    template = assertions.Template.from_stack(SbiFptStack(core.App(), "sbi-fpt", context=context))
+    interface = context["vpc"]["endpoints"]["interface"]
+
+    template.resource_count_is("AWS::EC2::VPCEndpoint", len(interface) + 1)
+    template.has_resource_properties("AWS::EC2::VPCEndpoint", {
+        "VpcEndpointType": "Gateway",
+        "RouteTableIds": assertions.Match.any_value(),
+    })
+    template.has_resource_properties("AWS::EC2::VPCEndpoint", {
+        "VpcEndpointType": "Interface",
+        "ServiceName": {"Fn::Join": ["", ["com.amazonaws.", {"Ref": "AWS::Region"}, ".ssm"]]},
+        "PrivateDnsEnabled": True,
+        "SubnetIds": assertions.Match.any_value(),
+    })
+
+
+def test_vpc_endpoints_optional(context):
+    del context["vpc"]["endpoints"]
+    template = assertions.Template.from_stack(SbiFptStack(core.App(), "sbi-fpt", context=context))
+
+    template.resource_count_is("AWS::EC2::VPCEndpoint", 0)
+
+
+def test_network_published_for_lookup_free_import(context):
+    template = assertions.Template.from_stack(SbiFptStack(core.App(), "sbi-fpt", context=context))
+
+    template.resource_count_is("AWS::SSM::Parameter", len(VPC_PARAMETERS))
+    template.has_resource_properties("AWS::SSM::Parameter", {
+        "Name": "/sbi-fpt/bench/vpc/id",
+        "Value": {"Ref": assertions.Match.string_like_regexp("^Vpc")},
+    })
+    # ap-southeast-1a (10.0.12.0/24, the second public subnet) first
+    template.has_resource_properties("AWS::SSM::Parameter", {
+        "Name": "/sbi-fpt/bench/vpc/public-subnet-ids",
+        "Value": {"Fn::Join": [",", [
+            {"Ref": assertions.Match.string_like_regexp("PublicSubnet2Subnet")},
+            {"Ref": assertions.Match.string_like_regexp("PublicSubnet1Subnet")},
+        ]]},
+    })
+    template.has_resource_properties("AWS::SSM::Parameter", {
+        "Name": "/sbi-fpt/bench/vpc/nat-gateway-ids",
+        # The single NAT: a one-element join is just its id
+        "Value": {"Fn::GetAtt": [assertions.Match.string_like_regexp("PublicSubnet1NATGateway"), "NatGatewayId"]},
+    })
+
+
+def test_subnets_ordered_round_robin_by_az(context):
+    context["vpc"]["subnets"].append({"cidr": "10.0.10.0/24", "type": "private", "availabilityZone": "ap-southeast-1c"})
+    with pytest.raises(ValueError, match="same number of private subnets"):
+        ordered_subnets(context["vpc"], "private")
+
+    context["vpc"]["subnets"].append({"cidr": "10.0.15.0/24", "type": "private", "availabilityZone": "ap-southeast-1a"})
+    assert [net["cidr"] for net in ordered_subnets(context["vpc"], "private")] == [
+        "10.0.13.0/24", "10.0.10.0/24", "10.0.15.0/24", "10.0.14.0/24"]
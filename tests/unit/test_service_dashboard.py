@@ -0,0 +1,66 @@
+import aws_cdk.assertions as assertions
+
+from sbi_fpt.construct.service_dashboard import slo_alarm_names
+
+
+def test_slo_alarms_notify_auto_scaling_topic(context, template_of):
+    template = template_of("JavaStack", context)
+
+    template.resource_count_is("AWS::CloudWatch::Dashboard", 1)
+    for alarm_name in slo_alarm_names(context):
+        template.has_resource_properties("AWS::CloudWatch::Alarm", {
+            "AlarmName": alarm_name,
+            "AlarmActions": [{"Ref": assertions.Match.string_like_regexp("AutoScalingNotifications")}],
+        })
+    template.has_resource_properties("AWS::CloudWatch::Alarm", {
+        "AlarmName": "sbi-fpt-bench-java-latency-p99",
+        "ExtendedStatistic": "p99",
+        "Threshold": 1,
+    })
+    template.has_resource_properties("AWS::AutoScaling::AutoScalingGroup", {
+        "MetricsCollection": [{"Granularity": "1Minute"}],
+    })
+
+
+def test_dashboard_follows_copied_asgs(context, template_of):
+    template = template_of("JavaStack", context)
+
+    (dashboard,) = template.find_resources("AWS::CloudWatch::Dashboard").values()
+    body = "".join(part for part in dashboard["Properties"]["DashboardBody"]["Fn::Join"][1] if isinstance(part, str))
+    assert 'MetricName=\\"GroupInServiceInstances\\" \\"sbi-fpt-bench\\"' in body
+    # No unfiltered per-instance or account-wide NAT searches
+    assert "InstanceId" not in body and "{AWS/NATGateway" not in body
+    assert 'MetricName=\\"CPUCreditBalance\\" \\"sbi-fpt-bench\\"' in body
+    # The environment's NAT gateways, from the ids SbiFptStack publishes
+    assert body.count('"ErrorPortAllocation","NatGatewayId"') == 1
+    template.has_parameter("*", {
+        "Type": "AWS::SSM::Parameter::Value<String>",
+        "Default": "/sbi-fpt/bench/vpc/nat-gateway-ids",
+    })
+
+
+def test_dashboard_without_nat_ids_for_looked_up_vpc(context, template_of):
+    context["vpc"]["lookup"] = True
+    template = template_of("JavaStack", context)
+
+    (dashboard,) = template.find_resources("AWS::CloudWatch::Dashboard").values()
+    assert "NATGateway" not in str(dashboard["Properties"]["DashboardBody"])
+
+
+def test_slo_alarms_roll_back_deployments(context, template_of):
+    template = template_of("PipelineJavaStack", context)
+
+    template.has_resource_properties("AWS::CodeDeploy::DeploymentGroup", {
+        "AlarmConfiguration": {
+            "Alarms": [{"Name": alarm_name} for alarm_name in slo_alarm_names(context)],
+            "Enabled": True,
+        },
+    })
+
+
+def test_monitoring_is_optional(context, template_of):
+    del context["java"]["monitoring"]
+    template = template_of("JavaStack", context)
+
+    template.resource_count_is("AWS::CloudWatch::Dashboard", 0)
+    assert slo_alarm_names(context) == []
@@ -0,0 +1,93 @@
+import copy
+import json
+
+import pytest
+import yaml
+
+from sbi_fpt.synth import main, missing_context, offline_context, summarize, synth_app, template_diff
+from tests.conftest import FIXTURE_CONTEXT, FIXTURE_PARAMETERS, ROOT
+
+
+def test_template_diff():
+    base = {"Resources": {
+        "Bucket": {"Type": "AWS::S3::Bucket", "Properties": {"BucketName": "a", "Versioned": True}},
+        "Topic": {"Type": "AWS::SNS::Topic"},
+    }}
+    other = {"Resources": {
+        "Bucket": {"Type": "AWS::S3::Bucket", "Properties": {"BucketName": "a"}, "DeletionPolicy": "Retain"},
+        "Queue": {"Type": "AWS::SQS::Queue"},
+    }}
+
+    assert template_diff(base, other) == {
+        "added": ["Queue"],
+        "removed": ["Topic"],
+        "changed": {"Bucket": ["DeletionPolicy", "Properties.Versioned"]},
+    }
+
+
+def test_summary_normalizes_environment_names(tmp_path):
+    def write(name, body):
+        path = tmp_path / f"{name}.json"
+        path.write_text(body)
+        return str(path)
+
+    parameters = {
+        "dev": {"env": {"environment": "dev", "account": "111111111111", "region": "ap-southeast-1"}},
+        "prod": {"env": {"environment": "prod", "account": "222222222222", "region": "ap-southeast-1"}},
+    }
+    assemblies = {
+        "dev": {"JavaStack": write("dev", '{"Resources": {"Log": {"Properties": {"BucketName": "sbi-fpt-dev-alb-log"}}}}')},
+        "prod": {"JavaStack": write("prod", '{"Resources": {"Log": {"Properties": {"BucketName": "sbi-fpt-prod-alb-log"}}}}'),
+                 "EdgeStack": write("edge", '{"Resources": {}}')},
+    }
+
+    summary = summarize(parameters, assemblies, "dev")
+
+    assert summary["resourceCounts"] == {"dev": {"JavaStack": 1}, "prod": {"JavaStack": 1, "EdgeStack": 0}}
+    assert summary["diffs"] == {"prod": {"EdgeStack": "only in this environment"}}
+
+
+def test_environments_synthesize_in_parallel(parameters, tmp_path):
+    variants = copy.deepcopy(parameters)
+    other = variants[f"{FIXTURE_CONTEXT}2"] = copy.deepcopy(parameters[FIXTURE_CONTEXT])
+    other["env"]["environment"] = f"{FIXTURE_CONTEXT}2"
+    other["vpc"]["natGateways"] = "per-az"
+    path = tmp_path / "parameters.yaml"
+    path.write_text(yaml.safe_dump(variants))
+
+    assert main(["--parameters", str(path), "--stacks", "SbiFptStack", "--output", str(tmp_path / "out"),
+                 "--no-nag", "--format", "json"]) == 0
+
+    summary = json.loads((tmp_path / "out" / "summary.json").read_text())
+    assert (tmp_path / "out" / FIXTURE_CONTEXT / "SbiFptStack.template.json").exists()
+    assert (tmp_path / "out" / f"{FIXTURE_CONTEXT}2" / "SbiFptStack.template.json").exists()
+    # One NAT gateway per AZ instead of a single one
+    diff = summary["diffs"][f"{FIXTURE_CONTEXT}2"]["SbiFptStack"]
+    assert "EnvPublicSubnet2NATGateway" in diff["added"]
+    assert "EnvPublicSubnet1Subnet" not in diff["added"]
+
+
+def test_base_must_be_synthesized(tmp_path, capsys):
+    with pytest.raises(SystemExit):
+        main(["--parameters", FIXTURE_PARAMETERS, "--environments", FIXTURE_CONTEXT, "--base", "prod",
+              "--output", str(tmp_path / "out")])
+    assert "--base prod is not one of the synthesized environments" in capsys.readouterr().err
+    assert not (tmp_path / "out").exists()
+
+
+def test_synth_without_lookups(context, tmp_path):
+    with open(f"{ROOT}/cdk.json") as file:
+        flags = json.load(file)["context"]
+
+    # cdk.json flags only, nothing cached: the imported VPC comes from SSM at deploy time
+    assembly = synth_app(context, str(tmp_path / "flags"), ["JavaStack", "CacheStack"], flags, nag=False)
+    assert missing_context(assembly) == []
+    template = json.loads(open(assembly.get_stack_artifact("JavaStack").template_full_path).read())
+    assert {"Type": "AWS::SSM::Parameter::Value<String>",
+            "Default": "/sbi-fpt/bench/vpc/public-subnet-ids"} in template["Parameters"].values()
+
+    # The AZ lookup of SbiFptStack and the opt-in VPC lookup, answered by the stand-in
+    context["vpc"]["lookup"] = True
+    assembly = synth_app(context, str(tmp_path / "offline"), ["SbiFptStack", "JavaStack"],
+                         {**flags, **offline_context(context)}, nag=False)
+    assert missing_context(assembly) == []
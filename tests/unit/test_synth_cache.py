@@ -0,0 +1,130 @@
+import json
+import os
+import shutil
+import stat
+import sys
+
+import yaml
+
+from sbi_fpt.deploy import main
+from sbi_fpt.registry import STACKS_BY_ID
+from sbi_fpt.synth_cache import input_fingerprint, source_files
+from tests.conftest import FIXTURE_CONTEXT, FIXTURE_PARAMETERS, ROOT
+
+# Stand-in for the CDK CLI: synth writes one template per selected stack
+# (content from FAKE_TEMPLATE_<id>), deploy logs the stack id
+FAKE_CDK = f"""#!{sys.executable}
+import json, os, sys
+
+args = sys.argv[1:]
+with open(os.environ["FAKE_CDK_LOG"], "a") as log:
+    log.write(" ".join(args[:1] + [a for a in args if a.startswith("stacks=")] + args[3:4]) + "\\n")
+if args[0] == "synth":
+    outdir = args[args.index("--output") + 1]
+    stacks = [a for a in args if a.startswith("stacks=")][0][len("stacks="):].split(",")
+    os.makedirs(outdir, exist_ok=True)
+    artifacts = {{}}
+    for stack in stacks:
+        with open(os.path.join(outdir, stack + ".template.json"), "w") as file:
+            json.dump({{"Description": os.environ.get("FAKE_TEMPLATE_" + stack, "1")}}, file)
+        artifacts[stack] = {{"type": "aws:cloudformation:stack", "properties": {{"templateFile": stack + ".template.json"}}}}
+    with open(os.path.join(outdir, "manifest.json"), "w") as file:
+        json.dump({{"artifacts": artifacts}}, file)
+"""
+
+
+def test_sources_follow_imports_and_referenced_files():
+    files = {os.path.relpath(path, ROOT) for path in source_files("sbi_fpt.stack.java_stack", ROOT)}
+
+    assert {
+        "sbi_fpt/stack/java_stack.py",
+        "sbi_fpt/stack/bootstrap.py",
+        "sbi_fpt/stack/metrics.py",
+        "sbi_fpt/construct/service_dashboard.py",
+        "sbi_fpt/alb_logs.py",
+        "functions/spot_drain",
+        "user_data/warm_pool_lifecycle.sh",
+    } <= files
+    assert "sbi_fpt/stack/java_pipeline.py" not in files
+
+
+def test_fingerprint_covers_only_the_stack_sections(context):
+    java, cdk_pipeline = STACKS_BY_ID["JavaStack"], STACKS_BY_ID["PipelineCDKStack"]
+    before = {spec: input_fingerprint(spec, context, ROOT) for spec in (java, cdk_pipeline)}
+
+    context["cdk"]["branch"] = "release"
+
+    assert input_fingerprint(java, context, ROOT) == before[java]
+    assert input_fingerprint(cdk_pipeline, context, ROOT) != before[cdk_pipeline]
+
+
+def test_fingerprint_covers_registry_and_dependencies(context, tmp_path):
+    root = tmp_path / "app"
+    shutil.copytree(os.path.join(ROOT, "sbi_fpt"), root / "sbi_fpt", ignore=shutil.ignore_patterns("__pycache__"))
+    java = STACKS_BY_ID["JavaStack"]
+    before = input_fingerprint(java, context, str(root))
+
+    # A renamed stack or flipped pin_env lives in the registry, not in the stack module
+    registry = root / "sbi_fpt" / "registry.py"
+    registry.write_text(registry.read_text().replace('name_suffix="java-stack"', 'name_suffix="java-app-stack"'))
+    assert input_fingerprint(java, context, str(root)) != before
+
+    # JavaStack reads the VPC published by SbiFptStack
+    after_registry = input_fingerprint(java, context, str(root))
+    context["vpc"]["natGateways"] = "per-az"
+    assert input_fingerprint(java, context, str(root)) != after_registry
+
+
+def test_deploy_skips_unchanged_stacks(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(ROOT)
+    cdk = tmp_path / "cdk"
+    cdk.write_text(FAKE_CDK)
+    cdk.chmod(cdk.stat().st_mode | stat.S_IEXEC)
+    log = tmp_path / "cdk.log"
+    monkeypatch.setenv("FAKE_CDK_LOG", str(log))
+
+    parameters = tmp_path / "parameters.yaml"
+    parameters.write_text(open(FIXTURE_PARAMETERS).read())
+
+    def deploy():
+        log.write_text("")
+        code = main(["--context", FIXTURE_CONTEXT, "--parameters", str(parameters), "--cdk", str(cdk),
+                     "--output", str(tmp_path / "cdk.out"), "--cache", str(tmp_path / "cache")])
+        assert code == 0
+        return log.read_text().splitlines(), capsys.readouterr().out
+
+    calls, _ = deploy()
+    deployed = [call.split()[1] for call in calls if call.startswith("deploy")]
+    assert "SbiFptStack" in deployed and "JavaStack" in deployed
+    assert json.loads((tmp_path / "cache" / f"{FIXTURE_CONTEXT}.json").read_text()).keys() == set(deployed)
+
+    # Nothing changed: no synth, no deploy
+    calls, out = deploy()
+    assert calls == []
+    assert "JavaStack: skipped, inputs unchanged" in out
+
+    # A java setting changed: only the stacks reading java are synthesized,
+    # and only the one whose template changed is deployed
+    params = yaml.safe_load(parameters.read_text())
+    params[FIXTURE_CONTEXT]["java"]["jvm"]["mode"] = "latency"
+    parameters.write_text(yaml.safe_dump(params))
+    monkeypatch.setenv("FAKE_TEMPLATE_JavaStack", "2")
+
+    calls, out = deploy()
+    (synth,) = [call for call in calls if call.startswith("synth")]
+    assert "JavaStack" in synth and "SbiFptStack" not in synth and "PipelineCDKStack" not in synth
+    assert [call for call in calls if call.startswith("deploy")] == ["deploy JavaStack"]
+    assert "PipelineJavaStack: skipped, template and assets unchanged" in out
+    assert "SbiFptStack: skipped, inputs unchanged" in out
+
+    # A new golden AMI: JavaStack's template is identical, it reads the AMI from SSM
+    # at deploy time, so it is deployed after GoldenAmiStack anyway
+    params = yaml.safe_load(parameters.read_text())
+    params[FIXTURE_CONTEXT]["java"]["goldenAmi"]["version"] = "1.0.1"
+    parameters.write_text(yaml.safe_dump(params))
+    monkeypatch.setenv("FAKE_TEMPLATE_GoldenAmiStack", "2")
+
+    calls, out = deploy()
+    deploys = [call for call in calls if call.startswith("deploy")]
+    assert deploys.index("deploy GoldenAmiStack") < deploys.index("deploy JavaStack")
+    assert "JavaStack: template and assets unchanged, deployed after its redeployed dependencies" in out
@@ -4,6 +4,7 @@
 TOMCAT_VERSION=10.1.31
 INSTALL_DIR=$HOME/tomcat   # Install in the user's home directory
 SERVICE_NAME=tomcat
+ARCH=$(dpkg --print-architecture)   # amd64 or arm64 (Graviton)
 
 # Update packages
 echo "Updating packages..."
@@ -40,11 +41,12 @@ Type=forking
 User=$USER
 Group=$USER
 
-Environment=JAVA_HOME=/usr/lib/jvm/java-21-openjdk-amd64
+Environment=JAVA_HOME=/usr/lib/jvm/java-21-openjdk-$ARCH
 Environment=CATALINA_PID=$INSTALL_DIR/latest/temp/tomcat.pid
 Environment=CATALINA_HOME=$INSTALL_DIR/latest
 Environment=CATALINA_BASE=$INSTALL_DIR/latest
-Environment='CATALINA_OPTS=-Xms512M -Xmx1024M -server -XX:+UseParallelGC'
+# CATALINA_OPTS is generated per instance type by the launch template user data
+EnvironmentFile=-/etc/default/tomcat
 Environment='JAVA_OPTS=-Djava.awt.headless=true -Djava.security.egd=file:/dev/./urandom'
 
 ExecStart=$INSTALL_DIR/latest/bin/startup.sh
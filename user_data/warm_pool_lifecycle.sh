@@ -0,0 +1,49 @@
+#!/bin/bash
+
+# Complete the Auto Scaling launch lifecycle action once this instance is ready.
+# Runs on every boot: when the instance enters the warm pool and again when it
+# leaves the pool for InService.
+
+source /etc/default/warm-pool-lifecycle   # LIFECYCLE_HOOK_NAME, APP_PORT, READY_TIMEOUT
+
+imds() {
+  local token
+  token=$(curl -sf -X PUT "http://169.254.169.254/latest/api/token" -H "X-aws-ec2-metadata-token-ttl-seconds: 300")
+  curl -sf -H "X-aws-ec2-metadata-token: $token" "http://169.254.169.254/latest/$1"
+}
+
+INSTANCE_ID=$(imds meta-data/instance-id)
+REGION=$(imds meta-data/placement/region)
+
+# The target state is published shortly after boot
+until TARGET_STATE=$(imds meta-data/autoscaling/target-lifecycle-state) && [ -n "$TARGET_STATE" ]; do
+  sleep 5
+done
+echo "Target lifecycle state: $TARGET_STATE"
+
+RESULT=CONTINUE
+if [[ "$TARGET_STATE" == Warmed:* ]]; then
+  # Entering the pool: finish the first-boot install before the instance is stopped
+  cloud-init status --wait
+else
+  # Going InService: Tomcat must answer and the CodeDeploy agent must be running
+  DEADLINE=$((SECONDS + READY_TIMEOUT))
+  until systemctl is-active --quiet codedeploy-agent && curl -sf -o /dev/null "http://localhost:$APP_PORT/"; do
+    if (( SECONDS > DEADLINE )); then
+      echo "Not ready after ${READY_TIMEOUT}s"
+      RESULT=ABANDON
+      break
+    fi
+    sleep 5
+  done
+fi
+
+ASG_NAME=$(aws autoscaling describe-auto-scaling-instances --region "$REGION" --instance-ids "$INSTANCE_ID" \
+  --query 'AutoScalingInstances[0].AutoScalingGroupName' --output text)
+
+echo "Completing $LIFECYCLE_HOOK_NAME for $INSTANCE_ID in $ASG_NAME with $RESULT"
+aws autoscaling complete-lifecycle-action --region "$REGION" \
+  --auto-scaling-group-name "$ASG_NAME" \
+  --lifecycle-hook-name "$LIFECYCLE_HOOK_NAME" \
+  --instance-id "$INSTANCE_ID" \
+  --lifecycle-action-result "$RESULT"